@@ -0,0 +1,71 @@
+"""Pluggable arithmetic backend: gmpy2 (GMP) if installed, else pure Python.
+
+The active backend's functions are bound as attributes of this module, so
+callers use backend.gcd(...) etc. and follow setBackend at run time. Both
+backends return equal values (ints and bools) for the same inputs.
+
+The backend may be forced with the PRIMES_BACKEND environment variable
+('python' or 'gmpy2') or by calling setBackend.
+
+"""
+
+import os
+import helperFuncs
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+def gmpy2_extGCD(N, M):
+    """Return (a, b, c) with N*a + M*b = gcd(N, M) = c (see extGCD)."""
+    c, a, b = gmpy2.gcdext(N, M)
+    return int(a), int(b), int(c)
+
+def gmpy2_modInv(N, M):
+    """Attempt to invert N mod M (see modInv)."""
+    try:
+        return True, int(gmpy2.invert(N, M))
+    except ZeroDivisionError:
+        return False, int(gmpy2.gcd(N, M))
+
+backends = {
+    'python': {
+        'gcd': helperFuncs.gcd,
+        'jacobiSymbol': helperFuncs.jacobiSymbol,
+        'isIntegerSquare': helperFuncs.isIntegerSquare,
+        'extGCD': helperFuncs.extGCD,
+        'modInv': helperFuncs.modInv,
+        'mpz': int}}
+
+if gmpy2 is not None:
+    backends['gmpy2'] = {
+        'gcd': lambda n, k: int(gmpy2.gcd(n, k)),
+        'jacobiSymbol': gmpy2.jacobi,
+        'isIntegerSquare': gmpy2.is_square,
+        'extGCD': gmpy2_extGCD,
+        'modInv': gmpy2_modInv,
+        'mpz': gmpy2.mpz}
+
+active = None
+
+def setBackend(name):
+    """Make the named backend ('python' or 'gmpy2') active."""
+    global active
+    if name not in backends:
+        raise ValueError(f'backend {name!r} is unavailable; '
+                         f'choose from {sorted(backends)}')
+
+    globals().update(backends[name])
+    active = name
+
+def getBackend():
+    """Return the name of the active backend."""
+    return active
+
+def availableBackends():
+    """Return the names of the backends that can be activated."""
+    return sorted(backends)
+
+setBackend(os.environ.get('PRIMES_BACKEND',
+                          'gmpy2' if gmpy2 is not None else 'python'))
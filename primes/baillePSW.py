@@ -1,76 +1,124 @@
 """BaillePSW."""
 
-from helperFuncs import gcd, v_2, isIntegerSquare, jacobiSymbol
+from math import gcd
+from functools import reduce
+from helperFuncs import v_2, isSquareResidue
 from specialCases import fastCases
+from deterministicMillerRabin import isPrimeU64
+from lucasSequence import strongLucasCheck
+from modContext import modContext, reducingCutOff
+import backend
 
 composite = False
 likelyPrime = True
 
+u64CutOff = 1122004669633 #Below this isPrimeU64 needs at most 4 bases.
+
+#N % nqrModulus gives N mod |D| for D = 5, -7, ..., -67 and N mod 64, so
+#also the residues isSquareResidue needs (2882880 | nqrModulus).
+nqrModulus = 64 * reduce(lambda a, b: a*b // gcd(a, b), range(5, 68, 2))
+
+#Totals over oddNQR calls since resetLucasCounts(): searches, Jacobi symbols
+#evaluated (D trials), squares detected and searches that exhausted effort.
+lucasCounts = {'searches': 0, 'trials': 0, 'squares': 0, 'exhausted': 0}
+
+def resetLucasCounts():
+    """Zero every entry of lucasCounts."""
+    for key in lucasCounts:
+        lucasCounts[key] = 0
+
 def oddNQR(N, effort=100):
-    """Return the first (alternating) odd number that is not a QR mod N."""
+    """Return the first (alternating) odd number that is not a QR mod N.
+
+    Candidates are Selfridge's 5, -7, 9, -11, ... (effort/2 of them). A
+    square N, for which none exists, is detected first with isSquareResidue
+    and returns 0, as does exhausting effort. One N % nqrModulus serves the
+    candidates up to 67; by reciprocity (D/N) = +-(N mod |D| / |D|), so
+    their symbols take only small-integer arithmetic.
+
+    """
     #Proved on avg ~3.1478 tries.
-    res = 0
-    start, sgn = 5, 1
+    lucasCounts['searches'] += 1
+    r = int(N % nqrModulus)
+    if isSquareResidue(r) and backend.isIntegerSquare(N):
+        lucasCounts['squares'] += 1
+        return 0
+
     for i in range(5, effort+5, 4):
-        if jacobiSymbol(i, N) == -1:
-            res = i; break
-            
-        if jacobiSymbol(-i-2, N) == -1:
-            res = -i-2; break
+        for D in (i, -i-2):
+            lucasCounts['trials'] += 1
+            d = abs(D)
+            res = backend.jacobiSymbol(r % d if d < 68 else int(N % d), d)
+            if d & r & 2: #d = N = 3 mod(4)
+                res = -res
+            if (D < 0) and (r & 3 == 3): #(-1/N) = -1
+                res = -res
+            if res == -1:
+                return D
 
-    return res
+    lucasCounts['exhausted'] += 1
+    return 0
 
-def millerRabin_Baille(N, N_, pow2, oddM):
+def millerRabin_Baille(N, N_, pow2, oddM, ctx=None, budget=None):
     """Perform the (base=B) Miller-Rabin primality test."""
+    if ctx is not None:
+        x = ctx.pow(2, oddM)
+        if x in {ctx.one, ctx.minusOne}:
+            return likelyPrime
+
+        for _ in range(1, pow2):
+            if budget is not None:
+                budget.check()
+            x = ctx.sqr(x)
+            if x == ctx.minusOne:
+                return likelyPrime
+
+        return composite
+
     x = pow(2, oddM, N)    
     if x in {1, N_}: #Check if x == +-1 mod(N)
         return likelyPrime
         
     for _ in range(1, pow2): #Check if x**(2**r) == -1 mod(N); 0 < r < pow2
+        if budget is not None:
+            budget.check()
         x = pow(x, 2, N)
         if x == N_:
             return likelyPrime
             
     return composite
 
-def strongLucas_Baille(N, D, Q, pow2, d):
-    """Perform the strong Lucas probable prime test."""    
-    u, v = 1, 1
-    powQ = Q
-
-    nextU = lambda u, v: (u+v)//2 if (u+v)%2==0 else (u+v+N)//2
-    nextV = lambda u, v: (D*u+v)//2 if (D*u+v)%2==0 else (D*u+v+N)//2
-    for i in bin(d)[3:]:
-        u, v = (u*v)%N, (v**2 - 2*powQ)%N
-        powQ = pow(powQ, 2, N)
-        if i == '1':
-            u, v = nextU(u, v)%N, nextV(u, v)%N
-            powQ = (powQ * Q) % N
-    
-    if (u == 0) or (v == 0):
-        return likelyPrime
+def strongLucas_Baille(N, Q, pow2, d, ctx=None, budget=None):
+    """Perform the strong Lucas probable prime test with P = 1."""
+    return strongLucasCheck(N, 1, Q, pow2, d, ctx, budget)
 
-    for _ in range(pow2):
-        u, v = (u*v)%N, (v**2 - 2*powQ)%N
-        if (v == 0):
-            return likelyPrime
-        powQ = pow(powQ, 2, N)
+def baillePSW(N, effortNQR=100, ctx=None, budget=None):
+    """Perform the (strong) Baille-PSW test; no known exceptions.
 
-    return composite
+    ctx is an optional modContext(N); very large N get one automatically.
+    N < u64CutOff is passed to isPrimeU64, which is exact and cheaper there.
+    An optional budget is checked in the Miller-Rabin squarings and every
+    bit of the Lucas ladder, raising BudgetExpired once spent (see Budget).
+
+    """
+    if N < u64CutOff:
+        return isPrimeU64(N)
 
-def baillePSW(N, effortNQR=100):
-    """Perform the (strong) Baille-PSW test; no known exceptions."""
     looseCheck = fastCases(N)
     if looseCheck != 1:
         return bool(looseCheck)
 
+    N = backend.mpz(N)
+    if (ctx is None) and (N.bit_length() >= reducingCutOff):
+        ctx = modContext(N)
+
     NMinus = N-1
     pow2Minus, dMinus = v_2(NMinus)
-    if not millerRabin_Baille(N, NMinus, pow2Minus, dMinus):
+    if not millerRabin_Baille(N, NMinus, pow2Minus, dMinus, ctx, budget):
         return composite
 
     D = oddNQR(N, effortNQR)
-    if gcd(D, N) != 1:
+    if backend.gcd(D, N) != 1:
         return composite
     
     Q = (1-D)//4
@@ -80,7 +128,7 @@ def baillePSW(N, effortNQR=100):
     else:
         pow2Plus, dPlus = v_2(NPlus)
 
-    if not strongLucas_Baille(N, D, Q, pow2Plus, dPlus):
+    if not strongLucas_Baille(N, Q, pow2Plus, dPlus, ctx, budget):
         return composite
 
     return likelyPrime
@@ -0,0 +1,45 @@
+"""Bernstein's batch GCD: shared factors among many integers at once."""
+
+from math import gcd
+from helperFuncs import productTree, remainderTree
+import backend
+
+def batchGCD(values):
+    """Return the gcd of each value with the product of all the others.
+
+    Parameters
+    ----------
+    values : list : Positive integers (e.g. a set of RSA moduli).
+
+    Returns
+    -------
+    res : list : res[i] = gcd(values[i], prod(values[j] for j != i)).
+
+    Notes
+    -----
+    With P the product of all values (the root of a product tree), P is
+    reduced modulo every values[i]**2 down a tree of squares, and
+    res[i] = gcd((P mod values[i]**2) / values[i], values[i]). This costs
+    a few product tree traversals, quasi-linear in the total size, where
+    pairwise gcds cost n**2 / 2 of them. res[i] == values[i] means each
+    factor of values[i] is shared (e.g. a repeated value), and pairwise
+    gcds with the other flagged values tell them apart.
+
+    Example(s)
+    ----------
+    >>> batchGCD([11*13, 17*19, 11*23, 29*31])
+    >>> [11, 1, 11, 1]
+
+    """
+    values = [backend.mpz(v) for v in values]
+    if len(values) < 2:
+        return [1] * len(values)
+
+    tree = productTree(values)
+    squares = [[v*v for v in level] for level in tree[:-1]]
+    rems = remainderTree(tree[-1][0], squares + [[tree[-1][0]**2]])
+    return [int(backend.gcd(r // v, v)) for r, v in zip(rems, values)]
+
+def sharedFactors(values):
+    """Return {i: g} for the values sharing a factor g > 1 with another."""
+    return {i: g for i, g in enumerate(batchGCD(values)) if g > 1}
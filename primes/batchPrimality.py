@@ -0,0 +1,122 @@
+"""Batch primality testing for large collections of candidates."""
+
+from math import gcd
+from itertools import repeat
+from smallDivisors import primesUnder1008, oddPrimesUnder100, primorial100
+from deterministicMillerRabin import millerRabinCutOffs, isPrimeU64
+from baillePSW import baillePSW
+from parallel import chunkBounds, numChunks, runChunks
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+detLimit = millerRabinCutOffs[41] #detMillerRabin is exact below this.
+baseLimit = millerRabinCutOffs[17] #Below this at most 7 bases are needed.
+minChunk = 10**4 #Smallest batch slice worth sending to a process.
+
+def passesBases(N):
+    """Return if odd N (1009 <= N < detLimit) passes detMillerRabin's bases."""
+    N_ = N-1
+    pow2 = (N_ & -N_).bit_length() - 1
+    oddM = N_ >> pow2
+    for p, cutOff in millerRabinCutOffs.items():
+        x = pow(p, oddM, N)
+        if (x != 1) and (x != N_):
+            for _ in range(pow2-1):
+                x = x*x % N
+                if x == N_:
+                    break
+            else:
+                return False
+
+        if N < cutOff:
+            break
+
+    return True
+
+def survivorTest(N, test=baillePSW):
+    """Return the primality of N, a candidate without divisors under 100.
+
+    Past a few bases baillePSW (exact below 2**64) is cheaper than the
+    remaining bases of detMillerRabin, which still cover [2**64, detLimit).
+    test decides N >= detLimit.
+
+    """
+    if N < baseLimit:
+        return isPrimeU64(N)
+
+    if 2**64 <= N < detLimit:
+        return passesBases(N)
+
+    return test(N)
+
+def isPrimeBatch(values, workers=1, executor=None, test=baillePSW):
+    """Return a boolean mask of which values are prime.
+
+    Parameters
+    ----------
+    values   : list, array.array, numpy.ndarray : Non-negative integers.
+    workers  : int      : Processes to split the batch across.
+    executor : Executor : Optional process pool to run the chunks on.
+    test     : function : Probable prime test for values >= detLimit, e.g.
+                          baillePSW or underwoodFrobenius (picklable).
+
+    Returns
+    -------
+    mask : list, numpy.ndarray : mask[i] is True iff values[i] is prime. A
+                                 boolean ndarray is returned for ndarray input.
+
+    Notes
+    -----
+    Values under 1009 are looked up. The rest are sifted by the odd primes
+    under 100 in whole-batch passes, (one gcd with their product per value,
+    or one vectorized modulus per prime for ndarrays) and only the survivors
+    see a full test (see survivorTest).
+
+    Example(s)
+    ----------
+    >>> isPrimeBatch([2, 9, 1009, 2**61-1, 2**61+1])
+    >>> [True, False, True, True, False]
+
+    """
+    isArray = (np is not None) and isinstance(values, np.ndarray)
+    if (workers > 1) or (executor is not None):
+        if not (isArray or hasattr(values, '__getitem__')):
+            values = list(values)
+
+        parts = numChunks(workers, executor)
+        chunks = chunkBounds(0, len(values), parts, minSize=minChunk)
+        args = [(values[a:b], 1, None, test) for a, b in chunks]
+        masks = runChunks(isPrimeBatch, args, workers, executor)
+        if isArray:
+            return np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+        return [flag for mask in masks for flag in mask]
+
+    if isArray:
+        return isPrimeBatch_numpy(values, test)
+
+    values = values if isinstance(values, list) else list(values)
+    mask = [N in primesUnder1008 if N < 1009 else False for N in values]
+    coprime = map(gcd, values, repeat(primorial100 >> 1))
+    for i, (N, g) in enumerate(zip(values, coprime)):
+        if (g == 1) and (N & 1) and (N >= 1009):
+            mask[i] = survivorTest(N, test)
+
+    return mask
+
+def isPrimeBatch_numpy(values, test=baillePSW):
+    """Perform isPrimeBatch on an integer ndarray."""
+    small = values < 1009
+    mask = np.zeros(values.shape, dtype=bool)
+    mask[small] = np.isin(values[small], sorted(primesUnder1008))
+
+    candidates = ~small & (values % 2 == 1)
+    for p in oddPrimesUnder100:
+        candidates &= (values % p != 0)
+
+    for i in np.flatnonzero(candidates):
+        mask.flat[i] = survivorTest(int(values.flat[i]), test)
+
+    return mask
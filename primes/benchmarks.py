@@ -0,0 +1,308 @@
+"""Benchmark the tests and factoring routines over sweeps of input sizes.
+
+From the shell, python benchmarks.py --bits 64 512 4096 --json run.json
+times every routine and writes the results; --baseline old.json flags the
+points that got slower (and exits with status 1 if any did).
+
+"""
+
+import sys
+import csv
+import json
+import random
+import argparse
+import platform
+from time import perf_counter
+from baillePSW import baillePSW
+from deterministicMillerRabin import detMillerRabin
+from millerRabin import singleMillerRabin, millerRabin
+from strongLucas import strongLucas
+from frobenius import underwoodFrobenius
+from specialCases import fastCases
+from helperFuncs import isIntegerSquare, jacobiSymbol, percentile
+from fastECM import lenstra
+from factorization import ecmSchedule
+from primeSearch import randomPrime
+import backend
+
+defaultBits = (32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+defaultFactorBits = (24, 32, 40, 48) #Smaller factor of lenstra's semiprimes.
+quantiles = (50, 90, 99)
+fields = (('routine', 'kind', 'bits', 'calls', 'misses', 'mean', 'min')
+          + tuple(f'p{q}' for q in quantiles) + ('max',))
+
+testKinds = ('prime', 'odd', 'semiprime')
+oneArg = lambda N, rand: (N,)
+
+#name: (function, arguments from (N, rand), input kinds, largest bits). The
+#arguments are drawn before timing starts.
+routines = {
+    'baillePSW': (baillePSW, oneArg, testKinds, None),
+    'detMillerRabin': (detMillerRabin, oneArg, testKinds, 81),
+    'singleMillerRabin': (singleMillerRabin, oneArg, testKinds, None),
+    'millerRabin': (millerRabin, oneArg, testKinds, None),
+    'strongLucas': (strongLucas, lambda N, rand: (N, 1, -1), testKinds, None),
+    'underwoodFrobenius': (underwoodFrobenius, oneArg, testKinds, None),
+    'fastCases': (fastCases, oneArg, testKinds, None),
+    'isIntegerSquare': (isIntegerSquare, oneArg, ('square', 'odd'), None),
+    'jacobiSymbol': (jacobiSymbol, lambda N, rand: (rand.randrange(N), N),
+                     ('odd',), None)}
+
+def summarize(times, **keys):
+    """Return a result row (see fields) for the call times of one point."""
+    times = sorted(times)
+    row = dict(keys, calls=len(times), mean=sum(times) / len(times),
+               min=times[0], max=times[-1])
+    row.setdefault('misses', 0)
+    row.update((f'p{q}', percentile(times, q)) for q in quantiles)
+    return row
+
+def makeInputs(bits, kind, count, rand, primePool=2):
+    """Return count inputs of about bits bits.
+
+    kind is 'prime', 'odd' (random odd integers, nearly all composite and
+    most rejected by trial division), 'semiprime' (two primes of half the
+    size: composites that need the full test) or 'square'. Random primes
+    cost a full search each (~100s at 8192 bits with gmpy2), so only
+    primePool distinct ones are drawn and the inputs cycle through them.
+
+    """
+    if kind == 'prime':
+        pool = [randomPrime(bits, rand) for _ in range(min(primePool, count))]
+        return [pool[i % len(pool)] for i in range(count)]
+
+    if kind == 'semiprime':
+        pool = [randomPrime(bits//2, rand) * randomPrime(bits - bits//2, rand)
+                for _ in range(min(primePool, count))]
+        return [pool[i % len(pool)] for i in range(count)]
+
+    if kind == 'square':
+        return [(rand.getrandbits(bits//2) | (1 << (bits//2 - 1)) | 1)**2
+                for _ in range(count)]
+
+    if kind == 'odd':
+        return [rand.getrandbits(bits) | (1 << (bits-1)) | 1
+                for _ in range(count)]
+
+    raise ValueError(f'unknown input kind {kind!r}')
+
+def timeCalls(func, argsList, reps):
+    """Return the time of every call func(*args), reps passes over argsList."""
+    times = []
+    for _ in range(reps):
+        for args in argsList:
+            start = perf_counter()
+            func(*args)
+            times.append(perf_counter() - start)
+
+    return times
+
+def benchLenstra(factorBits=defaultFactorBits, cofactorBits=64, count=5,
+                 rand=random):
+    """Time lenstra on p*q, p of each size in factorBits, q of cofactorBits.
+
+    lenstra runs with the first (B1, curves) of factorization.ecmSchedule;
+    calls that return N without a factor are counted as misses.
+
+    """
+    bound, effort = ecmSchedule[0]
+    rows = []
+    for bits in factorBits:
+        inputs = [randomPrime(bits, rand) * randomPrime(cofactorBits, rand)
+                  for _ in range(count)]
+        times, misses = [], 0
+        for N in inputs:
+            start = perf_counter()
+            res = lenstra(N, bound, effort)
+            times.append(perf_counter() - start)
+            misses += (res == N)
+
+        rows.append(summarize(times, routine='lenstra', bits=bits,
+                              kind=f'semiprime/{cofactorBits}',
+                              misses=misses))
+
+    return rows
+
+def runBenchmarks(names=None, bitSizes=defaultBits, kinds=None, count=10,
+                  reps=3, factorBits=defaultFactorBits, seed=0, primePool=2,
+                  log=print):
+    """Time the chosen routines over a sweep of sizes and input kinds.
+
+    Parameters
+    ----------
+    names      : list, None : Keys of routines, and/or 'lenstra' (all if None).
+    bitSizes   : tuple      : Input sizes in bits.
+    kinds      : list, None : Input kinds to keep (see makeInputs).
+    count      : int        : Inputs per (size, kind).
+    reps       : int        : Timed passes over the inputs.
+    factorBits : tuple      : Factor sizes for lenstra (see benchLenstra).
+    seed       : int        : Seed of the inputs, so runs are comparable.
+    primePool  : int        : Distinct primes per size (see makeInputs).
+    log        : function   : Called with a line per row, None for silence.
+
+    Returns
+    -------
+    rows : list : One dict per point with the keys of fields; times are in
+                  seconds per call, over count*reps calls.
+
+    Example(s)
+    ----------
+    >>> rows = runBenchmarks(['baillePSW'], (512,), ['prime'], log=None)
+    >>> rows[0]['p50']
+    >>> 0.0006137... #Seconds, machine dependent
+
+    """
+    names = list(routines) + ['lenstra'] if names is None else names
+    inputs, rows = {}, []
+    for name in names:
+        if name == 'lenstra':
+            points = [benchLenstra(factorBits, rand=random.Random(seed))]
+        else:
+            points = benchRoutine(name, bitSizes, kinds, count, reps, seed,
+                                  primePool, inputs)
+        for newRows in points:
+            for row in newRows:
+                if log is not None:
+                    log(formatRow(row))
+            rows.extend(newRows)
+
+    return rows
+
+def benchRoutine(name, bitSizes, kinds, count, reps, seed, primePool,
+                 inputs):
+    """Generate the rows of one of routines, a list per (bits, kind) point.
+
+    The inputs of a point depend only on seed, bits and kind (so runs of
+    different routines compare), and are cached in inputs for the others;
+    the extra arguments of makeArgs have a generator of their own, so they
+    do not depend on whether the inputs were cached.
+
+    """
+    func, makeArgs, routineKinds, maxBits = routines[name]
+    for bits in bitSizes:
+        if (maxBits is not None) and (bits > maxBits):
+            continue
+        for kind in routineKinds:
+            if (kinds is not None) and (kind not in kinds):
+                continue
+            rand = random.Random(f'{seed}/{bits}/{kind}')
+            if (bits, kind) not in inputs:
+                inputs[bits, kind] = makeInputs(bits, kind, count, rand,
+                                                primePool)
+            argRand = random.Random(f'{seed}/{bits}/{kind}/args')
+            argsList = [makeArgs(N, argRand) for N in inputs[bits, kind]]
+            times = timeCalls(func, argsList, reps)
+            yield [summarize(times, routine=name, kind=kind, bits=bits)]
+
+def formatRow(row):
+    """Return a one line summary of a result row."""
+    stats = ' '.join(f'p{q} {row[f"p{q}"]:.3g}s' for q in quantiles)
+    misses = f' ({row["misses"]} misses)' if row['misses'] else ''
+    return (f'{row["routine"]}: {row["kind"]}: {row["bits"]} bits: '
+            f'mean {row["mean"]:.3g}s {stats}{misses}')
+
+def environment():
+    """Return what a run's timings depend on, stored with the results."""
+    return {'backend': backend.active, 'python': platform.python_version(),
+            'machine': platform.machine(), 'platform': platform.platform()}
+
+def writeJSON(rows, path):
+    """Write rows, with environment(), to path as JSON."""
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(), 'results': rows}, f,
+                  indent=1)
+
+def writeCSV(rows, path):
+    """Write rows to path as CSV, one column per entry of fields."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def readResults(path):
+    """Return the rows of a file from writeJSON or writeCSV."""
+    with open(path, newline='') as f:
+        if not path.endswith('.csv'):
+            return json.load(f)['results']
+
+        rows = list(csv.DictReader(f))
+
+    for row in rows: #CSV holds text; restore the numbers.
+        for key in fields[2:]:
+            row[key] = (int if key in ('bits', 'calls', 'misses')
+                        else float)(row[key])
+    return rows
+
+def compareBaseline(rows, baseline, tolerance=1.2, stat='p50', noise=2e-6):
+    """Return the rows slower than their baseline rows.
+
+    Parameters
+    ----------
+    rows      : list  : Current results (see runBenchmarks).
+    baseline  : list  : Earlier results; rows are matched on routine, kind
+                        and bits, and points missing from either are skipped.
+    tolerance : float : Flag a point when stat grew by more than this factor.
+    stat      : str   : Field compared, e.g. 'p50', 'p99' or 'mean'.
+    noise     : float : Increases under this many seconds are never flagged.
+
+    Returns
+    -------
+    regressions : list : Dicts of routine, kind, bits, baseline, current and
+                         ratio (current/baseline), worst first.
+
+    """
+    key = lambda row: (row['routine'], row['kind'], int(row['bits']))
+    old = {key(row): row[stat] for row in baseline}
+    regressions = []
+    for row in rows:
+        before = old.get(key(row))
+        if (before is None) or (row[stat] - before <= noise):
+            continue
+
+        ratio = row[stat] / before if before > 0 else float('inf')
+        if ratio > tolerance:
+            regressions.append(dict(zip(('routine', 'kind', 'bits'), key(row)),
+                                    baseline=before, current=row[stat],
+                                    ratio=ratio))
+
+    return sorted(regressions, key=lambda r: -r['ratio'])
+
+def main(argv=None):
+    """Run the benchmarks from the command line (see the module docstring)."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--routines', nargs='+',
+                        choices=list(routines) + ['lenstra'])
+    parser.add_argument('--bits', nargs='+', type=int, default=defaultBits)
+    parser.add_argument('--kinds', nargs='+',
+                        choices=testKinds + ('square',))
+    parser.add_argument('--factor-bits', nargs='+', type=int,
+                        default=defaultFactorBits)
+    parser.add_argument('--count', type=int, default=10)
+    parser.add_argument('--reps', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--csv', help='write the results to this file')
+    parser.add_argument('--baseline', help='JSON or CSV of an earlier run')
+    parser.add_argument('--tolerance', type=float, default=1.2)
+    parser.add_argument('--stat', default='p50')
+    args = parser.parse_args(argv)
+
+    rows = runBenchmarks(args.routines, args.bits, args.kinds, args.count,
+                         args.reps, args.factor_bits, args.seed)
+    if args.json:
+        writeJSON(rows, args.json)
+    if args.csv:
+        writeCSV(rows, args.csv)
+    if args.baseline:
+        regressions = compareBaseline(rows, readResults(args.baseline),
+                                      args.tolerance, args.stat)
+        for r in regressions:
+            print(f'REGRESSION {r["routine"]}: {r["kind"]}: {r["bits"]} '
+                  f'bits: {args.stat} {r["baseline"]:.3g}s -> '
+                  f'{r["current"]:.3g}s ({r["ratio"]:.2f}x)')
+        return 1 if regressions else 0
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Cooperative time and effort budgets for the long-running loops."""
+
+from time import time
+
+defaultEvery = 16 #Calls of Budget.check between reads of the clock.
+
+class BudgetExpired(Exception):
+    """Raised by Budget.check once the budget is spent; args[0] is progress."""
+
+class Budget:
+    """A deadline, a step limit and a cancellation flag that loops poll.
+
+    Parameters
+    ----------
+    seconds  : float, None : Time allowed from now.
+    deadline : float, None : Or an absolute time() (the earlier one wins).
+    steps    : int, None   : Calls of check allowed (e.g. prime powers of
+                             ECM stage 1, or bits of a Lucas ladder).
+    every    : int         : check reads the clock and stop every this many
+                             calls; the step limit is exact.
+    stop     : Event, None : Also spent once this event is set.
+
+    Notes
+    -----
+    Loops that take a budget call check() once per iteration, which raises
+    BudgetExpired when the budget is spent. Before raising, the keywords
+    of that check (e.g. bases=3) are stored in progress, so the caller
+    sees how far the loop got: lenstra records 'curves' and 'B1', the
+    largest bound a curve completed, and 'stage1', the last prime reached.
+    cancel() spends the budget from any thread. A Budget has is_set, so
+    it also serves where an Event is polled.
+
+    Example(s)
+    ----------
+    >>> budget = Budget(seconds=2)
+    >>> lenstra(N, 11000, 1000, budget=budget) #N if nothing was found.
+    >>> budget.progress
+    >>> {'curves': 37, 'B1': 11000, 'stage1': 5323}
+
+    """
+
+    def __init__(self, seconds=None, deadline=None, steps=None,
+                 every=defaultEvery, stop=None):
+        if seconds is not None:
+            end = time() + seconds
+            deadline = end if deadline is None else min(deadline, end)
+
+        self.deadline, self.steps, self.stop = deadline, steps, stop
+        self.every, self.untilPoll = every, every
+        self.count, self.spent = 0, False
+        self.progress = {}
+
+    def cancel(self):
+        """Spend the budget; the next check raises BudgetExpired."""
+        self.spent = True
+
+    def expired(self):
+        """Return if the budget is spent, reading the clock and stop now."""
+        if not self.spent:
+            self.spent = (
+                ((self.deadline is not None) and (time() > self.deadline))
+                or ((self.steps is not None) and (self.count > self.steps))
+                or ((self.stop is not None) and self.stop.is_set()))
+        return self.spent
+
+    is_set = expired
+
+    def remaining(self):
+        """Return the seconds left (None without a deadline)."""
+        return None if self.deadline is None else self.deadline - time()
+
+    def check(self, n=1, **progress):
+        """Count n steps; raise BudgetExpired if the budget is spent.
+
+        The deadline and stop are read every `every` steps; progress is
+        stored (see Budget) only when raising.
+
+        """
+        self.count += n
+        self.untilPoll -= n
+        if (self.spent or (self.untilPoll <= 0)
+                or ((self.steps is not None) and (self.count > self.steps))):
+            self.untilPoll = self.every
+            if self.expired():
+                self.progress.update(progress)
+                raise BudgetExpired(self.progress)
@@ -0,0 +1,560 @@
+"""Primality certificates from N-1 (Pocklington/BLS) or ECPP (Atkin-Morain)."""
+
+import random
+from math import gcd, isqrt
+from time import time
+from functools import lru_cache
+from decimal import Decimal, localcontext, getcontext
+from helperFuncs import v_p, iroot, jacobiSymbol, sqrtMod
+from smallDivisors import smallFactors
+from deterministicMillerRabin import isPrimeU64
+from baillePSW import baillePSW
+from factorization import pollardRho
+from fastECM import mult
+from primeSearch import randomPrime
+
+smallCutOff = 2**64 #isPrimeU64 is deterministic, so it proves N < 2**64.
+trialBound = 10**5 #Primes under this are split off N-1 and curve orders.
+rhoIterations = 2 * 10**4 #Rho budget for the rest of N-1 or of an order.
+
+maxDiscriminant = 2000 #ECPP tries the CM discriminants -2000 <= D < 0
+maxClassNumber = 8 #of class number h(D) <= 8, smallest h first (424 D).
+
+def partialFactor(M, rhoIters=rhoIterations):
+    """Return ({q: e}, R) with M = R * prod(q**e), every q a likely prime.
+
+    Primes under trialBound come from smallFactors, then Pollard rho splits
+    the rest until the pieces pass baillePSW. Pieces rho can't split within
+    rhoIters (0 skips rho) are left in R.
+
+    """
+    factors = {}
+    for p in smallFactors(M, trialBound):
+        factors[p], M = v_p(M, p)
+
+    stack, R = [M], 1
+    while stack:
+        c = stack.pop()
+        if c == 1:
+            continue
+
+        if (c < trialBound**2) or baillePSW(c):
+            factors[c] = factors.get(c, 0) + 1
+            continue
+
+        d = pollardRho(c, rhoIters) if rhoIters else c
+        if d == c:
+            R *= c
+        else:
+            stack += [d, c//d]
+
+    return factors, R
+
+def orderBound(N):
+    """Return an integer above (N**(1/4) + 1)**2, ECPP's bound on q."""
+    return (iroot(N, 4) + 2)**2
+
+def pocklington(N, rand=random):
+    """Return a Pocklington/BLS certificate of the likely prime N, or None.
+
+    N-1 = F*R is factored until F >= N**(1/3), with every q | F given a
+    witness a: a**(N-1) = 1 and gcd(a**((N-1)/q) - 1, N) = 1 mod(N). If
+    F**2 > N that proves N prime (Pocklington), otherwise it does when
+    c1**2 - 4*c2 is not a square, N = c2*F**2 + c1*F + 1 in base F (BLS).
+
+    """
+    factors, R = partialFactor(N-1)
+    F = (N-1) // R
+    if F**3 < N:
+        return None
+
+    if F*F <= N:
+        c2, c1 = divmod(R, F)
+        d = c1*c1 - 4*c2
+        if (d >= 0) and (isqrt(d)**2 == d):
+            return None
+
+    cert = {'N': N, 'type': 'pocklington', 'factors': []}
+    for q, e in factors.items():
+        a, g = 1, N
+        while g == N:
+            a += 1
+            if pow(a, N-1, N) != 1:
+                raise ValueError(f'{N} is composite, witness {a}')
+            g = gcd(pow(a, (N-1)//q, N) - 1, N)
+
+        if g != 1:
+            raise ValueError(f'{N} is composite, factor {g}')
+
+        sub = certify(q, rand)
+        if sub is None:
+            return None
+        cert['factors'].append([q, e, a, sub])
+
+    return cert
+
+def reducedForms(D):
+    """Return the reduced primitive forms (a, b, c) of discriminant D < 0.
+
+    Their number is the class number h(D), and tau = (-b + sqrt(D))/(2a)
+    runs over the classes of the order of discriminant D.
+
+    """
+    forms = []
+    for a in range(1, isqrt(-D // 3) + 1):
+        for b in range(-a+1, a+1):
+            c, r = divmod(b*b - D, 4*a)
+            if r or (c < a) or ((b < 0) and (a == c)):
+                continue
+            if gcd(gcd(a, b), c) == 1:
+                forms.append((a, b, c))
+
+    return forms
+
+@lru_cache(maxsize=None)
+def cmDiscriminants(bound=maxDiscriminant, maxH=maxClassNumber):
+    """Return {h: [D, ...]} for -bound <= D < 0 with h(D) <= maxH."""
+    res = {}
+    for d in range(3, bound+1):
+        if d % 4 in (0, 3):
+            h = len(reducedForms(-d))
+            if h <= maxH:
+                res.setdefault(h, []).append(-d)
+
+    return dict(sorted(res.items()))
+
+@lru_cache(maxsize=None)
+def decimalPi(prec):
+    """Return pi to prec digits (the recipe of the decimal documentation)."""
+    with localcontext() as ctx:
+        ctx.prec = prec + 2
+        last, t, s, n, na, d, da = 0, Decimal(3), 3, 1, 0, 0, 24
+        while s != last:
+            last = s
+            n, na = n+na, na+8
+            d, da = d+da, da+32
+            t = (t * n) / d
+            s += t
+
+    return +s
+
+def cmul(z, w):
+    """Return the product of two complex numbers given as (re, im) pairs."""
+    return z[0]*w[0] - z[1]*w[1], z[0]*w[1] + z[1]*w[0]
+
+def jInvariant(a, b, D):
+    """Return j((-b + sqrt(D))/(2a)) as (re, im) in the current context.
+
+    j = E4**3 / Delta in q = exp(2*pi*i*tau), with E4 = 1 + 240*sum(
+    sigma3(n)*q**n) and Delta = q*prod(1 - q**n)**24. |q| < 0.0044 for a
+    reduced form, so every term adds two digits.
+
+    """
+    prec = getcontext().prec
+    pi = decimalPi(prec)
+    r = (-pi * Decimal(-D).sqrt() / a).exp()
+    theta = pi * b / a #q = r*exp(-i*theta), cos and sin by Taylor series.
+    cos, sin, term, k = Decimal(0), Decimal(0), Decimal(1), 0
+    while abs(term) > Decimal(10) ** -(prec+2):
+        if k % 2:
+            sin += term if k % 4 == 1 else -term
+        else:
+            cos += term if k % 4 == 0 else -term
+        k += 1
+        term = term * theta / k
+
+    q, qn = (r*cos, -r*sin), (Decimal(1), Decimal(0))
+    E4, P = (Decimal(1), Decimal(0)), (Decimal(1), Decimal(0))
+    for n in range(1, prec//2 + 10):
+        qn = cmul(qn, q)
+        s3 = 240 * sum(d**3 for d in range(1, n+1) if n % d == 0)
+        E4 = (E4[0] + s3*qn[0], E4[1] + s3*qn[1])
+        P = cmul(P, (1 - qn[0], -qn[1]))
+
+    P2 = cmul(P, P)
+    P8 = cmul(cmul(P2, P2), cmul(P2, P2))
+    delta = cmul(q, cmul(P8, cmul(P8, P8)))
+    num = cmul(cmul(E4, E4), E4)
+    norm = delta[0]**2 + delta[1]**2
+    return cmul(num, (delta[0]/norm, -delta[1]/norm))
+
+@lru_cache(maxsize=None)
+def hilbertPolynomial(D):
+    """Return the Hilbert class polynomial of D, monic, as integer coeffs.
+
+    The coefficients (lowest degree first) are the rounded coefficients of
+    prod(x - j(tau)) over reducedForms(D), computed with enough digits for
+    |j(tau)| ~ exp(pi*sqrt(|D|)/a). Its roots mod a prime N = (u**2 +
+    |D|*v**2)/4 are the j-invariants of the curves with CM by D.
+
+    Example(s)
+    ----------
+    >>> hilbertPolynomial(-15)
+    >>> (-121287375, 191025, 1)
+
+    """
+    forms = reducedForms(D)
+    size = sum(3.1416 * (-D)**0.5 / a for a, b, c in forms) / 2.3025
+    with localcontext() as ctx:
+        ctx.prec = int(size) + 10*len(forms) + 30
+        poly = [(Decimal(1), Decimal(0))]
+        for a, b, c in forms: #Multiply poly by (x - j).
+            j = jInvariant(a, b, D)
+            poly = [(Decimal(0), Decimal(0))] + poly
+            for i in range(len(poly)-1):
+                t = cmul(poly[i+1], j)
+                poly[i] = (poly[i][0] - t[0], poly[i][1] - t[1])
+
+        coeffs = tuple(int(re.to_integral_value()) for re, im in poly)
+        if any(abs(re - c) + abs(im) > Decimal('0.1')
+               for (re, im), c in zip(poly, coeffs)):
+            raise ArithmeticError(f'lost precision for H({D})')
+
+    return coeffs
+
+def polyTrim(f):
+    """Drop the zero leading coefficients of f (in place) and return it."""
+    while f and (f[-1] == 0):
+        f.pop()
+    return f
+
+def polyDivmod(f, g, N):
+    """Return (q, r) with f = q*g + r mod N, coefficients lowest first."""
+    f = [c % N for c in f]
+    inv = pow(g[-1], -1, N)
+    q = [0] * max(len(f) - len(g) + 1, 0)
+    for i in reversed(range(len(q))):
+        c = q[i] = f[i + len(g) - 1] * inv % N
+        for k, gk in enumerate(g):
+            f[i+k] = (f[i+k] - c*gk) % N
+
+    return q, polyTrim(f[:len(g)-1])
+
+def polyMulMod(f, g, h, N):
+    """Return f*g mod (h, N)."""
+    res = [0] * (len(f) + len(g) - 1)
+    for i, c in enumerate(f):
+        for k, d in enumerate(g):
+            res[i+k] += c*d
+
+    return polyDivmod(res, h, N)[1]
+
+def polyPowMod(f, e, h, N):
+    """Return f**e mod (h, N)."""
+    res = [1]
+    for bit in bin(e)[2:]:
+        res = polyMulMod(res, res, h, N)
+        if bit == '1':
+            res = polyMulMod(res, f, h, N)
+
+    return res
+
+def polyRoot(H, N, rand=random):
+    """Return a root mod the prime N of H, a product of distinct linears.
+
+    Equal-degree splitting (Cantor-Zassenhaus): gcd(H, (x+d)**((N-1)/2)-1)
+    separates the roots r with r+d a square, so random d split H until a
+    linear factor is left.
+
+    """
+    H = [c % N for c in H]
+    while len(H) > 2:
+        g = polyPowMod([rand.randrange(N), 1], (N-1)//2, H, N)
+        g = polyTrim([(g[0] - 1) % N] + g[1:]) if g else [N-1]
+        f = H
+        while g:
+            f, g = g, polyDivmod(f, g, N)[1]
+
+        if 1 < len(f) < len(H):
+            H = f if 2*len(f) <= len(H) + 1 else polyDivmod(H, f, N)[0]
+
+    return -H[0] * pow(H[1], -1, N) % N
+
+def cornacchia(D, N):
+    """Return (u, v) with u**2 + |D|*v**2 = 4N for a prime N, or None.
+
+    D < 0 is 0 or 1 mod(4) and a square mod(N) (Cohen, Algorithm 1.5.3).
+
+    """
+    x = sqrtMod(D, N)
+    if (x - D) % 2:
+        x = N - x
+
+    a, b, bound = 2*N, x, isqrt(4*N)
+    while b > bound:
+        a, b = b, a % b
+
+    c, r = divmod(4*N - b*b, -D)
+    if r or (isqrt(c)**2 != c):
+        return None
+    return b, isqrt(c)
+
+def curveOrders(D, u, v, N):
+    """Return the possible orders of curves mod N with CM by discriminant D."""
+    if D == -4:
+        traces = (u, 2*v)
+    elif D == -3:
+        traces = (u, (u + 3*v)//2, (u - 3*v)//2)
+    else:
+        traces = (u,)
+
+    return [N + 1 + s*t for t in traces for s in (1, -1)]
+
+def cmCurves(D, N, rand=random):
+    """Generate curves (a, b) mod N whose order is one of curveOrders.
+
+    j = 0 and 1728 (D = -3, -4) have six and four twists, which random b
+    (resp. a) hit in turn. Otherwise a root j of the Hilbert polynomial
+    gives a curve and its quadratic twist.
+
+    """
+    if D == -3:
+        yield from ((0, rand.randrange(1, N)) for _ in range(60))
+        return
+    if D == -4:
+        yield from ((rand.randrange(1, N), 0) for _ in range(40))
+        return
+
+    j = polyRoot(hilbertPolynomial(D), N, rand)
+    if j in (0, 1728):
+        return
+
+    c = 2
+    while jacobiSymbol(c, N) != -1:
+        c += 1
+
+    a, b = 3*j*(1728-j) % N, 2*j*(1728-j)**2 % N
+    yield a, b
+    yield a*c*c % N, b*c*c*c % N
+
+def curvePoint(a, b, m, k, N, rand=random, tries=8):
+    """Return (x, y) on y**2 = x**3 + ax + b with mP = O != kP, or None.
+
+    None is returned at once if mP != O, as the curve then has another
+    order. Otherwise points with kP = O are discarded up to tries times.
+
+    """
+    for _ in range(tries):
+        x = rand.randrange(N)
+        rhs = (x*x*x + a*x + b) % N
+        if jacobiSymbol(rhs, N) != 1:
+            continue
+
+        y = sqrtMod(rhs, N)
+        exists, X, _ = mult(x, y, m, a, N)
+        if (not exists) or (X != float('inf')):
+            return None
+
+        exists, X, _ = mult(x, y, k, a, N)
+        if exists and (X != float('inf')):
+            return x, y
+
+    return None
+
+def cmOrders(discriminants, N):
+    """Return [(D, m), ...], the orders m of CM curves mod N for every D."""
+    orders = []
+    for D in discriminants:
+        if jacobiSymbol(D, N) == 1:
+            uv = cornacchia(D, N)
+            if uv is not None:
+                orders += [(D, m) for m in curveOrders(D, *uv, N)]
+
+    return orders
+
+def usableOrders(orders, N, rhoIters):
+    """Return ([(q, D, m), ...] by q, [(D, m), ...]), usable orders and rest.
+
+    An order m is usable if its largest likely prime factor q, found by
+    partialFactor(m, rhoIters), is above orderBound(N) and below N (so the
+    descent terminates).
+
+    """
+    bound = orderBound(N)
+    usable, rest = [], []
+    for D, m in orders:
+        q = max(partialFactor(m, rhoIters)[0], default=1)
+        if bound < q < N:
+            usable.append((q, D, m))
+        else:
+            rest.append((D, m))
+
+    return sorted(usable), rest
+
+def curveSteps(usable, N, rand=random):
+    """Generate an ECPP step (lacking 'sub') for each (q, D, m) of usable."""
+    for q, D, m in usable:
+        for a, b in cmCurves(D, N, rand):
+            P = curvePoint(a, b, m, m//q, N, rand)
+            if P is not None:
+                yield {'N': N, 'type': 'ecpp', 'a': a, 'b': b, 'm': m,
+                       'q': q, 'x': P[0], 'y': P[1]}
+                break
+
+def ecppSteps(N, rand=random):
+    """Generate ECPP steps for the likely prime N.
+
+    Parameters
+    ----------
+    N    : int                   : Likely prime (gcd(N, 6) = 1) to certify.
+    rand : random.Random, module : Source of randomness for curves/points.
+
+    Returns
+    -------
+    steps : generator : Certificates {'N', 'type': 'ecpp', 'a', 'b', 'm',
+                        'q', 'x', 'y'}, lacking the certificate 'sub' of q.
+
+    Notes
+    -----
+    For every D of cmDiscriminants that is a square mod N, Cornacchia gives
+    4N = u**2 + |D|*v**2 (if N is a norm) and so the orders m of the curves
+    with CM by D. An order is usable if m = k*q for a likely prime q above
+    orderBound(N). A curve of order m and a point P with mP = O != kP then
+    prove N prime once q is (Atkin-Morain).
+
+    Discriminants are taken one class number at a time, the usable orders
+    of each yielded smallest q first, with q found by trial division. The
+    orders left over are retried with partialFactor's rho at the end.
+
+    """
+    rest = []
+    for discriminants in cmDiscriminants().values():
+        usable, left = usableOrders(cmOrders(discriminants, N), N, 0)
+        rest += left
+        yield from curveSteps(usable, N, rand)
+
+    usable, _ = usableOrders(rest, N, rhoIterations)
+    yield from curveSteps(usable, N, rand)
+
+def certify(N, rand=random):
+    """Return a certificate that N is prime, or None if none is found.
+
+    Parameters
+    ----------
+    N    : int                   : Integer to prove prime.
+    rand : random.Random, module : Source of randomness for ECPP.
+
+    Returns
+    -------
+    cert : dict, None : A nested dict of ints, strings and lists (so json
+                        round trips it), checked by verifyCertificate:
+                        {'N', 'type': 'small'} for N < smallCutOff,
+                        {'N', 'type': 'pocklington', 'factors'} with
+                        factors = [[q, e, a, cert of q], ...] or
+                        {'N', 'type': 'ecpp', 'a', 'b', 'm', 'q', 'x', 'y',
+                        'sub': cert of q}.
+
+    Notes
+    -----
+    Raises ValueError if N is found composite. Pocklington/BLS is tried
+    first, as it is cheap when N-1 factors easily; otherwise ECPP steps are
+    tried in turn until q is certified the same way, backtracking if q
+    can't be. None is returned only if every step fails, which becomes
+    likelier as N grows, cmDiscriminants giving a bounded number of orders.
+
+    Example(s)
+    ----------
+    >>> cert = certify(2**127 - 1)
+    >>> cert['type'], verifyCertificate(cert)
+    >>> ('pocklington', True)
+
+    """
+    if N < smallCutOff:
+        if not isPrimeU64(N):
+            raise ValueError(f'{N} is not prime')
+        return {'N': N, 'type': 'small'}
+
+    if not baillePSW(N):
+        raise ValueError(f'{N} is composite')
+
+    cert = pocklington(N, rand)
+    if cert is None:
+        for step in ecppSteps(N, rand):
+            sub = certify(step['q'], rand)
+            if sub is not None:
+                step['sub'] = sub
+                return step
+
+    return cert
+
+def verifyCertificate(cert):
+    """Return if cert (from certify) proves cert['N'] prime.
+
+    Nothing in cert is trusted: every condition of the Pocklington, BLS or
+    Atkin-Morain theorem is rechecked, using a few modular powers or two
+    scalar multiplications per step, and every q recursively.
+
+    """
+    N, kind = cert['N'], cert['type']
+    if N < 2:
+        return False
+
+    if kind == 'small':
+        return (N < smallCutOff) and isPrimeU64(N)
+
+    if kind == 'pocklington':
+        F = 1
+        for q, e, a, sub in cert['factors']:
+            if (e < 1) or (sub['N'] != q) or not verifyCertificate(sub):
+                return False
+            if (pow(a, N-1, N) != 1) or (gcd(pow(a, (N-1)//q, N) - 1, N) != 1):
+                return False
+            F *= q**e
+
+        if ((N-1) % F != 0) or (F**3 < N):
+            return False
+        if F*F > N:
+            return True
+
+        c2, c1 = divmod((N-1)//F, F)
+        d = c1*c1 - 4*c2
+        return (d < 0) or (isqrt(d)**2 != d)
+
+    if kind == 'ecpp':
+        a, b, m, q, x, y = (cert[k] for k in ('a', 'b', 'm', 'q', 'x', 'y'))
+        if (gcd(N, 6) != 1) or (q <= orderBound(N)) or (m % q != 0):
+            return False
+        if (gcd(4*a**3 + 27*b**2, N) != 1) or ((y*y - x**3 - a*x - b) % N):
+            return False
+
+        exists, X, _ = mult(x % N, y % N, m, a % N, N)
+        if (not exists) or (X != float('inf')):
+            return False
+        exists, X, _ = mult(x % N, y % N, m//q, a % N, N)
+        if (not exists) or (X == float('inf')):
+            return False
+
+        return (cert['sub']['N'] == q) and verifyCertificate(cert['sub'])
+
+    return False
+
+def certificateSteps(cert):
+    """Return the number of non-small certificates in cert's tree."""
+    if cert['type'] == 'pocklington':
+        return 1 + sum(certificateSteps(f[3]) for f in cert['factors'])
+    if cert['type'] == 'ecpp':
+        return 1 + certificateSteps(cert['sub'])
+    return 0
+
+def timeCertificates(bitSizes=(128, 256, 512, 1024), reps=3, rand=random):
+    """Time certify and verifyCertificate on random primes and print both."""
+    for bits in bitSizes:
+        gen, ver, steps, kinds = 0, 0, 0, {}
+        for _ in range(reps):
+            N = randomPrime(bits, rand)
+            start = time()
+            cert = certify(N, rand)
+            gen += time() - start
+            if cert is None:
+                kinds['failed'] = kinds.get('failed', 0) + 1
+                continue
+
+            start = time()
+            assert verifyCertificate(cert)
+            ver += time() - start
+            steps += certificateSteps(cert)
+            kinds[cert['type']] = kinds.get(cert['type'], 0) + 1
+
+        print(f'{bits} bits: certify: {gen/reps:.3f}s: verify: {ver/reps:.4f}s'
+              f': ratio: {gen/max(ver, 1e-9):.0f}x: steps: {steps/reps:.1f}'
+              f': {kinds}')
@@ -2,6 +2,9 @@
 
 from helperFuncs import v_2
 from specialCases import fastCases
+from smallDivisors import primesUnder1008, primorial100
+from math import gcd
+import backend
 
 composite = False
 isPrime = True
@@ -22,25 +25,93 @@ millerRabinCutOffs = {
     41 : 3317044064679887385961981
     }
 
-def detMillerRabin(N):
-    """Determine if N < 3,317,044,064,679,887,385,961,981 is prime."""
+#(bound, bases): the bases prove primality for all N < bound (Jaeschke,
+#Sinclair); the single base was checked exhaustively below 341531.
+u64Bases = (
+    (341531, (9345883071009581737,)),
+    (1373653, (2, 3)),
+    (9080191, (31, 73)),
+    (25326001, (2, 3, 5)),
+    (4759123141, (2, 7, 61)),
+    (1122004669633, (2, 13, 23, 1662803)),
+    (2152302898747, (2, 3, 5, 7, 11)),
+    (3474749660383, (2, 3, 5, 7, 11, 13)),
+    (341550071728321, (2, 3, 5, 7, 11, 13, 17)),
+    (2**64, (2, 325, 9375, 28178, 450775, 9780504, 1795265022))
+    )
+
+def isPrimeU64(N):
+    """Determine if N < 2**64 is prime with the fewest Miller-Rabin bases.
+
+    Factors under 100 are removed with one gcd and the bases are chosen from
+    u64Bases by the size of N: one base below 341531, at most seven overall.
+
+    """
+    if N < 1009:
+        return N in primesUnder1008
+
+    if gcd(N, primorial100) != 1:
+        return composite
+
+    N_ = N-1
+    pow2 = (N_ & -N_).bit_length() - 1
+    oddM = N_ >> pow2
+    for bound, bases in u64Bases:
+        if N < bound:
+            break
+
+    for p in bases:
+        p %= N
+        if p == 0:
+            continue
+
+        x = pow(p, oddM, N)
+        if (x == 1) or (x == N_):
+            continue
+
+        for _ in range(pow2-1):
+            x = x*x % N
+            if x == N_:
+                break
+        else:
+            return composite
+
+    return isPrime
+
+def detMillerRabin(N, ctx=None):
+    """Determine if N < 3,317,044,064,679,887,385,961,981 is prime.
+
+    ctx is an optional modContext(N) to do the arithmetic in; without one,
+    N < 2**64 is passed to isPrimeU64.
+
+    """
+    if (ctx is None) and (N < 2**64):
+        return isPrimeU64(N)
+
     looseCheck = fastCases(N)
     if looseCheck != 1:
         return bool(looseCheck)
     
+    N = backend.mpz(N)
     N_ = N-1
     pow2, oddM = v_2(N_)
+    if ctx is None:
+        one, minusOne = 1, N_
+        power, square = (lambda p: pow(p, oddM, N)), (lambda x: pow(x, 2, N))
+    else:
+        one, minusOne = ctx.one, ctx.minusOne
+        power, square = (lambda p: ctx.pow(p, oddM)), ctx.sqr
 
     bases = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
     for p in bases:
-        x = pow(p, oddM, N)
+        x = power(p)
         for _ in range(pow2):
-            y = pow(x, 2, N)
-            if (y == 1) and (x not in {1, N_}):
+            y = square(x)
+            if (y == one) and (x not in {one, minusOne}):
                 return composite
             x = y
 
-        if y != 1:
+        if y != one:
             return composite
 
         if N < millerRabinCutOffs[p]:
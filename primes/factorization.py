@@ -0,0 +1,204 @@
+"""Complete factorization: trial division, rho, p-1 and ECM, then baillePSW."""
+
+from math import gcd
+from random import randrange
+from helperFuncs import v_p, perfectPower
+from smallDivisors import smallFactors
+from sieve import basePrimes
+from baillePSW import baillePSW
+from fastECM import lenstra
+from budget import BudgetExpired
+import backend
+
+trialBound = 10**4 #Primes under this are removed by smallFactors.
+rhoIterations = 10**5 #Total Brent iterations over all of rho's restarts.
+pm1Bound = 10**5 #Stage 1 bound of Pollard's p-1.
+gcdBatch = 128 #Steps multiplied together between gcds (rho and p-1).
+
+#(B1, curves) for ECM, in the order tried: aimed at 15, 20, 25, 30 digits.
+ecmSchedule = ((2000, 25), (11000, 90), (50000, 300), (250000, 700))
+
+def pollardRho(N, iterations=rhoIterations, budget=None):
+    """Attempt to return a factor of N by Pollard's rho (Brent's variant).
+
+    Parameters
+    ----------
+    N          : int    : Odd composite to be split.
+    iterations : int    : Budget of steps over all polynomials x**2 + c
+                          tried.
+    budget     : Budget : Optional; checked at every gcd (see Budget;
+                          'rho' is the number of iterations done).
+
+    Returns
+    -------
+    res : int : A factor of N (res=N, if factor can't be found).
+
+    Notes
+    -----
+    Brent's cycle detection compares x with a saved y at power-of-two
+    distances, and |x-y| are multiplied together for gcdBatch steps between
+    gcds. On a gcd of N the batch is replayed one step at a time.
+
+    """
+    N, total = backend.mpz(N), iterations
+    while iterations > 0:
+        c, y = randrange(1, N-1), randrange(N)
+        g, r, q = 1, 1, 1
+        while (g == 1) and (iterations > 0):
+            x = y
+            for _ in range(r):
+                y = (y*y + c) % N
+            k = 0
+            while (k < r) and (g == 1):
+                ys = y
+                for _ in range(min(gcdBatch, r-k)):
+                    y = (y*y + c) % N
+                    q = q * (x-y) % N
+                g = gcd(int(q), int(N))
+                k += gcdBatch
+                if budget is not None:
+                    budget.check(rho=total - iterations + r + min(k, r))
+            iterations -= 2*r
+            r *= 2
+
+        if g == N: #Replay the last batch one gcd at a time.
+            g = 1
+            while g == 1:
+                ys = (ys*ys + c) % N
+                g = gcd(int(x-ys), int(N))
+
+        if 1 < g < N:
+            return int(g)
+
+    return int(N)
+
+def pollardPM1(N, bound=pm1Bound, budget=None):
+    """Attempt to return a factor of N by Pollard's p-1 method (stage 1).
+
+    Parameters
+    ----------
+    N      : int    : Odd composite to be split.
+    bound  : int    : A factor p is found when p-1 is bound-powersmooth.
+    budget : Budget : Optional; checked at every gcd (see Budget).
+
+    Returns
+    -------
+    res : int : A factor of N (res=N, if factor can't be found).
+
+    """
+    N = backend.mpz(N)
+    primes = [2] + basePrimes(bound)
+    a = backend.mpz(2)
+    for i in range(0, len(primes), gcdBatch):
+        if budget is not None:
+            budget.check(pm1=primes[i])
+        prev = a
+        batch = []
+        for p in primes[i:i+gcdBatch]:
+            q = p
+            while q*p <= bound:
+                q *= p
+            batch.append(q)
+            a = pow(a, q, N)
+
+        g = gcd(int(a-1), int(N))
+        if g == N: #Replay the batch one prime power at a time.
+            a = prev
+            for q in batch:
+                a = pow(a, q, N)
+                g = gcd(int(a-1), int(N))
+                if g != 1: break
+
+        if g != 1:
+            return int(g)
+
+    return int(N)
+
+def splitFactor(N, rhoIters=rhoIterations, pm1=pm1Bound,
+                schedule=ecmSchedule, workers=1, budget=None):
+    """Return a factor 1 < d < N of odd composite N, or N if none is found.
+
+    Every stage checks budget (see Budget), and N is returned once it is
+    spent; budget.progress then tells how far the stages got.
+
+    """
+    try:
+        d = pollardRho(N, rhoIters, budget)
+        if (d == N) and pm1:
+            d = pollardPM1(N, pm1, budget)
+    except BudgetExpired:
+        return N
+
+    for B1, curves in schedule:
+        if (d != N) or ((budget is not None) and budget.expired()): break
+        d = lenstra(N, B1, curves, workers=workers, budget=budget)
+
+    return d
+
+def factorInt(N, trial=trialBound, rhoIters=rhoIterations, pm1=pm1Bound,
+              schedule=ecmSchedule, workers=1, budget=None):
+    """Return the prime factorization of N as a dict {p: e}.
+
+    Parameters
+    ----------
+    N        : int    : Positive integer to factor.
+    trial    : int    : Primes under trial are found by trial division.
+    rhoIters : int    : Pollard rho's iteration budget per cofactor.
+    pm1      : int    : Pollard p-1 bound per cofactor (0 skips it).
+    schedule : tuple  : (B1, curves) ECM rounds tried per cofactor.
+    workers  : int    : Processes the ECM curves are run on.
+    budget   : Budget : Optional time/effort limit (see splitFactor); once
+                        it is spent, cofactors are no longer split.
+
+    Returns
+    -------
+    factors : dict : {p: e} in increasing order of p, with N = prod(p**e).
+                     Every p is checked by baillePSW; a key that fails it is
+                     a composite none of the stages split within their
+                     budgets (or before budget was spent).
+
+    Notes
+    -----
+    Small primes are removed first, by one gcd with a primorial. Every
+    cofactor is then tested by baillePSW, reduced if a perfect power and
+    otherwise split by Pollard rho, p-1 and the ECM schedule in turn, the
+    pieces being factored the same way.
+
+    Example(s)
+    ----------
+    >>> factorInt(2**4 * 3 * 1000003**2 * (2**61-1))
+    >>> {2: 4, 3: 1, 1000003: 2, 2305843009213693951: 1}
+
+    """
+    if N < 1:
+        raise ValueError(f'cannot factor {N}, N must be positive')
+
+    factors = {}
+    for p in smallFactors(N, trial):
+        e, N = v_p(N, p)
+        factors[p] = e
+
+    stack = [(N, 1)]
+    while stack:
+        M, e = stack.pop()
+        if M == 1:
+            continue
+
+        if (M < trial*trial) or baillePSW(M): #M has no factors under trial.
+            factors[M] = factors.get(M, 0) + e
+            continue
+
+        b, k = perfectPower(M, trial) #M has no factors under trial.
+        if k > 1:
+            stack.append((b, e*k))
+            continue
+
+        d = M
+        if (budget is None) or not budget.expired():
+            d = splitFactor(M, rhoIters, pm1, schedule, workers, budget)
+        if d == M:
+            factors[M] = factors.get(M, 0) + e
+        else:
+            stack += [(d, e), (M//d, e)]
+
+    return dict(sorted(factors.items()))
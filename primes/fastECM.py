@@ -1,65 +1,17 @@
 """Implementation of Lenstra's elliptic-curve factorization (speed focused)."""
 
-from random import randint
-
-# Functions for modular inverses
-
-def extGCD(N, M):
-    """Return the GCD and Bezout coefficients of two integers.
-
-    Parameters
-    ----------
-    N, M : int : Non-zero integers, order does not matter.
-
-    Returns
-    -------
-    A 3-tuple of ints: (a, b, c) such that N*a + M*b = gcd(N, M) = c.
-
-    Example(s)
-    ----------
-    >>> extGCD(15, 2)
-    >>> (1, -7, 1)
-
-    >>> extGCD(12, 14)
-    >>> (-1, 1, 2)
-    
-    """
-    prevX, X = 0, 1
-    prevY, Y = 1, 0
-    while N != 0:
-        (q, N), M = divmod(M, N), N
-        prevY, Y = Y, prevY - q*Y
-        prevX, X = X, prevX - q*X
-
-    return prevX, prevY, M
-
-def modInv(N, M):
-    """Attempt to find the multiplicative inverse of an element in Z/MZ.
-
-    Parameters
-    ----------
-    N : int : Number to be inverted (not required to be principal value).
-    M : int : Modulus being considered.
-
-    Returns
-    -------
-    A 2-tuple of the form (exists, res).
-    
-    exists : bool : If the element is invertible.
-    res    : int  : If invertible the inverse else the obstruction (=gcd(n,m)).
-
-    Example(s)
-    ----------
-    >>> modInv(2, 6)
-    >>> (False, 2)
-
-    >>> modInv(3, 8)
-    >>> (True, 3)
-    
-    """
-    N %= M
-    N, _, gcf = extGCD(N, M)
-    return (True, N%M) if (gcf == 1) else (False, gcf)
+from random import randint, randrange, Random
+from math import gcd
+from time import time
+from threading import Event
+from multiprocessing import Manager
+from helperFuncs import extGCD, modInv
+from sieve import basePrimes, primeRange
+from parallel import chunkBounds, numChunks, runChunks
+from budget import BudgetExpired
+import backend
+
+primePowerCache = {} #bound: primePowerProduct(bound)
 
 # Elliptic curve operations
 
@@ -89,7 +41,7 @@ def double(x, y, a, M):
         exists, resX, resY = True, float('inf'), -1
 
     else: #general doubling
-        exists, dyInv = modInv(2*y, M)
+        exists, dyInv = backend.modInv(2*y, M)
         if not exists:
             resX, resY = dyInv, -1
         else: 
@@ -134,7 +86,7 @@ def add(pX, pY, qX, qY, a, M):
             return double(pX, pY, a, M)
         
     if exists is None: #general addition
-        exists, dxInv = modInv(qX-pX, M)
+        exists, dxInv = backend.modInv(qX-pX, M)
         if not exists:
             resX, resY = dxInv, -1
         else: 
@@ -184,24 +136,386 @@ def mult(x, y, k, a, M):
 
     return exists, resX, resY
 
+# Many affine curves at once, sharing one inversion per step
+
+def batchInverse(values, M):
+    """Attempt to invert every element of values mod M with one inversion.
+
+    Parameters
+    ----------
+    values : list : Numbers to be inverted (not required to be principal).
+    M      : int  : Modulus being considered.
+
+    Returns
+    -------
+    A 2-tuple of the form (exists, res).
+
+    exists : bool      : If every element is invertible.
+    res    : list, int : If exists the inverses (in order) else an
+                         obstruction (1 < res < M if any value has one,
+                         else res = M, i.e. some value is 0 mod M).
+
+    Notes
+    -----
+    Montgomery's trick: the prefix products are inverted once, and the
+    inverses are peeled off backwards at three multiplications each.
+
+    Example(s)
+    ----------
+    >>> batchInverse([2, 3, 4], 11)
+    >>> (True, [6, 4, 3])
+
+    """
+    prefix = [1]
+    for v in values:
+        prefix.append(prefix[-1] * v % M)
+
+    exists, inv = backend.modInv(prefix[-1], M)
+    if not exists:
+        for v in values:
+            g = gcd(v % M, M)
+            if 1 < g < M:
+                return False, g
+        return False, M
+
+    res = [0] * len(values)
+    for i in range(len(values)-1, -1, -1):
+        res[i] = inv * prefix[i] % M
+        inv = inv * values[i] % M
+
+    return True, res
+
+def batchStep(curves, M, addBase=False):
+    """Double every point (or add its base point) with one inversion.
+
+    Parameters
+    ----------
+    curves  : list : 5-tuples (x, y, a, baseX, baseY), a point on the curve
+                     y^2 = x^3 + a*x + b and the point it is a multiple of.
+    M       : int  : The modulus.
+    addBase : bool : Compute P + base instead of 2P (doubling P where
+                     P = base).
+
+    Returns
+    -------
+    A 2-tuple of the form (exists, res).
+
+    exists : bool      : If no proper factor of M was hit.
+    res    : list, int : If exists the new curves (a curve whose point
+                         reaches the identity mod M is dropped) else the
+                         obstruction.
+
+    """
+    while True:
+        doubles = [(not addBase) or ((x - bX) % M == 0 and (y - bY) % M == 0)
+                   for x, y, a, bX, bY in curves]
+        dens = [2*y if dbl else bX - x
+                for (x, y, a, bX, bY), dbl in zip(curves, doubles)]
+        exists, invs = batchInverse(dens, M)
+        if exists:
+            break
+        if invs != M:
+            return False, invs
+        curves = [curve for curve, d in zip(curves, dens) if d % M]
+
+    res = []
+    for (x, y, a, bX, bY), dbl, inv in zip(curves, doubles, invs):
+        if dbl:
+            slope = (3*x*x + a) * inv % M
+            resX = (slope*slope - 2*x) % M
+        else:
+            slope = (bY - y) * inv % M
+            resX = (slope*slope - x - bX) % M
+        res.append((resX, (slope*(x - resX) - y) % M, a, bX, bY))
+
+    return True, res
+
+def batchMult(curves, k, M):
+    """Attempt to return kP on every curve, in lockstep (see batchStep)."""
+    for bit in bin(k)[3:]:
+        exists, curves = batchStep(curves, M)
+        if exists and (bit == '1'):
+            exists, curves = batchStep(curves, M, addBase=True)
+        if not exists:
+            return False, curves
+
+    return True, curves
+
+# Montgomery curves, B*y^2 = x^3 + A*x^2 + x, in projective (X:Z) form
+
+def xDouble(X, Z, a24, M):
+    """Return 2P for P = (X:Z), where a24 = (A+2)/4 mod M."""
+    s, d = (X+Z)**2 % M, (X-Z)**2 % M
+    t = s - d
+    return s*d % M, t*(d + a24*t) % M
+
+def xAdd(pX, pZ, qX, qZ, dX, dZ, M):
+    """Return P+Q for P = (pX:pZ), Q = (qX:qZ) with P-Q = (dX:dZ)."""
+    u, v = (pX-pZ)*(qX+qZ) % M, (pX+pZ)*(qX-qZ) % M
+    return dZ*(u+v)**2 % M, dX*(u-v)**2 % M
+
+def ladder(X, Z, k, a24, M):
+    """Return kP (k >= 1) for P = (X:Z) by the Montgomery ladder."""
+    X0, Z0 = X, Z
+    X1, Z1 = xDouble(X, Z, a24, M)
+    for bit in bin(k)[3:]:
+        if bit == '1':
+            X0, Z0 = xAdd(X1, Z1, X0, Z0, X, Z, M)
+            X1, Z1 = xDouble(X1, Z1, a24, M)
+        else:
+            X1, Z1 = xAdd(X0, Z0, X1, Z1, X, Z, M)
+            X0, Z0 = xDouble(X0, Z0, a24, M)
+
+    return X0, Z0
+
+def suyamaCurve(sigma, M):
+    """Return the curve and point of Suyama's parametrization for sigma.
+
+    Returns
+    -------
+    A 2-tuple of the form (exists, res).
+
+    exists : bool  : If the curve is defined (16*u**3*v is invertible mod M).
+    res    : tuple : If exists (X, Z, a24) for the point and curve, else the
+                     obstruction (=gcd(16*u**3*v, M)).
+
+    Notes
+    -----
+    With u = sigma**2 - 5 and v = 4*sigma the point (u**3 : v**3) lies on
+    the curve with (A+2)/4 = (v-u)**3 * (3u+v) / (16*u**3*v), whose group
+    order is divisible by 12.
+
+    """
+    u, v = (sigma*sigma - 5) % M, 4*sigma % M
+    X, Z = u**3 % M, v**3 % M
+    exists, inv = backend.modInv(16*X*v, M)
+    if not exists:
+        return False, inv
+
+    return True, (X, Z, (v-u)**3 * (3*u+v) * inv % M)
+
+def ecmStage1(X, Z, a24, M, B1, primes, budget=None):
+    """Return kP for k the product of the largest prime powers <= B1.
+
+    budget is checked at every prime (see Budget; 'stage1' is the prime
+    reached).
+
+    """
+    for p in primes:
+        if p > B1: break
+        if budget is not None:
+            budget.check(stage1=p)
+        q = p
+        while q*p <= B1:
+            q *= p
+        X, Z = ladder(X, Z, q, a24, M)
+
+    return X, Z
+
+def ecmStage2(X, Z, a24, M, B1, B2, budget=None):
+    """Return the product of the stage 2 terms for Q = (X:Z) (baby-giant).
+
+    Each prime q in (B1, B2] is written q = m*D +- j (0 < j < D/2), and
+    X(mDQ)*Z(jQ) - X(jQ)*Z(mDQ) vanishes mod a prime p of M exactly when
+    qQ = O mod p (or (mD -+ j)Q = O). Baby steps jQ are stored once, giant
+    steps mDQ follow by differential addition and each q costs two mults.
+    budget is checked at every giant step ('stage2' is the prime reached).
+
+    """
+    D = max([d for d in (6, 30, 210, 2310, 30030)
+             if (d*d <= 10*B2) and (d <= B1)], default=None)
+    if (D is None) or (B2 <= B1):
+        return 1
+
+    #Baby steps: jQ for odd j < D/2 coprime to D, with X(jQ)*Z(jQ).
+    baby = {}
+    X2, Z2 = xDouble(X, Z, a24, M)
+    prevX, prevZ, jX, jZ = X, Z, X, Z #(j-2)Q, jQ with j = 1; x(-Q) = x(Q).
+    for j in range(1, D//2, 2):
+        if gcd(j, D) == 1:
+            baby[j] = (jX, jZ, jX*jZ % M)
+        prevX, prevZ, (jX, jZ) = jX, jZ, xAdd(jX, jZ, X2, Z2, prevX, prevZ, M)
+
+    #Giant steps: mDQ for m = 1, 2, ...
+    dX, dZ = ladder(X, Z, D, a24, M)
+    m, mX, mZ, prevX, prevZ = 1, dX, dZ, None, None
+    mXZ, res = mX*mZ % M, 1
+    for q in primeRange(B1+1, B2+1):
+        target = (q + D//2) // D
+        while m < target:
+            if budget is not None:
+                budget.check(stage2=q)
+            if m == 1:
+                newX, newZ = xDouble(mX, mZ, a24, M)
+            else:
+                newX, newZ = xAdd(mX, mZ, dX, dZ, prevX, prevZ, M)
+            m, prevX, prevZ, mX, mZ = m+1, mX, mZ, newX, newZ
+            mXZ = mX*mZ % M
+
+        jX, jZ, jXZ = baby[abs(q - m*D)]
+        res = res * ((mX-jX)*(mZ+jZ) - mXZ + jXZ) % M
+
+    return res
+
+def ecmCurve(N, sigma, B1, B2=None, primes=None, budget=None):
+    """Run both ECM stages on the Suyama curve for sigma.
+
+    Parameters
+    ----------
+    N      : int    : Integer whose factor is to be found.
+    sigma  : int    : Curve parameter (sigma mod N not in {0, +-1, +-3,
+                      +-5}).
+    B1     : int    : Stage 1 bound.
+    B2     : int    : Stage 2 bound (defaults to 100*B1, B2 <= B1 skips it).
+    primes : list   : The primes up to B1 (computed if not given).
+    budget : Budget : Optional; checked in both stages, which raise
+                      BudgetExpired once it is spent.
+
+    Returns
+    -------
+    res : int : gcd of N with the curve's result (1 < res < N is a factor).
+
+    """
+    B2 = 100*B1 if B2 is None else B2
+    primes = [2] + basePrimes(B1) if primes is None else primes
+    N = backend.mpz(N)
+    exists, curve = suyamaCurve(sigma, N)
+    if not exists:
+        return int(curve)
+
+    X, Z, a24 = curve
+    X, Z = ecmStage1(X, Z, a24, N, B1, primes, budget)
+    res = backend.gcd(Z, N)
+    if res == 1:
+        res = backend.gcd(ecmStage2(X, Z, a24, N, B1, B2, budget), N)
+
+    return int(res)
+
 # Lenstra
 
-def factorial(n):
-    """Return n!."""
-    return 1 if (n in {0, 1}) else n*factorial(n-1)
+def primePowers(bound):
+    """Return the largest power <= bound of each prime <= bound."""
+    res = []
+    for p in [2] + basePrimes(bound):
+        q = p
+        while q*p <= bound:
+            q *= p
+        res.append(q)
 
-def lenstra(N, bound=500, effort=500):
+    return res
+
+def primePowerProduct(bound):
+    """Return the product of the largest prime powers <= bound (cached).
+
+    The powers are multiplied in pairs, level by level (a product tree),
+    so the products are of balanced sizes rather than one growing product.
+
+    """
+    if bound not in primePowerCache:
+        level = [backend.mpz(q) for q in primePowers(bound)] or [1]
+        while len(level) > 1:
+            level = ([a*b for a, b in zip(level[::2], level[1::2])]
+                     + level[len(level) & ~1:])
+        primePowerCache[bound] = level[0]
+
+    return primePowerCache[bound]
+
+def ecmWorker(N, bound, B2, curves, seed, stop, deadline=None):
+    """Run up to `curves` ECM curves until a factor, stop or the deadline.
+
+    Returns a list with one dict per curve run: the curve's sigma, its
+    wall-clock seconds and res (1 < res < N is a factor). The last entry
+    holds the factor if one was found, after which stop is set.
+
+    """
+    rand, stats = Random(seed), []
+    primes = [2] + basePrimes(bound)
+    for _ in range(curves):
+        if stop.is_set() or ((deadline is not None) and (time() > deadline)):
+            break
+
+        sigma, start = rand.randint(6, N+5), time()
+        res = ecmCurve(N, sigma, bound, B2, primes)
+        stats.append({'sigma': sigma, 'seconds': time() - start, 'res': res})
+        if 1 < res < N:
+            stop.set()
+            break
+
+    return stats
+
+def parallelLenstra(N, bound=500, effort=500, B2=None, workers=1,
+                    executor=None, timeout=None, seed=None):
+    """Attempt to return a factor of N, running curves on a process pool.
+
+    Parameters
+    ----------
+    N        : int      : Integer whose factor is to be found.
+    bound    : int      : Stage 1 bound (see lenstra).
+    effort   : int      : Maximum number of curves tried over all workers.
+    B2       : int      : Stage 2 bound (defaults to 100*bound).
+    workers  : int      : Processes to use when no executor is given.
+    executor : Executor : Optional process pool to run on.
+    timeout  : float    : Seconds after which no new curve is started.
+    seed     : int      : Seed for the per-chunk curve generators.
+
+    Returns
+    -------
+    A 2-tuple of the form (res, stats).
+
+    res   : int  : A factor of N (res=N, if factor can't be found).
+    stats : list : One dict per curve run, {'sigma', 'seconds', 'res'}.
+
+    Notes
+    -----
+    The curves are split into chunks, each with its own generator seeded
+    from seed (so a run is reproducible for a given seed and chunking). The
+    first factor found sets a shared event, and every chunk stops before
+    its next curve (a running curve is finished).
+
+    """
+    rand = Random(randrange(2**64) if seed is None else seed)
+    deadline = None if timeout is None else time() + timeout
+    if (workers <= 1) and (executor is None):
+        results = [ecmWorker(N, bound, B2, effort, rand.getrandbits(64),
+                             Event(), deadline)]
+    else:
+        chunks = chunkBounds(0, effort, numChunks(workers, executor))
+        with Manager() as manager:
+            stop = manager.Event()
+            args = [(N, bound, B2, b-a, rand.getrandbits(64), stop, deadline)
+                    for a, b in chunks]
+            results = runChunks(ecmWorker, args, workers, executor)
+
+    stats = [curve for result in results for curve in result]
+    factors = [curve['res'] for curve in stats if 1 < curve['res'] < N]
+    return (factors[0] if factors else N), stats
+
+def lenstra(N, bound=500, effort=500, B2=None, workers=1, executor=None,
+            budget=None):
     """Attempt to return a factor of N.
 
     Parameters
     ----------
     N     : int : Integer whose factor is to be found.
-    bound : int : [bound!]P for some point P on an EC is computed.
-    effort: int : Maximum times EC mult is attempted.
+    bound : int : Stage 1 bound B1, kP is computed for k the product of the
+                  prime powers up to bound on a Montgomery curve.
+    effort: int : Maximum number of curves tried.
+    B2    : int : Stage 2 bound (defaults to 100*bound).
+    workers : int : Processes to run the curves on (see parallelLenstra).
+    executor: Executor : Optional process pool to run the curves on.
+    budget  : Budget : Optional; checked within every curve (serial) or
+                       before every curve (on a pool, by its deadline).
 
     Returns
     -------
-    res : int : A factor of N (res=N, if factor can't be found).
+    res : int : A factor of N (res=N, if factor can't be found, or once the
+                budget is spent).
+
+    Notes
+    -----
+    With a budget, its progress counts the curves completed ('curves', a
+    running total over calls) and the largest bound of one ('B1'), and
+    stage1 or stage2 name the prime an unfinished curve had reached.
 
     Example(s)
     ----------
@@ -210,11 +524,52 @@ def lenstra(N, bound=500, effort=500):
     >>> 2810645183 #Result may vary
 
     """
-    num, searching = factorial(bound), True
-    randInts = [randint(0, N-1) for _ in range(3*effort)]
-    for i in range(effort):
-        if not searching: break
-        x, y, a = randInts[i:i+3]
-        searching, x, y = mult(x, y, num, a, N)
-        
-    return N if searching else x
+    if (workers > 1) or (executor is not None):
+        timeout = None if budget is None else budget.remaining()
+        return parallelLenstra(N, bound, effort, B2, workers, executor,
+                               timeout)[0]
+
+    primes = [2] + basePrimes(bound)
+    for _ in range(effort):
+        try:
+            res = ecmCurve(N, randint(6, N+5), bound, B2, primes, budget)
+        except BudgetExpired:
+            return N
+
+        if budget is not None:
+            progress = budget.progress
+            progress['curves'] = progress.get('curves', 0) + 1
+            progress['B1'] = max(progress.get('B1', 0), bound)
+        if 1 < res < N:
+            return res
+
+    return N
+
+def batchLenstra(N, bound=500, effort=500, batch=64):
+    """Attempt to return a factor of N, running affine curves in batches.
+
+    Parameters
+    ----------
+    N      : int : Integer whose factor is to be found.
+    bound  : int : kP is computed for k the product of the prime powers up
+                   to bound (stage 1 only).
+    effort : int : Maximum number of curves tried.
+    batch  : int : Curves advanced together, sharing each inversion.
+
+    Returns
+    -------
+    res : int : A factor of N (res=N, if factor can't be found).
+
+    """
+    N, k = backend.mpz(N), primePowerProduct(bound)
+    for start in range(0, effort, batch):
+        curves = []
+        for _ in range(min(batch, effort - start)):
+            x, y, a = randint(0, N-1), randint(0, N-1), randint(0, N-1)
+            curves.append((x, y, a, x, y))
+
+        exists, res = batchMult(curves, k, N)
+        if not exists:
+            return int(res)
+
+    return int(N)
@@ -0,0 +1,126 @@
+"""Underwood's Frobenius probable prime test."""
+
+from time import time
+import random
+from specialCases import fastCases
+from deterministicMillerRabin import isPrimeU64
+from baillePSW import baillePSW
+from millerRabin import millerRabin
+from modContext import modContext, reducingCutOff
+import backend
+
+composite = False
+likelyPrime = True
+
+exactBelow = 2**64 #Smaller N go to isPrimeU64, which is exact there.
+
+def minimalA(N, effort=100):
+    """Return the least a >= 0 with ((a*a - 4)/N) = -1, None past effort.
+
+    N must be odd and not a square; a = 2 (a*a - 4 = 0) is never a choice.
+
+    """
+    for a in range(effort):
+        if (a != 2) and (backend.jacobiSymbol(a*a - 4, N) == -1):
+            return a
+
+    return None
+
+def frobeniusCheck(N, a, ctx=None):
+    """Return if (x+2)**(N+1) = 2a+5 in Z_N[x]/(x**2 - ax + 1).
+
+    s*x + t is squared as s(as + 2t)*x + (t-s)(t+s) and multiplied by x+2
+    as ((a+2)s + t)*x + (2t - s), so each bit of N+1 costs two products
+    of residues. With ctx, s and t are forms of ctx.
+
+    """
+    if ctx is not None:
+        s, t = ctx.one, ctx.toForm(2)
+        for i in bin(N+1)[3:]:
+            s, t = (ctx.mul(s, (a*s + 2*t) % N),
+                    ctx.mul((t-s) % N, (t+s) % N))
+            if i == '1':
+                s, t = ((a+2)*s + t) % N, (2*t - s) % N
+
+        return (s == 0) and (t == ctx.toForm(2*a + 5))
+
+    s, t = 1, 2
+    for i in bin(N+1)[3:]:
+        s, t = s*(a*s + 2*t) % N, (t-s)*(t+s) % N
+        if i == '1':
+            s, t = ((a+2)*s + t) % N, (2*t - s) % N
+
+    return (s == 0) and (t == 2*a + 5)
+
+def underwoodFrobenius(N, effort=100, ctx=None):
+    """Perform Underwood's Frobenius probable prime test.
+
+    Parameters
+    ----------
+    N      : int              : Integer to test.
+    effort : int              : Values of a to try (see minimalA).
+    ctx    : modContext, None : Optional arithmetic context for N; very
+                                large N get one automatically.
+
+    Notes
+    -----
+    With a minimal such that a*a - 4 is a non-residue, a prime N has
+    (x+2)**N = conjugate of x+2, so (x+2)**(N+1) is its norm, 2a+5. One
+    ladder over N+1 costs two products per bit, about two Miller-Rabin
+    rounds, against roughly three for baillePSW. No composite is known
+    to pass. N < exactBelow is decided by isPrimeU64.
+
+    Example(s)
+    ----------
+    >>> underwoodFrobenius(2**607 - 1), underwoodFrobenius(2**607 + 1)
+    >>> (True, False)
+
+    """
+    if N < exactBelow:
+        return isPrimeU64(N)
+
+    looseCheck = fastCases(N) #Also rules out squares.
+    if looseCheck != 1:
+        return bool(looseCheck)
+
+    N = backend.mpz(N)
+    a = minimalA(N, effort)
+    if (a is None) or (backend.gcd(2*a + 5, N) != 1):
+        return composite
+
+    if (ctx is None) and (N.bit_length() >= reducingCutOff):
+        ctx = modContext(N)
+    return frobeniusCheck(N, a, ctx)
+
+def timeFrobenius(bitSizes=(512, 1024, 2048, 4096), reps=5, numBases=7):
+    """Time underwoodFrobenius, baillePSW and millerRabin on primes.
+
+    millerRabin runs with 1 base (the unit of cost) and with numBases
+    bases: the default 7 is the fewest with worst-case error 4**-7 below
+    1/7710, Grantham's bound for one random quadratic Frobenius round.
+    Primes are timed as they take every test's full work.
+
+    """
+    for bits in bitSizes:
+        ps = []
+        while len(ps) < reps:
+            N = random.getrandbits(bits) | (1 << (bits-1)) | 1
+            if baillePSW(N):
+                ps.append(N)
+
+        tests = {'underwoodFrobenius': underwoodFrobenius,
+                 'baillePSW': baillePSW,
+                 'millerRabin(1)': lambda N: millerRabin(N, 1),
+                 f'millerRabin({numBases})':
+                     lambda N: millerRabin(N, numBases)}
+        res = {}
+        for name, test in tests.items():
+            start = time()
+            for N in ps:
+                test(N)
+            res[name] = (time() - start) / reps
+
+        unit = res['millerRabin(1)']
+        times = ': '.join(f'{name}: {t:.5f}s ({t/unit:.2f} rounds)'
+                          for name, t in res.items())
+        print(f'{bits} bits: {times}')
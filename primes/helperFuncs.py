@@ -1,8 +1,15 @@
 """General supporting functions."""
 
-squaresUnder960 = {
-    0, 1, 4, 9, 16, 25, 36, 49, 64, 81, 100, 121, 144, 169, 196, 225, 256,
-    289, 324, 361, 400, 441, 484, 529, 576, 625, 676, 729, 784, 841, 900}
+from math import isqrt, ceil
+from sieve import basePrimes
+
+#squaresM[r] = 1 if r is a square mod M (2882880 = 64*63*65*11).
+squares64, squares63, squares65, squares11 = (
+    bytes(int(r in {x*x % m for x in range(m)}) for r in range(m))
+    for m in (64, 63, 65, 11))
+
+powerWitnessCount = 3 #Primes in each e-th power residue filter.
+powerWitnessCache = {}
 
 def gcd(n, k):
     """Return the GCD of two integers via the Euclidean algorithm."""
@@ -11,24 +18,29 @@ def gcd(n, k):
 
     return abs(n)
 
+def isSquareResidue(N):
+    """Return False if N is not a square mod 64, 63, 65 or 11.
+
+    Only about 1 in 119 non-squares passes, for the cost of one reduction
+    mod 2882880, so this screens the calls to isIntegerSquare.
+
+    """
+    r = N % 2882880
+    return bool(squares64[r & 63] and squares63[r % 63] and squares65[r % 65]
+                and squares11[r % 11])
+
 def isIntegerSquare(N):
-    """Determine if N is a perfect square."""
-    if N <= 960:
-        return N in squaresUnder960
-
-    numZeros = len(str(N)) // 2
-    a = int('1'+'0'*numZeros)
-    b = (a**2 + N)//(2*a)
-    while abs(a-b) > 5:
-        a, b = b, (b**2 + N)//(2*b)
-
-    res = False; diff = N - b**2
-    if diff == 0:
-        res = True
-    elif abs(diff-1) == 2*b:
-        res = True
-            
-    return res
+    """Determine if N is a perfect square.
+
+    isSquareResidue rejects all but about 1 in 119 non-squares with one
+    small reduction; the rest take one math.isqrt.
+
+    """
+    if N < 0 or not isSquareResidue(N):
+        return False
+
+    r = isqrt(N)
+    return r*r == N
 
 def v_2(N):
     """Return the 2-adic valution of N."""
@@ -57,18 +69,259 @@ def v_p(N, p):
     return res, N
 
 def jacobiSymbol(a, N):
-    """Return the Jacobi symbol of two numbers (N > 0 and N%2 == 1)."""
+    """Return the Jacobi symbol of two numbers (N > 0 and N%2 == 1).
+
+    Binary variant: the factors of two leave a in one shift and the sign
+    rules read only the low bits of a and N, so each swap costs one mod.
+
+    """
     a %= N
     sgn = 1
     while a != 0:
-        pow2, a = v_2(a)
-        if pow2%2 == 1 and N%8 in {3, 5}:
-            sgn *= -1
-            
-        a, N = N, a
-        if a%4 == 3 and N%4 == 3:
-            sgn *= -1
-            
-        a %= N
+        pow2 = (a & -a).bit_length() - 1
+        a >>= pow2
+        if (pow2 & 1) and ((N & 7) in (3, 5)):
+            sgn = -sgn
+
+        if a & N & 2: #a = N = 3 mod(4)
+            sgn = -sgn
+
+        a, N = N % a, a
 
     return sgn if N==1 else 0
+
+def extGCD(N, M):
+    """Return the GCD and Bezout coefficients of two integers.
+
+    Parameters
+    ----------
+    N, M : int : Non-zero integers, order does not matter.
+
+    Returns
+    -------
+    A 3-tuple of ints: (a, b, c) such that N*a + M*b = gcd(N, M) = c.
+
+    Example(s)
+    ----------
+    >>> extGCD(15, 2)
+    >>> (1, -7, 1)
+
+    >>> extGCD(12, 14)
+    >>> (-1, 1, 2)
+    
+    """
+    prevX, X = 0, 1
+    prevY, Y = 1, 0
+    while N != 0:
+        (q, N), M = divmod(M, N), N
+        prevY, Y = Y, prevY - q*Y
+        prevX, X = X, prevX - q*X
+
+    return prevX, prevY, M
+
+def modInv(N, M):
+    """Attempt to find the multiplicative inverse of an element in Z/MZ.
+
+    Parameters
+    ----------
+    N : int : Number to be inverted (not required to be principal value).
+    M : int : Modulus being considered.
+
+    Returns
+    -------
+    A 2-tuple of the form (exists, res).
+    
+    exists : bool : If the element is invertible.
+    res    : int  : If invertible the inverse else the obstruction (=gcd(n,m)).
+
+    Example(s)
+    ----------
+    >>> modInv(2, 6)
+    >>> (False, 2)
+
+    >>> modInv(3, 8)
+    >>> (True, 3)
+    
+    """
+    N %= M
+    N, _, gcf = extGCD(N, M)
+    return (True, N%M) if (gcf == 1) else (False, gcf)
+
+def productTree(values):
+    """Build the binary product tree of a list of integers.
+
+    Parameters
+    ----------
+    values : list : Integers forming the leaves.
+
+    Returns
+    -------
+    A list of levels: levels[0] is values, each next level holds the
+    products of adjacent pairs (an odd last entry is carried up) and the
+    last level is [prod(values)] (or [1] for no values).
+
+    Example(s)
+    ----------
+    >>> productTree([3, 5, 7])
+    >>> [[3, 5, 7], [15, 7], [105]]
+
+    """
+    levels = [list(values) or [1]]
+    while len(levels[-1]) > 1:
+        prev = levels[-1]
+        levels.append([prev[i] * prev[i+1] for i in range(0, len(prev)-1, 2)]
+                      + prev[len(prev) & ~1:])
+
+    return levels
+
+def remainderTree(N, tree):
+    """Return [N % v for v in tree[0]] by reducing down a product tree.
+
+    Parameters
+    ----------
+    N    : int  : Integer to be reduced.
+    tree : list : Levels of a product tree (see productTree).
+
+    Example(s)
+    ----------
+    >>> remainderTree(100, productTree([3, 7, 11]))
+    >>> [1, 2, 1]
+
+    """
+    rems = [N % tree[-1][0]]
+    for level in reversed(tree[:-1]):
+        rems = [rems[i//2] % v for i, v in enumerate(level)]
+
+    return rems
+
+def iroot(N, k):
+    """Return the integer k-th root of N >= 0, floor(N**(1/k)).
+
+    k = 2 is math.isqrt. Otherwise Newton's method descends from a start
+    just above the root, made from a float root of the top bits of N: the
+    start has about 40 correct bits, so few (full size) steps remain.
+
+    """
+    if (N < 2) or (k == 1):
+        return N
+    if k == 2:
+        return isqrt(N)
+
+    bits = N.bit_length()
+    if k >= bits:
+        return 1
+
+    #t < 2**1000 and t**(1/k) < 2**40, where its float error is under 0.1.
+    shift = max(bits//k - 40, -(-(bits - 1000) // k), 0)
+    t = N >> (k*shift)
+    x = (int(t ** (1/k)) + 2) << shift #So x**k > N.
+    while True:
+        y = ((k-1)*x + N // x**(k-1)) // k
+        if y >= x:
+            return x
+        x = y
+
+def powerWitnesses(e, count=powerWitnessCount):
+    """Return primes q = 1 mod(2e) for the e-th power filter of isPower.
+
+    Mod such q only 1 in e non-zero residues is an e-th power, so each q
+    lets through about 1/e of the N that are not e-th powers.
+
+    """
+    if e not in powerWitnessCache:
+        qs, q = [], 2*e + 1
+        while len(qs) < count:
+            if all(q % p for p in range(3, isqrt(q) + 1, 2)):
+                qs.append(q)
+            q += 2*e
+        powerWitnessCache[e] = tuple(qs)
+
+    return powerWitnessCache[e]
+
+def isPower(N, e):
+    """Return the e-th root of N if N is an e-th power (e prime), else None.
+
+    Residue filters screen N first: squares mod 64, 63, 65 and 11 for
+    e = 2, and e-th power residues mod the powerWitnesses of e otherwise.
+
+    """
+    if e == 2:
+        if not isSquareResidue(N):
+            return None
+    else:
+        for q in powerWitnesses(e):
+            r = N % q
+            if r and (pow(r, (q-1) // e, q) != 1):
+                return None
+
+    r = iroot(N, e)
+    return r if r**e == N else None
+
+def perfectPower(N, minBase=2):
+    """Return (b, k) with N = b**k and k maximal (k = 1 if no power).
+
+    Only prime exponents e with minBase**e <= N are tried, each behind the
+    residue filters of isPower, so a minBase known to bound the prime
+    factors of N from below (e.g. after trial division) saves most work.
+
+    """
+    b, k = N, 1
+    if N < 4:
+        return b, k
+
+    maxE = (N.bit_length() - 1) // max(minBase.bit_length() - 1, 1)
+    for e in [2] + basePrimes(maxE):
+        if (e > maxE) or (e >= b.bit_length()):
+            break
+        r = isPower(b, e)
+        while r is not None: #Retry e, so that e.g. b**4 is found twice.
+            b, k = r, k*e
+            r = isPower(b, e) if e < b.bit_length() else None
+
+    return b, k
+
+def isPerfectPower(N):
+    """Return if N = b**k for integers b and k >= 2 (0 and 1 count)."""
+    if N < 2:
+        return N >= 0
+
+    return any(isPower(N, e) is not None
+               for e in [2] + basePrimes(N.bit_length() - 1))
+
+def sqrtMod(a, p):
+    """Return x with x**2 = a mod(p) for a prime p and a square a (Tonelli).
+
+    Raises ValueError if no root is found, e.g. when p is not prime.
+
+    """
+    a %= p
+    if a < 2 or p == 2:
+        return a
+
+    pow2, q = v_2(p-1)
+    if pow2 == 1: #p = 3 mod(4)
+        x = pow(a, (p+1)//4, p)
+    else:
+        z = 2
+        while jacobiSymbol(z, p) != -1:
+            z += 1
+
+        c, t, x = pow(z, q, p), pow(a, q, p), pow(a, (q+1)//2, p)
+        while t != 1:
+            i, s = 0, t
+            while s != 1:
+                s, i = s*s % p, i+1
+                if i == pow2:
+                    raise ValueError(f'{a} has no square root mod {p}')
+
+            b = pow(c, 1 << (pow2-i-1), p)
+            pow2, c = i, b*b % p
+            t, x = t*c % p, x*b % p
+
+    if x*x % p != a:
+        raise ValueError(f'{a} has no square root mod {p}')
+    return x
+
+def percentile(times, q):
+    """Return the q-th percentile (nearest rank) of a sorted list."""
+    return times[max(ceil(q/100 * len(times)) - 1, 0)]
@@ -0,0 +1,170 @@
+"""Lucas sequences U_k(P, Q), V_k(P, Q) mod N by the V-only ladder."""
+
+from time import time
+import random
+import backend
+
+composite = False
+likelyPrime = True
+
+def lucasV(N, P, Q, k, ctx=None, budget=None):
+    """Return (V_k, V_{k+1}, Q**k) mod N by the V-only (Montgomery) ladder.
+
+    Parameters
+    ----------
+    N   : int               : Odd modulus > 1.
+    P   : int               : Lucas parameter P (any sign).
+    Q   : int               : Lucas parameter Q (any sign).
+    k   : int               : Index k >= 0.
+    ctx : modContext, None  : Arithmetic context for N; with one, all three
+                              results are forms of ctx.
+    budget : Budget, None   : Checked at every bit of k ('lucasBits' is the
+                              number done), see Budget.
+
+    Notes
+    -----
+    Each bit of k takes (V_j, V_{j+1}) to (V_2j, V_2j+1) or (V_2j+1,
+    V_2j+2) with one product and one square,
+
+        V_2j = V_j**2 - 2Q**j,    V_2j+1 = V_j*V_{j+1} - P*Q**j,
+
+    and Q**j needs one more square unless Q = +-1. The loop this replaced
+    advanced U and V together: the same squares plus halvings mod N and
+    two parity branches per set bit.
+
+    Example(s)
+    ----------
+    >>> lucasV(10**9 + 7, 1, -1, 10) #Lucas numbers L_10, L_11.
+    >>> (123, 199, 1)
+
+    """
+    unit = Q in (1, -1) #Q**j is then +-1 by the parity of j, no squares.
+    if ctx is not None:
+        one = ctx.one
+        v, vNext, qk = ctx.toForm(2), ctx.toForm(P), one
+        qOdd = (Q*one) % N
+        for j, i in enumerate(bin(k)[2:]):
+            if budget is not None:
+                budget.check(lucasBits=j)
+            if i == '1':
+                v, vNext = ((ctx.mul(v, vNext) - P*qk) % N,
+                            (ctx.sqr(vNext) - 2*Q*qk) % N)
+                qk = qOdd if unit else (ctx.sqr(qk) * Q) % N
+            else:
+                v, vNext = ((ctx.sqr(v) - 2*qk) % N,
+                            (ctx.mul(v, vNext) - P*qk) % N)
+                qk = one if unit else ctx.sqr(qk)
+
+        return v, vNext, qk
+
+    v, vNext, qk = 2, P % N, 1
+    for j, i in enumerate(bin(k)[2:]):
+        if budget is not None:
+            budget.check(lucasBits=j)
+        if i == '1':
+            v, vNext = (v*vNext - P*qk) % N, (vNext*vNext - 2*Q*qk) % N
+            qk = Q if unit else (qk*qk*Q) % N
+        else:
+            v, vNext = (v*v - 2*qk) % N, (v*vNext - P*qk) % N
+            qk = 1 if unit else (qk*qk) % N
+
+    return v, vNext, qk % N
+
+def lucasUV(N, P, Q, k):
+    """Return (U_k, V_k, Q**k) mod N, recovering U_k from the V ladder.
+
+    U_k = (2V_{k+1} - P*V_k) / D with D = P**2 - 4Q, so D must be
+    invertible mod N (ValueError otherwise).
+
+    Example(s)
+    ----------
+    >>> lucasUV(10**9 + 7, 1, -1, 10) #Fibonacci and Lucas numbers.
+    >>> (55, 123, 1)
+
+    """
+    exists, DInv = backend.modInv(P*P - 4*Q, N)
+    if not exists:
+        raise ValueError(f'D = {P*P - 4*Q} is not invertible mod {N}')
+
+    v, vNext, qk = lucasV(N, P, Q, k)
+    return (2*vNext - P*v) * DInv % N, v, qk
+
+def strongLucasCheck(N, P, Q, pow2, d, ctx=None, budget=None):
+    """Return if N is a strong Lucas probable prime for (P, Q).
+
+    Parameters
+    ----------
+    N     : int              : Odd N > 1 with gcd(N, D) = 1, D = P**2 - 4Q.
+    P, Q  : int              : Lucas parameters.
+    pow2  : int              : s in N - (D/N) = d * 2**s.
+    d     : int              : Odd part of N - (D/N).
+    ctx   : modContext, None : Optional arithmetic context for N.
+    budget: Budget, None     : Checked at every step (see lucasV).
+
+    Notes
+    -----
+    N passes if U_d = 0 or V_{d*2**r} = 0 (mod N) for some 0 <= r < s.
+    U_d is never formed: as D is invertible, U_d = 0 exactly when
+    2V_{d+1} = P*V_d, which holds for forms of ctx as well.
+
+    """
+    v, vNext, qk = lucasV(N, P, Q, d, ctx, budget)
+    if (v == 0) or ((2*vNext - P*v) % N == 0):
+        return likelyPrime
+
+    sqr = ctx.sqr if ctx is not None else lambda x: (x*x) % N
+    for _ in range(pow2 - 1):
+        if budget is not None:
+            budget.check()
+        v = (sqr(v) - 2*qk) % N
+        if v == 0:
+            return likelyPrime
+        qk = sqr(qk)
+
+    return composite
+
+def lucasUVLoop(N, P, Q, k):
+    """Return (U_k, V_k, Q**k) mod N by advancing U and V together.
+
+    The textbook doubling loop (halving mod N), kept as a reference for
+    tests and timeLucas. N must be odd.
+
+    """
+    D = P*P - 4*Q
+    half = lambda x: x >> 1 if x%2 == 0 else (x+N) >> 1
+    if k == 0:
+        return 0, 2 % N, 1 % N
+
+    u, v, powQ = 1, P % N, Q % N
+    for i in bin(k)[3:]:
+        u, v = (u*v) % N, (v*v - 2*powQ) % N
+        powQ = (powQ*powQ) % N
+        if i == '1':
+            u, v = half((P*u + v) % N), half((D*u + P*v) % N)
+            powQ = (powQ*Q) % N
+
+    return u, v, powQ
+
+def timeLucas(bitSizes=(512, 1024, 2048, 4096, 8192), reps=3):
+    """Time V_N+1 by the V-only ladder against lucasUVLoop and print the gain.
+
+    Q = -1 (Selfridge's D = 5, the most common choice) and Q = 2 (D = -7)
+    are timed separately, as Q = +-1 saves the squares of Q**k.
+
+    """
+    for bits in bitSizes:
+        N = backend.mpz(random.getrandbits(bits) | (1 << (bits-1)) | 1)
+        res = []
+        for Q in (-1, 2):
+            start = time()
+            for _ in range(reps):
+                lucasUVLoop(N, 1, Q, N+1)
+            loop = (time() - start) / reps
+            start = time()
+            for _ in range(reps):
+                lucasV(N, 1, Q, N+1)
+            ladder = (time() - start) / reps
+            res.append(f'Q = {Q}: {loop:.4f}s -> {ladder:.4f}s '
+                       f'({loop/ladder:.2f}x)')
+
+        print(f'{bits} bits: ' + ': '.join(res))
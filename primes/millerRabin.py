@@ -2,6 +2,7 @@
 
 from helperFuncs import v_2
 from specialCases import fastCases
+import backend
 import random
 
 likelyPrime = True
@@ -13,6 +14,7 @@ def singleMillerRabin(N, B=2):
     if looseCheck != 1:
         return bool(looseCheck)
     
+    N = backend.mpz(N)
     res = composite
     N_ = N-1
     pow2, oddM = v_2(N_)
@@ -29,18 +31,31 @@ def singleMillerRabin(N, B=2):
             
     return res
 
-def millerRabin(N, numBases=10):
-    """Perform the Miller-Rabin primality test for randomly choosen bases."""
+def millerRabin(N, numBases=10, budget=None):
+    """Perform the Miller-Rabin primality test for randomly choosen bases.
+
+    An optional budget is checked at every base and squaring, raising
+    BudgetExpired once spent ('bases' is the number passed, see Budget).
+
+    """
     looseCheck = fastCases(N)
     if looseCheck != 1:
         return bool(looseCheck)
     
+    N = backend.mpz(N)
     N_ = N-1
     pow2, oddM = v_2(N_)
-    bases = random.sample(range(2, N-1), numBases)
-    for B in bases:
+    bases = set() #random.sample cannot take a range this long.
+    while len(bases) < min(numBases, N-3):
+        bases.add(random.randrange(2, N-1))
+
+    for j, B in enumerate(bases):
+        if budget is not None:
+            budget.check(bases=j)
         x = pow(B, oddM, N)
         for _ in range(pow2):
+            if budget is not None:
+                budget.check(bases=j)
             y = pow(x, 2, N)
             if (y == 1) and (x not in {1, N_}):
                 return composite
@@ -0,0 +1,167 @@
+"""Reusable modular arithmetic contexts (plain, Montgomery, Barrett)."""
+
+from time import time
+import random
+import backend
+
+reducingCutOff = 10000 #Bits of N from which Barrett/Montgomery beat pow, %.
+
+class PlainContext:
+    """Arithmetic mod N with the built-in pow and % (the reference path).
+
+    Every context keeps residues in an internal form: toForm and fromForm
+    convert, one and minusOne are the forms of 1 and N-1, and mul, sqr and
+    pow act on forms. Addition, subtraction, halving mod N and multiplying
+    by a small ordinary integer commute with every form, so Lucas-type
+    updates may apply them to forms directly.
+
+    """
+    method = 'plain'
+
+    def __init__(self, N):
+        self.N = N
+        self.one = 1
+        self.minusOne = N-1
+
+    def toForm(self, a):
+        return a % self.N
+
+    def fromForm(self, a):
+        return a
+
+    def mul(self, a, b):
+        return a*b % self.N
+
+    def sqr(self, a):
+        return a*a % self.N
+
+    def pow(self, base, e):
+        """Return the form of base**e for an ordinary integer base."""
+        return pow(base, e, self.N)
+
+class MontgomeryContext(PlainContext):
+    """Montgomery arithmetic mod odd N: a is held as a*R mod N, R = 2**k."""
+    method = 'montgomery'
+
+    def __init__(self, N):
+        self.N = N
+        self.k = N.bit_length()
+        self.mask = (1 << self.k) - 1
+        self.NPrime = -pow(N, -1, 1 << self.k) & self.mask #-1/N mod R
+        self.one = (1 << self.k) % N
+        self.minusOne = N - self.one
+
+    def reduce(self, T):
+        """Return T/R mod N for 0 <= T < N*R (REDC)."""
+        m = ((T & self.mask) * self.NPrime) & self.mask
+        t = (T + m*self.N) >> self.k
+        return t - self.N if t >= self.N else t
+
+    def toForm(self, a):
+        return ((a % self.N) << self.k) % self.N
+
+    def fromForm(self, a):
+        return self.reduce(a)
+
+    def mul(self, a, b):
+        return self.reduce(a*b)
+
+    def sqr(self, a):
+        return self.reduce(a*a)
+
+    def pow(self, base, e):
+        return windowPow(self, base, e)
+
+class BarrettContext(PlainContext):
+    """Barrett reduction mod N; forms are the ordinary residues."""
+    method = 'barrett'
+
+    def __init__(self, N):
+        PlainContext.__init__(self, N)
+        self.k = N.bit_length()
+        self.mu = (1 << 2*self.k) // N
+
+    def reduce(self, T):
+        """Return T mod N for 0 <= T < N**2."""
+        q = ((T >> (self.k-1)) * self.mu) >> (self.k+1)
+        r = T - q*self.N
+        while r >= self.N:
+            r -= self.N
+        return r
+
+    def mul(self, a, b):
+        return self.reduce(a*b)
+
+    def sqr(self, a):
+        return self.reduce(a*a)
+
+    def pow(self, base, e):
+        return windowPow(self, base, e)
+
+def windowPow(ctx, base, e):
+    """Return the form of base**e in ctx (left-to-right, 4-bit windows)."""
+    N = ctx.N
+    if base % N == 2: #Multiplying by 2 is a shift and a subtraction.
+        x = ctx.toForm(2)
+        for bit in bin(e)[3:]:
+            x = ctx.sqr(x)
+            if bit == '1':
+                x <<= 1
+                if x >= N: x -= N
+        return x if e else ctx.one
+
+    table = [ctx.one, ctx.toForm(base)]
+    for _ in range(14):
+        table.append(ctx.mul(table[-1], table[1]))
+
+    x = ctx.one
+    for i in range(e.bit_length()//4, -1, -1):
+        for _ in range(4):
+            x = ctx.sqr(x)
+        x = ctx.mul(x, table[(e >> 4*i) & 15])
+
+    return x
+
+contexts = {
+    'plain': PlainContext,
+    'montgomery': MontgomeryContext,
+    'barrett': BarrettContext}
+
+def modContext(N, method=None):
+    """Return an arithmetic context for the odd modulus N.
+
+    Parameters
+    ----------
+    N      : int       : Odd modulus > 1.
+    method : str, None : 'plain', 'montgomery', 'barrett' or None (pick by
+                         size: Barrett from reducingCutOff bits, unless
+                         the gmpy2 backend makes plain arithmetic faster).
+
+    Example(s)
+    ----------
+    >>> modContext(2**11213 - 1).method
+    >>> 'barrett'
+
+    """
+    if method is None:
+        big = N.bit_length() >= reducingCutOff
+        method = 'barrett' if big and backend.active == 'python' else 'plain'
+
+    return contexts[method](N)
+
+def timeModContext(bitSizes=(512, 2048, 4096, 8192, 13300), reps=3):
+    """Time a base-2 Miller-Rabin round in each context and print the gain."""
+    for bits in bitSizes:
+        N = random.getrandbits(bits) | (1 << (bits-1)) | 1
+        d = N >> 1
+        res = {}
+        for method in contexts:
+            ctx = modContext(N, method)
+            start = time()
+            for _ in range(reps):
+                x = ctx.pow(2, d)
+                x = ctx.fromForm(ctx.sqr(x))
+            res[method] = (time() - start) / reps
+
+        gains = ': '.join(f'{m}: {res["plain"]/res[m]:.2f}x' for m in res)
+        print(f'{bits} bits: plain: {res["plain"]:.4f}s: {gains}')
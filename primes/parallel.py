@@ -0,0 +1,63 @@
+"""Process-pool helpers shared by the counting and batch functions."""
+
+from concurrent.futures import ProcessPoolExecutor
+
+chunksPerWorker = 4 #Extra chunks even out uneven per-chunk work.
+
+def chunkBounds(lo, hi, parts, minSize=1):
+    """Split [lo, hi) into at most `parts` contiguous chunks.
+
+    Parameters
+    ----------
+    lo, hi  : int : Bounds of the half-open interval.
+    parts   : int : Maximum number of chunks.
+    minSize : int : Minimum chunk length (except when hi - lo is smaller).
+
+    Returns
+    -------
+    A list of 2-tuples (a, b) covering [lo, hi) in order.
+
+    Example(s)
+    ----------
+    >>> chunkBounds(5, 100, 4)
+    >>> [(5, 28), (28, 52), (52, 76), (76, 100)]
+
+    """
+    if hi <= lo:
+        return []
+
+    parts = max(1, min(parts, (hi-lo) // max(minSize, 1)))
+    cuts = [lo] + [lo + (hi-lo)*i//parts for i in range(1, parts)] + [hi]
+    return list(zip(cuts, cuts[1:]))
+
+def runChunks(func, argsList, workers=1, executor=None):
+    """Return [func(*args) for args in argsList], possibly on a process pool.
+
+    Parameters
+    ----------
+    func     : callable : A module-level (picklable) function.
+    argsList : list     : Argument tuples, one per chunk.
+    workers  : int      : Processes to use when no executor is given.
+    executor : Executor : Optional pool to run on (it is not shut down).
+
+    Returns
+    -------
+    The list of results, in the order of argsList.
+
+    """
+    columns = list(zip(*argsList))
+    if executor is not None:
+        return list(executor.map(func, *columns))
+
+    if (workers <= 1) or (len(argsList) <= 1):
+        return [func(*args) for args in argsList]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, *columns))
+
+def numChunks(workers, executor=None):
+    """Return how many chunks to split work into for a pool."""
+    if executor is not None:
+        workers = getattr(executor, '_max_workers', workers)
+
+    return max(1, workers) * chunksPerWorker
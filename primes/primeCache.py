@@ -0,0 +1,250 @@
+"""Opt-in memoization of primality tests: per-process LRU, shared slots."""
+
+import os
+import mmap
+import struct
+from types import ModuleType
+from hashlib import blake2b
+from threading import Lock
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+slot = struct.Struct('<16sB7x8s') #Key digest, result, tag of the two.
+slotsPerBucket = 4
+tagKey = b'primeCache'
+defaultSize = 1 << 16 #Entries of the per-process LRU.
+
+def keyDigest(name, N):
+    """Return the 16 byte key of test name on N in a SharedTable."""
+    h = blake2b(name.encode() + b'\0', digest_size=16)
+    h.update(N.to_bytes((N.bit_length() + 8) // 8, 'little', signed=True))
+    return h.digest()
+
+def qualifiedName(test):
+    """Return 'module.qualname' of test, or None if that is not unique to it.
+
+    Lambdas, nested functions, partials, bound methods and callable
+    instances have no name that tells them apart from other tests.
+
+    """
+    module = getattr(test, '__module__', None)
+    qualname = getattr(test, '__qualname__', None)
+    owner = getattr(test, '__self__', None)
+    if ((module is None) or (qualname is None) or ('<' in qualname)
+            or ((owner is not None) and not isinstance(owner, ModuleType))):
+        return None
+    return f'{module}.{qualname}'
+
+def slotTag(digest, res):
+    """Return the 8 byte tag that validates a slot holding digest, res."""
+    return blake2b(digest + bytes([res]), digest_size=8, key=tagKey).digest()
+
+class SharedTable:
+    """Fixed-size table of test results that processes share.
+
+    Parameters
+    ----------
+    slots  : int       : Number of 32 byte slots (a multiple of 4).
+    path   : str, None : Back the table with this file, mmap'd.
+    name   : str, None : Otherwise the multiprocessing.shared_memory block.
+    create : bool      : Make (and zero) the table rather than attach.
+
+    Notes
+    -----
+    A key hashes to a bucket of slotsPerBucket slots. Each slot holds the
+    key digest, the result and a blake2b tag of both, so writers need no
+    lock: a torn or stale slot fails its tag and reads as empty. A full
+    bucket overwrites the slot picked by the key. Pickling (e.g. to pool
+    workers) attaches to the same table by path or name. A shared_memory
+    block is for one process tree (multiprocessing unlinks it when that
+    tree exits); unrelated processes should share a file by path.
+
+    Example(s)
+    ----------
+    >>> table = SharedTable(1 << 20, path='primes.cache')
+    >>> test = CachedTest(baillePSW, shared=table)
+    >>> isPrimeBatch(values, workers=8, test=test) #Workers share results.
+
+    """
+
+    def __init__(self, slots=1 << 20, path=None, name=None, create=True):
+        if (slots <= 0) or (slots % slotsPerBucket):
+            raise ValueError(f'slots = {slots} must be a positive multiple '
+                             f'of {slotsPerBucket}')
+
+        self.slots, self.path = slots, path
+        size = slots * slot.size
+        self.shm = None
+        if path is not None:
+            with open(path, 'r+b' if not create else 'w+b') as f:
+                if create:
+                    f.truncate(size)
+                self.mm = mmap.mmap(f.fileno(), size)
+            self.buf = memoryview(self.mm)
+        else:
+            self.shm = shared_memory.SharedMemory(name, create, size)
+            self.buf = self.shm.buf #May be longer than size (whole pages).
+
+        self.name = None if self.shm is None else self.shm.name
+
+    def __getstate__(self):
+        return {'slots': self.slots, 'path': self.path, 'name': self.name}
+
+    def __setstate__(self, state):
+        self.__init__(state['slots'], state['path'], state['name'],
+                      create=False)
+
+    def bucket(self, digest):
+        """Return the offset of the first slot of digest's bucket."""
+        index = int.from_bytes(digest[:8], 'little') % (self.slots //
+                                                         slotsPerBucket)
+        return index * slotsPerBucket * slot.size
+
+    def get(self, digest):
+        """Return the stored result for digest, None if there is none."""
+        start = self.bucket(digest)
+        for offset in range(start, start + slotsPerBucket*slot.size,
+                            slot.size):
+            key, res, tag = slot.unpack_from(self.buf, offset)
+            if (key == digest) and (tag == slotTag(key, res)):
+                return bool(res)
+
+        return None
+
+    def put(self, digest, res):
+        """Store the result res for digest."""
+        start = self.bucket(digest)
+        offset = start + (digest[8] % slotsPerBucket) * slot.size
+        for off in range(start, start + slotsPerBucket*slot.size, slot.size):
+            key, stored, tag = slot.unpack_from(self.buf, off)
+            if (key == digest) or (tag != slotTag(key, stored)):
+                offset = off #Same key, or an empty (invalid) slot.
+                break
+
+        slot.pack_into(self.buf, offset, digest, res, slotTag(digest, res))
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+        else:
+            self.buf.release()
+            self.mm.close()
+
+    def unlink(self):
+        """Close the table and delete its backing block or file."""
+        self.close()
+        if self.shm is not None:
+            self.shm.unlink()
+        else:
+            os.remove(self.path)
+
+class CachedTest:
+    """Wrap a primality test with an LRU cache and an optional SharedTable.
+
+    Parameters
+    ----------
+    test    : function          : Test of one integer, e.g. baillePSW.
+    maxSize : int               : Entries kept by this process's LRU.
+    shared  : SharedTable, None : Table shared with other processes.
+    name    : str, None         : Key of test's results in shared; by
+                                  default its 'module.qualname'.
+
+    Notes
+    -----
+    Only calls test(N) are cached; calls with more arguments go straight
+    through. Lookups try the LRU, then the shared table, then run test.
+    Tests sharing a table must have different names, so a test with no
+    unique qualname (see qualifiedName), e.g. a lambda or a partial, needs an
+    explicit name, or ValueError is raised.
+    cacheInfo() returns the counters. Pickled copies (pool workers) start
+    with an empty LRU and zero counters but attach to the same table.
+
+    Example(s)
+    ----------
+    >>> test = CachedTest(baillePSW, maxSize=1000)
+    >>> test(2**521 - 1), test(2**521 - 1), test.cacheInfo()['hits']
+    >>> (True, True, 1)
+
+    """
+
+    def __init__(self, test, maxSize=defaultSize, shared=None, name=None):
+        if name is None:
+            name = qualifiedName(test)
+            if (name is None) and (shared is not None):
+                raise ValueError(f'{test!r} has no unique qualname; pass '
+                                 f'name= to share its results')
+
+        self.test, self.maxSize, self.shared = test, maxSize, shared
+        self.name = name
+        self.__name__ = getattr(test, '__name__', 'test')
+        self.__doc__ = getattr(test, '__doc__', None)
+        self.lock = Lock()
+        self.clearCache()
+
+    def __getstate__(self):
+        return {'test': self.test, 'maxSize': self.maxSize,
+                'shared': self.shared, 'name': self.name}
+
+    def __setstate__(self, state):
+        self.__init__(state['test'], state['maxSize'], state['shared'],
+                      state['name'])
+
+    def __call__(self, N, *args, **kwargs):
+        if args or kwargs:
+            return self.test(N, *args, **kwargs)
+
+        with self.lock:
+            res = self.cache.get(N)
+            if res is not None:
+                self.cache.move_to_end(N)
+                self.hits += 1
+                return res
+
+        digest = None
+        if self.shared is not None:
+            digest = keyDigest(self.name, N)
+            res = self.shared.get(digest)
+
+        if res is None:
+            res = bool(self.test(N))
+            if digest is not None:
+                self.shared.put(digest, res)
+            counter = 'misses'
+        else:
+            counter = 'sharedHits'
+
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            self.cache[N] = res
+            if len(self.cache) > self.maxSize:
+                self.cache.popitem(last=False)
+                self.evictions += 1
+
+        return res
+
+    def cacheInfo(self):
+        """Return the counters, and the LRU's size and capacity, as a dict."""
+        with self.lock:
+            return {'hits': self.hits, 'sharedHits': self.sharedHits,
+                    'misses': self.misses, 'evictions': self.evictions,
+                    'size': len(self.cache), 'maxSize': self.maxSize}
+
+    def clearCache(self):
+        """Empty this process's LRU and zero its counters."""
+        with self.lock:
+            self.cache = OrderedDict()
+            self.hits = self.sharedHits = self.misses = self.evictions = 0
+
+def cached(test=None, maxSize=defaultSize, shared=None, name=None):
+    """Return CachedTest(test, maxSize, shared, name); also a decorator.
+
+    Example(s)
+    ----------
+    >>> @cached(maxSize=10**4)
+    ... def isPrime(N):
+    ...     return baillePSW(N)
+
+    """
+    if test is None:
+        return lambda test: CachedTest(test, maxSize, shared, name)
+    return CachedTest(test, maxSize, shared, name)
@@ -3,21 +3,342 @@
 from deterministicMillerRabin import detMillerRabin
 from millerRabin import *
 from baillePSW import baillePSW
+from frobenius import underwoodFrobenius
+from sieve import countPrimes, segmentSize, segments, basePrimes
+from parallel import chunkBounds, numChunks, runChunks
+from array import array
+from math import isqrt
 from time import time
+import os
+import sys
+import json
+import struct
 
-def primeCount(n, func):
-    """Count primes below n."""
-    cnt = 2
-    for x in range(5, n, 2): cnt += func(x)
-    return cnt
+#Tests with no exceptions below the given bound; counts with them are sieved.
+exactBelow = {
+    detMillerRabin: 3317044064679887385961981,
+    baillePSW: 2**64,
+    underwoodFrobenius: 2**64}
 
-def timeCount(upper, func):
-    """Count primes below n and time taken."""
-    cnt = 2; totTime = 0
-    for x in range(5, upper):
+sublinearCutOff = 10**7 #Above this primePi beats the segmented sieve.
+
+#Resumed or extended counts sieve the rest of [0, n) rather than restart
+#primePi while it holds at most lucyRatio * n**(3/4) numbers (the sieve
+#takes ~2.7ns a number, primePi ~115ns * n**(3/4)).
+lucyRatio = 40
+sweepBlock = 1 << 12 #Odd values tested with func between checkpoint checks.
+checkpointVersion = 1
+tablesHeader = struct.Struct('<8sQQ') #magic, x, next p to sift
+tablesMagic = b'LUCYTBLS'
+
+def lucyHedgehog(x):
+    """Return pi(x) and the bytes used by its tables (Lucy_Hedgehog's method).
+
+    Parameters
+    ----------
+    x : int : Non-negative upper bound (inclusive).
+
+    Returns
+    -------
+    A 2-tuple of ints (cnt, memory).
+
+    cnt    : int : The number of primes <= x.
+    memory : int : Bytes held by the two count tables.
+
+    Notes
+    -----
+    With r = isqrt(x), small[v] and large[i] hold S(v) and S(x//i) for
+    v, i <= r, where S(v, p) counts the integers in [2, v] that are prime or
+    have no prime factor <= p. Sifting each prime p <= r in turn leaves
+    S(v) = pi(v). The work is O(x**(3/4)) and the memory O(x**(1/2)).
+
+    Example(s)
+    ----------
+    >>> lucyHedgehog(10**9)
+    >>> (50847534, 505968)
+
+    """
+    if x < 2:
+        return 0, 0
+
+    r, small, large = lucyTables(x)
+    for p in range(2, r+1):
+        if small[p] != small[p-1]: #p is prime.
+            lucySift(x, r, small, large, p)
+
+    memory = small.itemsize*len(small) + large.itemsize*len(large)
+    return large[1], memory
+
+def lucyTables(x):
+    """Return r = isqrt(x) and the unsifted tables (small, large) for x."""
+    r = isqrt(x)
+    small = array('q', range(-1, r))
+    large = array('q', [0] + [x//i - 1 for i in range(1, r+1)])
+    return r, small, large
+
+def lucySift(x, r, small, large, p):
+    """Sift the prime p <= r out of the tables of lucyHedgehog, in place."""
+    sp = small[p-1] #pi(p-1)
+    pSq = p*p
+    lim = min(r, x//pSq)
+    k = min(lim, r//p) #For i <= k, x//(i*p) is stored in large.
+    large[1:k+1] = array('q', [
+        a - b + sp for a, b in zip(large[1:k+1], large[p:k*p+1:p])])
+
+    xp = x//p
+    large[k+1:lim+1] = array('q', [
+        large[i] - small[xp//i] + sp for i in range(k+1, lim+1)])
+
+    if pSq <= r: #Values are read before any are written back.
+        small[pSq:] = array('q', [
+            small[v] - small[v//p] + sp for v in range(pSq, r+1)])
+
+def primePi(x, withMemory=False):
+    """Return the number of primes <= x (and optionally the memory used)."""
+    cnt, memory = lucyHedgehog(x)
+    return (cnt, memory) if withMemory else cnt
+
+def countRange(lo, hi, func):
+    """Return the number of odd x in [lo, hi) with func(x) True."""
+    return sum(map(func, range(lo|1, hi, 2)))
+
+def timeRange(lo, hi, func):
+    """Return the number of odd x in [lo, hi) with func(x) True, and time."""
+    cnt = 0; totTime = 0
+    for x in range(lo|1, hi, 2):
         start = time()
         a = func(x)
         totTime += time() - start
-        cnt += func(x)
+        cnt += a
+
+    return cnt, totTime
+
+def primeCount(n, func=None, workers=1, executor=None, checkpoint=None,
+               interval=60.0):
+    """Count primes below n.
+
+    If func is None, or func is exact below n (see exactBelow), the count is
+    found with a segmented sieve, or with primePi for n > sublinearCutOff;
+    otherwise func is called on each odd x < n.
+
+    With workers > 1 (or an executor) [0, n) is split into chunks that are
+    sieved, or tested with func, on a process pool; the sublinear path is
+    serial and is not used then.
+
+    With a checkpoint path the count is serial and resumable: see
+    resumableCount, which is called with interval.
+
+    """
+    parts = numChunks(workers, executor)
+    serial = (workers <= 1) and (executor is None)
+    if checkpoint is not None:
+        if not serial:
+            raise ValueError('checkpointed counts run in one process')
+        return resumableCount(n, checkpoint, func, interval)
+
+    if (func is None) or (n <= exactBelow.get(func, 0)):
+        if serial:
+            return primePi(n-1) if n > sublinearCutOff else countPrimes(n)
+
+        chunks = chunkBounds(0, n, parts, minSize=2*segmentSize)
+        args = [(b, a) for a, b in chunks]
+        return sum(runChunks(countPrimes, args, workers, executor))
+
+    args = [(a, b, func) for a, b in chunkBounds(5, n, parts)]
+    return 2 + sum(runChunks(countRange, args, workers, executor))
+
+def timeCount(upper, func, workers=1, executor=None):
+    """Count primes below upper, timing func on the odd x in [5, upper).
+
+    The time is summed over all workers; see benchmarks for percentiles.
+
+    """
+    chunks = chunkBounds(5, upper, numChunks(workers, executor))
+    args = [(a, b, func) for a, b in chunks]
+    results = runChunks(timeRange, args, workers, executor)
+    cnt = 2 + sum(c for c, _ in results)
+    totTime = sum(t for _, t in results)
 
     print(f'{func.__name__}: {cnt}: time: {totTime}')
+
+def writeAtomic(path, data):
+    """Replace path with the bytes data, never leaving a partial file."""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp, path)
+
+def readCheckpoint(path):
+    """Return the state saved by resumableCount at path, None if absent."""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    if state.get('version') != checkpointVersion:
+        raise ValueError(f'{path} is not a version {checkpointVersion} '
+                         f'count checkpoint')
+    return state
+
+def writeCheckpoint(path, state):
+    """Save state (see resumableCount) to path as JSON, atomically."""
+    writeAtomic(path, json.dumps(state, indent=1).encode())
+
+def saveTables(path, x, p, small, large):
+    """Save the tables of lucyHedgehog for x, sifted by the primes < p."""
+    small, large = array('q', small), array('q', large)
+    if sys.byteorder == 'big':
+        small.byteswap(); large.byteswap()
+    writeAtomic(path, tablesHeader.pack(tablesMagic, x, p)
+                + small.tobytes() + large.tobytes())
+
+def loadTables(path, x):
+    """Return (p, small, large) saved by saveTables for x, None if absent.
+
+    Tables saved for another x, or cut short, are ignored.
+
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+
+    r = isqrt(x)
+    if len(data) != tablesHeader.size + 8*(2*r + 2):
+        return None
+    magic, savedX, p = tablesHeader.unpack_from(data)
+    if (magic != tablesMagic) or (savedX != x):
+        return None
+
+    tables = array('q', data[tablesHeader.size:])
+    if sys.byteorder == 'big':
+        tables.byteswap()
+    return p, tables[:r+1], tables[r+1:]
+
+def resumableCount(n, path, func=None, interval=60.0):
+    """Count primes below n, checkpointing to path so the count can resume.
+
+    Parameters
+    ----------
+    n        : int            : Count the primes below n.
+    path     : str            : JSON checkpoint file, created if missing.
+    func     : function, None : Test of each odd x, as for primeCount.
+    interval : float          : Seconds between checkpoints (0 saves at
+                                every step).
+
+    Returns
+    -------
+    cnt : int : As primeCount(n, func).
+
+    Notes
+    -----
+    The checkpoint holds position and count, the count below position, and
+    the test's name (None when sieved; a checkpoint of another test raises
+    ValueError). Sieving and testing restart from position, one segment or
+    sweepBlock odd values per step, so a count for x extends to any y > x
+    by sieving or testing only [x, y); a checkpoint past n raises
+    ValueError.
+
+    When more than lucyRatio * n**(3/4) numbers remain (and n exceeds
+    sublinearCutOff) pi(n-1) is found with lucyHedgehog instead, one prime
+    per step; its tables go to path + '.tables' (16 bytes * sqrt(n)) and
+    are named in the checkpoint, so a restart with the same n resumes the
+    sifting. Both files are replaced atomically (see writeAtomic); the
+    tables file is removed when the count is done.
+
+    Example(s)
+    ----------
+    >>> resumableCount(10**9, 'pi.json') #Killed and rerun: resumes.
+    >>> 50847534
+    >>> resumableCount(10**9 + 10**6, 'pi.json') #Sieves [10**9, n) only.
+    >>> 50895689
+
+    """
+    key = None
+    if (func is not None) and (n > exactBelow.get(func, 0)):
+        key = func.__name__
+        if n < 5:
+            return primeCount(n, func)
+
+    state = readCheckpoint(path)
+    if state is None:
+        state = {'version': checkpointVersion, 'func': key,
+                 'position': 0 if key is None else 5,
+                 'count': 0 if key is None else 2}
+    elif state['func'] != key:
+        raise ValueError(f'{path} counts with {state["func"]}, not {key}')
+
+    if n < state['position']:
+        raise ValueError(f'{path} has counted below {state["position"]}, '
+                         f'past n = {n}')
+
+    last = time()
+    def step(save=None):
+        nonlocal last
+        if time() - last >= interval:
+            if save is not None:
+                save()
+            writeCheckpoint(path, state)
+            last = time()
+
+    lo = state['position']
+    if key is not None:
+        while lo < n:
+            hi = min(lo + 2*sweepBlock, n)
+            state['count'] += countRange(lo, hi, func)
+            state['position'] = lo = hi
+            step()
+
+    elif (n > sublinearCutOff) and (n - lo > lucyRatio * n**0.75):
+        state['count'] = lucyCount(n-1, path, state, step)
+        state['position'] = n
+
+    elif lo < n:
+        if lo <= 2 < n:
+            state['count'] += 1
+        for start, seg in segments(lo, n, basePrimes(isqrt(n-1))):
+            state['count'] += seg.count(1)
+            state['position'] = min(start + 2*len(seg), n)
+            step()
+        state['position'] = n
+
+    state.pop('sublinear', None)
+    writeCheckpoint(path, state)
+    if os.path.exists(f'{path}.tables'):
+        os.remove(f'{path}.tables')
+    return state['count']
+
+def lucyCount(x, path, state, step):
+    """Return pi(x) by lucyHedgehog, passing step a saver of the tables.
+
+    A 'sublinear' entry of state (resumableCount's) names the tables of a
+    run in progress; they are resumed if they are for this x.
+
+    """
+    tablesPath = f'{path}.tables'
+    saved = None
+    if state.get('sublinear', {}).get('x') == x:
+        saved = loadTables(state['sublinear']['tables'], x)
+
+    if saved is None:
+        r, small, large = lucyTables(x)
+        start = 2
+    else:
+        r = isqrt(x)
+        start, small, large = saved
+
+    def save():
+        saveTables(tablesPath, x, p+1, small, large)
+        state['sublinear'] = {'x': x, 'tables': tablesPath}
+
+    for p in range(start, r+1):
+        if small[p] != small[p-1]: #p is prime.
+            lucySift(x, r, small, large, p)
+            step(save)
+
+    return large[1]
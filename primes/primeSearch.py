@@ -0,0 +1,131 @@
+"""Find the next, previous or a random prime by sieving candidate windows."""
+
+import random
+from itertools import compress
+from helperFuncs import remainderTree
+from smallDivisors import divisorTree
+from baillePSW import baillePSW
+
+sieveBound = 1 << 16 #Odd primes under this sieve each window.
+
+def sieveWindow(rems, primes, size):
+    """Return flags of the odd candidates base, base+2, ..., base+2(size-1).
+
+    Parameters
+    ----------
+    rems   : list : base % p for every p in primes (base odd, > primes).
+    primes : list : Odd sieving primes.
+    size   : int  : Number of odd candidates in the window.
+
+    Returns
+    -------
+    flags : bytearray : flags[i] = 0 if base+2i has a factor in primes.
+
+    """
+    flags = bytearray([1]) * size
+    for r, p in zip(rems, primes):
+        i = (p-r) * ((p+1) >> 1) % p #Solves base + 2i = 0 mod(p).
+        if i < size:
+            flags[i::p] = bytes(len(range(i, size, p)))
+
+    return flags
+
+def stepPrime(N, step, test=baillePSW):
+    """Return the first prime N+step, N+2*step, ... by test alone."""
+    N += step
+    while not test(N):
+        N += step
+    return N
+
+def nextPrime(N, bound=sieveBound, window=None, test=baillePSW):
+    """Return the smallest prime > N.
+
+    Parameters
+    ----------
+    N      : int      : Integer to search above.
+    bound  : int      : Odd primes under bound sieve each window.
+    window : int      : Odd candidates per window (default: bit length).
+    test   : function : Probable prime test (e.g. underwoodFrobenius).
+
+    Notes
+    -----
+    The residues of the first candidate mod every sieving prime come from
+    one remainder tree, and later windows shift them by 2*window with small
+    integer arithmetic only. test runs on the survivors in order.
+
+    Example(s)
+    ----------
+    >>> nextPrime(2**521 - 2) == 2**521 - 1
+    >>> True
+
+    """
+    if N < bound*bound: #Candidates could be sieving primes themselves.
+        return 2 if N < 2 else stepPrime(N - (N%2 == 0), 2, test)
+
+    window = window or N.bit_length()
+    tree = divisorTree(bound)
+    primes = tree[0]
+    base = (N+1) | 1
+    rems = remainderTree(base, tree)
+    while True:
+        flags = sieveWindow(rems, primes, window)
+        for i in compress(range(window), flags):
+            if test(base + 2*i):
+                return base + 2*i
+
+        base += 2*window
+        rems = [(r + 2*window) % p for r, p in zip(rems, primes)]
+
+def prevPrime(N, bound=sieveBound, window=None, test=baillePSW):
+    """Return the largest prime < N (N > 2), see nextPrime."""
+    if N <= 2:
+        raise ValueError(f'there is no prime below {N}')
+
+    window = window or N.bit_length()
+    tree = divisorTree(bound)
+    primes = tree[0]
+    base = ((N-2) | 1) - 2*(window-1) #The window ends at the odd N-1 or N-2.
+    if base < bound*bound:
+        return 2 if N == 3 else stepPrime(((N-2) | 1) + 2, -2, test)
+
+    rems = remainderTree(base, tree)
+    while base >= bound*bound:
+        flags = sieveWindow(rems, primes, window)
+        for i in reversed(list(compress(range(window), flags))):
+            if test(base + 2*i):
+                return base + 2*i
+
+        base -= 2*window
+        rems = [(r - 2*window) % p for r, p in zip(rems, primes)]
+
+    return stepPrime(base + 2*window, -2, test)
+
+def randomPrime(bits, rand=random, test=baillePSW):
+    """Return a random prime of exactly bits bits.
+
+    Parameters
+    ----------
+    bits : int                  : Bit length of the prime (>= 2).
+    rand : random.Random, module : Source of randomness (e.g. seeded).
+    test : function              : Probable prime test (see nextPrime).
+
+    Notes
+    -----
+    A uniform bits-bit start is drawn and the next prime at or above it is
+    taken (retrying if that overflows bits), as incremental search does.
+    Primes after long gaps are slightly more likely than others.
+
+    Example(s)
+    ----------
+    >>> randomPrime(2048).bit_length()
+    >>> 2048
+
+    """
+    if bits < 2:
+        raise ValueError(f'there are no primes with {bits} bits')
+
+    while True:
+        p = nextPrime((rand.getrandbits(bits) | (1 << (bits-1))) - 1,
+                      test=test)
+        if p.bit_length() == bits:
+            return p
@@ -0,0 +1,276 @@
+"""Asyncio entry points that run the tests and factorInt on a bounded pool."""
+
+import asyncio
+import threading
+from random import Random
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import Manager
+from baillePSW import baillePSW
+from factorization import factorInt
+from budget import Budget
+from helperFuncs import percentile
+from primeSearch import randomPrime
+
+#Requests on N of at most inlineBits bits run on the event loop itself
+#(baillePSW ~50us at 64 bits, factorInt ~0.5ms at 32 bits, with gmpy2).
+inlineBits = {'isPrime': 64, 'factor': 32}
+
+#Larger jobs on N of over smallBits bits may hold at most workers-1 of the
+#pool's workers, so one is always left for the small jobs.
+smallBits = {'isPrime': 512, 'factor': 64}
+
+class ServiceBusy(RuntimeError):
+    """Raised when a PrimeService already has maxPending jobs."""
+
+def serviceJob(kind, N, test, stop):
+    """Run one job of a PrimeService (module level, so pools can pickle it)."""
+    if kind == 'isPrime':
+        return test(N)
+    return factorInt(N, budget=Budget(stop=stop))
+
+class Job:
+    """A pool job of a PrimeService and the number of requests awaiting it."""
+
+    def __init__(self, key, stop):
+        self.key, self.stop = key, stop
+        self.waiters, self.cancelled = 0, False
+        self.task = None
+
+class PrimeService:
+    """Offload isPrime and factor requests from an event loop to a pool.
+
+    Parameters
+    ----------
+    workers    : int            : Workers of the pool made when no executor
+                                  is given.
+    executor   : Executor, None : Pool to run on (not shut down by close).
+    maxPending : int            : Jobs queued or running; further requests
+                                  for other N raise ServiceBusy.
+    test       : function       : Primality test of isPrime, e.g. baillePSW.
+    threads    : bool           : Make a thread pool rather than processes.
+
+    Notes
+    -----
+    Requests for the same N (and kind) while one is in flight share its job.
+    A request that times out or is cancelled stops waiting; when no request
+    awaits a job it is cancelled: a factorInt job's stop event is set, which
+    spends its Budget (polled within rho, p-1 and ECM curves), and its
+    result is dropped. Jobs on small N skip the pool (see inlineBits), and
+    larger ones are admitted past smallBits only while a worker stays free
+    for the small ones, so small requests are not queued behind big jobs.
+
+    With a process pool, stop events are multiprocessing.Manager events,
+    made on the first factor job. The semaphore of the big jobs is made
+    on the first one too, so it belongs to the loop the service runs on
+    even if the service was made outside it (Python < 3.10 binds it to
+    the loop current when it is made).
+
+    Example(s)
+    ----------
+    >>> async with PrimeService(workers=4) as service:
+    ...     await service.isPrime(2**4423 - 1)
+    ...     await service.factor(2**128 + 1, timeout=10)
+    >>> True
+    >>> {59649589127497217: 1, 5704689200685129054721: 1}
+
+    """
+
+    def __init__(self, workers=2, executor=None, maxPending=64,
+                 test=baillePSW, threads=False):
+        self.ownExecutor = executor is None
+        if executor is None:
+            pool = ThreadPoolExecutor if threads else ProcessPoolExecutor
+            executor = pool(max_workers=workers)
+        else:
+            workers = getattr(executor, '_max_workers', workers)
+
+        self.executor, self.maxPending, self.test = executor, maxPending, test
+        self.threads = isinstance(executor, ThreadPoolExecutor)
+        self.bigWorkers, self.bigSlots = max(workers - 1, 1), None
+        self.manager = None
+        self.jobs, self.tasks, self.futures = {}, set(), set()
+        self.counts = dict.fromkeys(('inline', 'submitted', 'coalesced',
+                                     'rejected', 'cancelled'), 0)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        """Cancel every job, wait for the pool to stop running them, close."""
+        for job in list(self.jobs.values()):
+            self.cancel(job)
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.close()
+
+    def close(self):
+        """Shut down the pool (if the service made it) and the manager.
+
+        Pool calls that have not started are cancelled first; running ones
+        are waited for (a factor job's stop event ends it early).
+
+        """
+        for job in list(self.jobs.values()):
+            self.cancel(job)
+        for future in list(self.futures):
+            future.cancel()
+        if self.ownExecutor:
+            self.executor.shutdown(wait=True)
+        if self.manager is not None:
+            self.manager.shutdown()
+
+    def newEvent(self):
+        """Return a stop event the pool's workers can see."""
+        if self.threads:
+            return threading.Event()
+        if self.manager is None:
+            self.manager = Manager()
+        return self.manager.Event()
+
+    async def isPrime(self, N):
+        """Return test(N), run on the pool unless N is small."""
+        if N.bit_length() <= inlineBits['isPrime']:
+            self.counts['inline'] += 1
+            return self.test(N)
+        return await self.request('isPrime', N)
+
+    async def factor(self, N, timeout=None):
+        """Return factorInt(N); asyncio.TimeoutError after timeout seconds."""
+        if N.bit_length() <= inlineBits['factor']:
+            self.counts['inline'] += 1
+            return factorInt(N)
+        return await self.request('factor', N, timeout)
+
+    async def request(self, kind, N, timeout=None):
+        """Await the job for (kind, N), starting it if none is in flight."""
+        key = (kind, N)
+        job = self.jobs.get(key)
+        if job is not None:
+            self.counts['coalesced'] += 1
+        elif len(self.tasks) >= self.maxPending:
+            self.counts['rejected'] += 1
+            raise ServiceBusy(f'{len(self.tasks)} jobs pending')
+        else:
+            self.counts['submitted'] += 1
+            job = Job(key, self.newEvent() if kind == 'factor' else None)
+            self.jobs[key] = job
+            job.task = asyncio.ensure_future(self.run(job))
+            self.tasks.add(job.task)
+
+        job.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(job.task), timeout)
+        finally:
+            job.waiters -= 1
+            if (job.waiters == 0) and not job.task.done():
+                self.cancel(job)
+
+    def cancel(self, job):
+        """Drop job: no request gets its result, and its work is stopped."""
+        self.counts['cancelled'] += 1
+        job.cancelled = True
+        if job.stop is not None:
+            job.stop.set()
+        if self.jobs.get(job.key) is job:
+            del self.jobs[job.key]
+
+    def submit(self, job):
+        """Submit job to the pool and return an awaitable of its result."""
+        kind, N = job.key
+        future = self.executor.submit(serviceJob, kind, N, self.test,
+                                      job.stop)
+        self.futures.add(future)
+        future.add_done_callback(self.futures.discard)
+        return asyncio.wrap_future(future)
+
+    async def run(self, job):
+        """Run job on the pool, holding a big slot if its N is large."""
+        kind, N = job.key
+        try:
+            if N.bit_length() <= smallBits[kind]:
+                return await self.submit(job)
+
+            if self.bigSlots is None:
+                self.bigSlots = asyncio.Semaphore(self.bigWorkers)
+            async with self.bigSlots:
+                if job.cancelled:
+                    return None
+                return await self.submit(job)
+        finally:
+            self.tasks.discard(job.task)
+            if self.jobs.get(job.key) is job:
+                del self.jobs[job.key]
+
+defaultService = None
+
+def getService():
+    """Return the PrimeService of isPrimeAsync and factorAsync.
+
+    One service is kept for the running event loop; a new loop (e.g. a new
+    asyncio.run) closes the previous loop's service and makes another.
+
+    """
+    global defaultService
+    loop = asyncio.get_running_loop()
+    if (defaultService is None) or (defaultService[0] is not loop):
+        if defaultService is not None:
+            defaultService[1].close()
+        defaultService = (loop, PrimeService())
+    return defaultService[1]
+
+async def isPrimeAsync(N):
+    """Return baillePSW(N) without blocking the event loop (see PrimeService).
+
+    Example(s)
+    ----------
+    >>> await isPrimeAsync(2**4423 - 1)
+    >>> True
+
+    """
+    return await getService().isPrime(N)
+
+async def factorAsync(N, timeout=None):
+    """Return factorInt(N) without blocking the event loop (see PrimeService).
+
+    Example(s)
+    ----------
+    >>> await factorAsync(2**128 + 1, timeout=10)
+    >>> {59649589127497217: 1, 5704689200685129054721: 1}
+
+    """
+    return await getService().factor(N, timeout)
+
+async def timeService(bigJobs=4, requests=200, bigBits=160, testBits=256,
+                      workers=2):
+    """Return the p50 and p99 latency of isPrime requests on testBits odd
+    numbers, alone and while bigJobs factor requests (on semiprimes of
+    bigBits bits) run on the same service.
+
+    """
+    rand = Random(0)
+    small = [rand.getrandbits(testBits) | 1 for _ in range(requests)]
+    big = [randomPrime(bigBits//2, rand) * randomPrime(bigBits//2, rand)
+           for _ in range(bigJobs)]
+
+    async def latencies(service):
+        times = []
+        for N in small:
+            start = perf_counter()
+            await service.isPrime(N)
+            times.append(perf_counter() - start)
+        times.sort()
+        return {f'p{q}': percentile(times, q) for q in (50, 99)}
+
+    res = {}
+    async with PrimeService(workers) as service:
+        res['alone'] = await latencies(service)
+        jobs = [asyncio.ensure_future(service.factor(N)) for N in big]
+        res['busy'] = await latencies(service)
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+
+    return res
@@ -0,0 +1,213 @@
+"""Persistent, bit-packed (mod 30 wheel) prime table with mmap lookups."""
+
+import os
+import sys
+import mmap
+import struct
+from array import array
+from bisect import bisect_right
+from math import isqrt
+from sieve import basePrimes, sieveSegment
+
+magic = b'PRIMETBL'
+version = 1
+header = struct.Struct('<8sHHQQQ') #magic, version, wheel, limit, bytes, block
+blockBytes = 1 << 16 #Table bytes per count index entry (and per segment).
+
+residues = (1, 7, 11, 13, 17, 19, 23, 29) #Bit j of byte k is 30k+residues[j].
+residueBit = {r: j for j, r in enumerate(residues)}
+popCount = bytes(bin(i).count('1') for i in range(256))
+byteResidues = [[r for j, r in enumerate(residues) if (i >> j) & 1]
+                for i in range(256)]
+maskUpTo = [sum(1 << j for j, s in enumerate(residues) if s <= r)
+            for r in range(30)] #Bits of the residues <= r.
+
+def packSegment(seg, numBytes):
+    """Pack the flags of odd numbers 30k0+1, ... into numBytes wheel bytes.
+
+    The flags of one residue class are a stride-15 slice of seg. Each is
+    read as a little-endian integer of 0/1 bytes and shifted to its bit,
+    so OR-ing the eight shifted integers packs all the bytes at once.
+
+    """
+    res = 0
+    for j, r in enumerate(residues):
+        column = bytes(seg[(r-1)//2::15][:numBytes])
+        res |= int.from_bytes(column, 'little') << j
+
+    return res.to_bytes(numBytes, 'little')
+
+def writePrimeTable(path, limit):
+    """Write the primes below limit to path as a versioned wheel table.
+
+    Parameters
+    ----------
+    path  : str : File to write (replaced atomically when complete).
+    limit : int : The table answers for 0 <= n < limit.
+
+    Notes
+    -----
+    The file is the header, then the cumulative counts (array 'Q') of the
+    table primes before every blockBytes bytes, then one byte per 30
+    numbers. 2, 3 and 5 are implicit. 10**10 takes about 334 MB.
+
+    """
+    numBytes = -(-limit // 30)
+    primes = basePrimes(isqrt(30*numBytes))
+    counts = [0]
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(header.pack(magic, version, 30, limit, numBytes, blockBytes))
+        f.write(bytes(8 * (-(-numBytes // blockBytes) + 1)))
+        for k in range(0, numBytes, blockBytes): #One segment per block.
+            size = min(blockBytes, numBytes - k)
+            table = packSegment(sieveSegment(30*k + 1, 15*size, primes), size)
+            if k + size == numBytes: #Clear the bits of numbers >= limit.
+                keep = sum(1 << j for j, r in enumerate(residues)
+                           if 30*(numBytes-1) + r < limit)
+                table = table[:-1] + bytes([table[-1] & keep])
+
+            f.write(table)
+            counts.append(counts[-1] + sum(table.translate(popCount)))
+
+        counts = array('Q', counts)
+        if sys.byteorder == 'big':
+            counts.byteswap()
+        f.seek(header.size)
+        f.write(counts.tobytes())
+
+    os.replace(tmp, path)
+
+class PrimeTable:
+    """Read-only, memory-mapped view of a file from writePrimeTable.
+
+    The table bytes are never copied, so processes opening the same file
+    share its pages. Lookups raise ValueError outside [0, limit).
+
+    Example(s)
+    ----------
+    >>> writePrimeTable('primes.tbl', 10**6)
+    >>> with PrimeTable('primes.tbl') as table:
+    ...     table.isPrime(999983), table.nthPrime(78498), table.primePi(999999)
+    >>> (True, 999983, 78498)
+
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        fields = header.unpack_from(self.mm)
+        if (fields[0] != magic) or (fields[1:3] != (version, 30)):
+            self.mm.close()
+            raise ValueError(f'{path} is not a version {version} prime table')
+
+        self.limit, self.numBytes, self.blockBytes = fields[3:]
+        numBlocks = -(-self.numBytes // self.blockBytes)
+        start = header.size + 8*(numBlocks+1)
+        self.counts = array('Q', self.mm[header.size:start])
+        if sys.byteorder == 'big':
+            self.counts.byteswap()
+        self.bits = memoryview(self.mm)[start:start+self.numBytes]
+
+    def close(self):
+        self.bits.release()
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def checkRange(self, n):
+        if not 0 <= n < self.limit:
+            raise ValueError(f'{n} is outside the table, [0, {self.limit})')
+
+    def isPrime(self, n):
+        """Return if n is prime."""
+        self.checkRange(n)
+        if n < 7:
+            return n in (2, 3, 5)
+
+        bit = residueBit.get(n % 30)
+        return (bit is not None) and bool((self.bits[n//30] >> bit) & 1)
+
+    def primePi(self, x):
+        """Return the number of primes <= x."""
+        self.checkRange(x)
+        k = x // 30
+        block = k // self.blockBytes
+        res = (x >= 2) + (x >= 3) + (x >= 5) + self.counts[block]
+        res += sum(bytes(self.bits[block*self.blockBytes:k]).translate(
+            popCount))
+        return res + popCount[self.bits[k] & maskUpTo[x % 30]]
+
+    def nthPrime(self, k):
+        """Return the k-th prime (nthPrime(1) = 2)."""
+        if k <= 3:
+            if k < 1:
+                raise ValueError(f'k = {k} must be positive')
+            return (2, 3, 5)[k-1]
+
+        k -= 3
+        if k > self.counts[-1]:
+            raise ValueError(f'the table holds {self.counts[-1] + 3} primes')
+
+        block = bisect_right(self.counts, k-1) - 1 #counts[block] < k.
+        pos, k = block * self.blockBytes, k - self.counts[block]
+        while True:
+            chunk = bytes(self.bits[pos:pos+1024])
+            c = sum(chunk.translate(popCount))
+            if c >= k:
+                break
+            pos, k = pos + 1024, k - c
+
+        for i, byte in enumerate(chunk):
+            if popCount[byte] >= k:
+                return 30*(pos+i) + byteResidues[byte][k-1]
+            k -= popCount[byte]
+
+    def nextPrime(self, n):
+        """Return the smallest prime > n."""
+        for p in (2, 3, 5, 7):
+            if n < p:
+                self.checkRange(p)
+                return p
+
+        self.checkRange(n+1)
+        k, r = divmod(n+1, 30)
+        byte = self.bits[k] & ~maskUpTo[r-1] if r else self.bits[k]
+        while not byte:
+            k += 1
+            chunk = bytes(self.bits[k:k+4096])
+            if not chunk:
+                raise ValueError(f'no prime above {n} in the table')
+            skip = len(chunk) - len(chunk.lstrip(b'\0'))
+            if skip == len(chunk):
+                k += skip - 1
+                continue
+            k += skip
+            byte = chunk[skip]
+
+        return 30*k + byteResidues[byte][0]
+
+    def primes(self, a=0, b=None):
+        """Lazily generate the primes in [a, b) (b defaults to limit)."""
+        b = self.limit if b is None else b
+        if b > a:
+            self.checkRange(max(a, 0)); self.checkRange(b-1)
+
+        yield from (p for p in (2, 3, 5) if a <= p < b)
+        start = max(a, 0) // 30
+        for pos in range(start, -(-b // 30), 4096):
+            chunk = bytes(self.bits[pos:min(pos+4096, -(-b // 30))])
+            for i, byte in enumerate(chunk):
+                if byte:
+                    base = 30*(pos+i)
+                    for r in byteResidues[byte]:
+                        if a <= base + r < b:
+                            yield base + r
+
+if __name__ == '__main__':
+    writePrimeTable(sys.argv[1], int(float(sys.argv[2])))
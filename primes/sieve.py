@@ -0,0 +1,201 @@
+"""Segmented Sieve of Eratosthenes (odd-only, with a presieved wheel)."""
+
+from array import array
+from itertools import compress
+from math import isqrt
+
+wheelPrimes = (3, 5, 7, 11, 13)
+wheelSpan = 15015 #3*5*7*11*13, the period of the wheel over the odd numbers.
+segmentSize = 1 << 20 #Bytes per segment (one byte per odd number).
+
+def wheelPattern():
+    """Return the odd-number flags of one wheel period with wheelPrimes sifted.
+
+    Byte j of the result represents the odd number 2j+1.
+
+    """
+    pattern = bytearray([1]) * wheelSpan
+    for p in wheelPrimes:
+        start = (p-1) // 2
+        pattern[start::p] = bytes(len(range(start, wheelSpan, p)))
+
+    return bytes(pattern)
+
+wheel = wheelPattern()
+wheelBlock = wheel * (segmentSize//wheelSpan + 2)
+zeros = memoryview(bytes(segmentSize))
+
+def basePrimes(limit):
+    """Return a list of the odd primes <= limit (simple sieve)."""
+    if limit < 3:
+        return []
+
+    size = (limit-1) // 2 #Index i represents 2i+1, for 2i+1 <= limit.
+    flags = bytearray([1]) * (size+1)
+    flags[0] = 0
+    for i in range(1, (isqrt(limit)-1)//2 + 1):
+        if flags[i]:
+            p = 2*i + 1
+            start = (p*p - 1) // 2
+            flags[start::p] = bytes(len(range(start, size+1, p)))
+
+    return [2*i + 1 for i in range(1, size+1) if flags[i]]
+
+def sieveSegment(lo, size, primes):
+    """Return the primality flags of the odd numbers lo, ..., lo+2(size-1).
+
+    Parameters
+    ----------
+    lo     : int  : Odd, positive start of the segment.
+    size   : int  : Number of odd values in the segment (<= segmentSize).
+    primes : list : Odd primes, ascending, covering sqrt(lo + 2*size).
+
+    Returns
+    -------
+    seg : bytearray : seg[i] = 1 if lo+2i is prime, else 0.
+
+    """
+    offset = (lo >> 1) % wheelSpan
+    seg = bytearray(wheelBlock[offset:offset+size])
+    hi = lo + 2*size
+    for p in primes:
+        if p <= 13: #Removed by the wheel.
+            continue
+
+        pSq = p*p
+        if pSq >= hi:
+            break
+
+        if pSq >= lo:
+            idx = (pSq - lo) >> 1
+        else:
+            idx = (-lo * ((p+1) >> 1)) % p #Solves lo + 2*idx = 0 mod(p).
+
+        if idx < size:
+            seg[idx::p] = zeros[:(size-1-idx)//p + 1]
+
+    if lo <= 13: #Restore the wheel primes and remove 1.
+        for p in wheelPrimes:
+            if lo <= p < hi:
+                seg[(p-lo) >> 1] = 1
+        if lo == 1:
+            seg[0] = 0
+
+    return seg
+
+def segments(lo, hi, primes=None):
+    """Yield (start, flags) pairs sieving the odd numbers in [lo, hi).
+
+    Parameters
+    ----------
+    lo, hi : int  : Bounds of the half-open interval to sieve.
+    primes : list : Optional odd base primes covering sqrt(hi).
+
+    Returns
+    -------
+    A generator of 2-tuples (start, seg) where start is odd and seg is the
+    bytearray produced by sieveSegment(start, len(seg), primes).
+
+    """
+    lo = max(lo, 1) | 1
+    if primes is None:
+        primes = basePrimes(isqrt(max(hi-1, 0)))
+
+    while lo < hi:
+        size = min(segmentSize, (hi - lo + 1) // 2)
+        yield lo, sieveSegment(lo, size, primes)
+        lo += 2*size
+
+def countPrimes(n, start=0):
+    """Count primes in [start, n) by a segmented sieve.
+
+    Example(s)
+    ----------
+    >>> countPrimes(10**6)
+    >>> 78498
+
+    """
+    if n <= max(start, 2):
+        return 0
+
+    cnt = 1 if (start <= 2) else 0 #Accounts for 2.
+    primes = basePrimes(isqrt(n-1))
+    for _, seg in segments(start, n, primes):
+        cnt += seg.count(1)
+
+    return cnt
+
+def primeBlocks(a, b=None):
+    """Yield the primes in [a, b), one array('Q') per sieved segment.
+
+    Parameters
+    ----------
+    a : int       : Start of the interval (inclusive).
+    b : int, None : End of the interval (exclusive), None for no end.
+
+    Returns
+    -------
+    A generator of array('Q') blocks, in order; blocks may be empty.
+
+    Notes
+    -----
+    Memory is one segment, its block of primes, and the base primes up to the
+    square root of the current position; without an end the base primes are
+    extended (to isqrt of 4x the position) whenever the sieve outgrows them.
+
+    """
+    lo = max(a, 1) | 1
+    withTwo = (a <= 2) and (b is None or b > 2)
+    if b is None:
+        limit, primes = 0, array('Q')
+    else:
+        limit = isqrt(max(b-1, 0))
+        primes = array('Q', basePrimes(limit))
+
+    while (b is None) or (lo < b):
+        size = segmentSize if (b is None) else min(segmentSize, (b-lo+1)//2)
+        hi = lo + 2*size
+        if limit*limit < hi:
+            limit = isqrt(4*hi)
+            primes = array('Q', basePrimes(limit))
+
+        seg = sieveSegment(lo, size, primes)
+        block = array('Q', compress(range(lo, hi, 2), seg))
+        if withTwo:
+            block.insert(0, 2); withTwo = False
+
+        yield block
+        lo = hi
+
+    if withTwo: #Only reachable when [a, b) = [a, 3) holds no odd numbers.
+        yield array('Q', [2])
+
+def primeRange(a, b, blocks=False):
+    """Lazily generate the primes in [a, b).
+
+    Parameters
+    ----------
+    a, b   : int  : Bounds of the half-open interval.
+    blocks : bool : If True yield array('Q') blocks instead of single ints.
+
+    Example(s)
+    ----------
+    >>> list(primeRange(10**15, 10**15 + 100))
+    >>> [1000000000000037, 1000000000000091]
+
+    """
+    gen = primeBlocks(a, b)
+    if blocks:
+        yield from gen
+    else:
+        for block in gen:
+            yield from block
+
+def iterPrimes(start=2, blocks=False):
+    """Lazily generate the primes >= start, without end (see primeRange)."""
+    gen = primeBlocks(start)
+    if blocks:
+        yield from gen
+    else:
+        for block in gen:
+            yield from block
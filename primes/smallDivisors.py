@@ -1,5 +1,11 @@
 """Check for small divisors."""
 
+from math import prod, gcd
+from functools import lru_cache
+from helperFuncs import productTree
+from sieve import basePrimes
+import backend
+
 primesUnder1008 = {
     2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67,
     71, 73, 79, 83, 89, 97, 101, 103, 107, 109, 113, 127, 131, 137, 139,
@@ -18,24 +24,57 @@ oddPrimesUnder100 = [
     3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41,
     43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97]
 
+primorial100 = 2 * prod(oddPrimesUnder100)
+
 def isSmallPrime(N, upperBound=1008):
     """Return (by lookup) if N is a prime."""
     return (N < upperBound) and N in primesUnder1008
 
-def hasSmallDivisor(N):
-    """Return the first divisor of N under 100 (returns -1 if none)."""
-    res = -1
-    if N%2 == 0: return 2
-    for p in oddPrimesUnder100:
-        if (N%p == 0):
-            res = p; break
+@lru_cache(maxsize=None)
+def divisorTree(bound):
+    """Return the product tree of the odd primes under bound (cached)."""
+    return productTree(basePrimes(bound-1))
+
+@lru_cache(maxsize=None)
+def oddPrimorial(bound, mpz=int):
+    """Return mpz(product of the odd primes under bound) (cached)."""
+    return mpz(divisorTree(bound)[-1][0])
+
+def smallFactors(N, bound=100):
+    """Return the sorted list of the primes under bound that divide N > 0.
+
+    N is reduced once, by a gcd with the primorial of the odd primes under
+    bound; the (small) gcd is then only split down the branches of the
+    product tree that it shares a factor with.
 
-    return res
+    Example(s)
+    ----------
+    >>> smallFactors(2 * 3**4 * 97 * 101, bound=100)
+    >>> [2, 3, 97]
+
+    """
+    tree = divisorTree(bound)
+    g = gcd(N, tree[-1][0])
+    factors = [2] if (N%2 == 0) and (bound > 2) else []
+    if g == 1:
+        return factors
+
+    hits = [0]
+    for level in reversed(tree[:-1]):
+        hits = [j for i in hits for j in (2*i, 2*i+1)
+                if (j < len(level)) and (gcd(g, level[j]) > 1)]
+
+    return factors + [tree[0][i] for i in hits]
+
+def hasSmallDivisor(N, bound=100):
+    """Return the first divisor of N under bound (returns -1 if none)."""
+    if N%2 == 0: return 2
+    factors = smallFactors(N, bound)
+    return factors[0] if factors else -1
 
-def hasSmallDivisor_fastCheck(N):
-    """Return if N has a odd divisor under 100."""
-    for p in oddPrimesUnder100:
-        if (N%p == 0):
-            return True
+def hasSmallDivisor_fastCheck(N, bound=100):
+    """Return if N has a odd divisor under bound (one gcd with a primorial)."""
+    if (backend.active == 'python') or (N < 2**64):
+        return gcd(N, oddPrimorial(bound)) != 1
 
-    return False
+    return backend.gcd(N, oddPrimorial(bound, backend.mpz)) != 1
@@ -1,14 +1,32 @@
 """Deal with special (often trivial) cases."""
 
-from smallDivisors import isSmallPrime, hasSmallDivisor_fastCheck
-from helperFuncs import isIntegerSquare
+from smallDivisors import (isSmallPrime, hasSmallDivisor_fastCheck,
+                           smallFactors)
+from helperFuncs import isSquareResidue
+import backend
 
 composite = 0
 likelyPrime = 1
 isPrime = 2
 
-def fastCases(N):
-    """Using fast tests determine if N is prime, composite, or undetermined."""
+#(bits, bound): trial division bound for N under 2**bits, chosen so that one
+#gcd with the primorial costs about as much as the old 24 N % p reductions.
+divisorBounds = ((1024, 100), (2048, 200), (8192, 300), (None, 500))
+
+def defaultDivisorBound(N):
+    """Return the trial division bound fastCases uses for N."""
+    bits = N.bit_length()
+    for maxBits, bound in divisorBounds:
+        if (maxBits is None) or (bits < maxBits):
+            return bound
+
+def fastCases(N, divisorBound=None):
+    """Using fast tests determine if N is prime, composite, or undetermined.
+
+    Odd N are trial divided by the primes under divisorBound (by default
+    defaultDivisorBound(N), which grows with the size of N).
+
+    """
     if N == 2: #Catches 2 allowing other functions to forgo even prime cases.
         return isPrime
     
@@ -21,10 +39,16 @@ def fastCases(N):
     if N < 1009: #isSmallPrime has found all primes under upperBound=1008.
         return composite
     
-    if (N%4 == 1) and isIntegerSquare(N): #Even values already sifted.
+    if isSquareResidue(N) and backend.isIntegerSquare(N):
         return composite
     
-    if hasSmallDivisor_fastCheck(N):
+    if divisorBound is None:
+        divisorBound = defaultDivisorBound(N)
+
+    if N < divisorBound: #N may be one of the primes trial divided by.
+        return isPrime if smallFactors(N, divisorBound) == [N] else composite
+
+    if hasSmallDivisor_fastCheck(N, divisorBound):
         return composite
 
     return likelyPrime
@@ -15,7 +15,7 @@ setup(
         'License :: OSI Approved :: MIT License',
         'Operating System :: OS Independent',
     ],
-    python_requires='>=3.6',                
+    python_requires='>=3.8',                
     install_requires=[
         ],
     )
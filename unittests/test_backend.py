@@ -0,0 +1,65 @@
+"""Test backend.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+import backend
+from baillePSW import baillePSW
+from deterministicMillerRabin import detMillerRabin
+import random
+
+hasGmpy2 = 'gmpy2' in backend.availableBackends()
+
+class TestBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.initial = backend.getBackend()
+
+    def tearDown(self):
+        backend.setBackend(self.initial)
+
+    def test_setBackend(self):
+        backend.setBackend('python')
+        self.assertEqual(backend.getBackend(), 'python')
+        self.assertRaises(ValueError, backend.setBackend, 'no-such-backend')
+        self.assertEqual(backend.getBackend(), 'python')
+
+    def test_pythonBackend(self):
+        backend.setBackend('python')
+        self.assertEqual(backend.modInv(3, 8), (True, 3))
+        self.assertEqual(backend.modInv(2, 6), (False, 2))
+        self.assertEqual(backend.extGCD(15, 2), (1, -7, 1))
+        self.assertEqual(backend.mpz(7), 7)
+
+    @unittest.skipUnless(hasGmpy2, 'gmpy2 is not installed')
+    def test_backendsAgree(self):
+        rand = random.Random(7)
+        pairs = [(rand.randrange(-10**30, 10**30), rand.getrandbits(100) | 1)
+                 for _ in range(500)]
+        pairs += [(a, m) for a in range(-20, 20) for m in range(1, 40, 2)]
+        results = {}
+        for name in ['python', 'gmpy2']:
+            backend.setBackend(name)
+            results[name] = [(backend.gcd(a, m), backend.jacobiSymbol(a, m),
+                              backend.isIntegerSquare(abs(a)),
+                              backend.isIntegerSquare(a*a),
+                              backend.modInv(a, m)) for a, m in pairs]
+            for a, m in pairs:
+                x, y, g = backend.extGCD(a, m)
+                self.assertEqual(a*x + m*y, g)
+                self.assertEqual(abs(g), backend.gcd(a, m))
+
+        self.assertEqual(results['python'], results['gmpy2'])
+
+    @unittest.skipUnless(hasGmpy2, 'gmpy2 is not installed')
+    def test_testsAgree(self):
+        values = list(range(10**4)) + [2**89 - 1, 2**89 + 1, 2**127 - 1]
+        results = {}
+        for name in ['python', 'gmpy2']:
+            backend.setBackend(name)
+            results[name] = [(baillePSW(x), detMillerRabin(x)) for x in values]
+
+        self.assertEqual(results['python'], results['gmpy2'])
+
+if __name__ == '__main__':
+    unittest.main()
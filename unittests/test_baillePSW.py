@@ -3,7 +3,8 @@
 import unittest
 import sys
 sys.path.append('../primes')
-from baillePSW import baillePSW
+from baillePSW import baillePSW, oddNQR, lucasCounts, resetLucasCounts
+from helperFuncs import jacobiSymbol
 
 exactPrimeCounts = {
     2: 25,
@@ -45,6 +46,33 @@ class TestBaillePSW(unittest.TestCase):
         """Count the numebr of primes under 10**7"""
         toCheck = BPSWCount(7)
         self.assertEqual(toCheck, exactPrimeCounts[7])
+
+class TestOddNQR(unittest.TestCase):
+
+    def test_selfridge(self):
+        """The first of 5, -7, 9, ... with Jacobi symbol -1."""
+        for N in list(range(3, 20001, 2)) + [2**127 - 1, 2**521 - 1]:
+            expected = 0
+            for i in range(5, 105, 4):
+                if jacobiSymbol(i, N) == -1:
+                    expected = i; break
+                if jacobiSymbol(-i-2, N) == -1:
+                    expected = -i-2; break
+            self.assertEqual(oddNQR(N), expected)
+
+    def test_squares(self):
+        resetLucasCounts()
+        for x in (3, 1093, 3511, 10**20 + 39, 2**521 - 1):
+            self.assertEqual(oddNQR(x*x), 0)
+        self.assertEqual(lucasCounts['squares'], 5)
+        self.assertEqual(lucasCounts['trials'], 0)
+
+    def test_counts(self):
+        resetLucasCounts()
+        self.assertEqual(oddNQR(2**127 - 1), 5)
+        self.assertEqual(oddNQR(11), 13) #(-11/11) = 0 is skipped.
+        self.assertEqual(lucasCounts, {'searches': 2, 'trials': 6,
+                                       'squares': 0, 'exhausted': 0})
         
 if __name__ == '__main__':
     unittest.main()
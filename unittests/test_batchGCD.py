@@ -0,0 +1,32 @@
+"""Test batchGCD.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from batchGCD import *
+from math import gcd, prod
+import random
+
+class TestBatchGCD(unittest.TestCase):
+
+    def test_pairwise(self):
+        rand = random.Random(16)
+        for n in [2, 3, 10, 57]:
+            values = [rand.randrange(2, 10**12) for _ in range(n)]
+            ans = [gcd(v, prod(values[:i] + values[i+1:]))
+                   for i, v in enumerate(values)]
+            self.assertEqual(batchGCD(values), ans)
+
+    def test_sharedFactors(self):
+        primes = [1000003, 1000033, 1000037, 1000039, 1000081, 1000099,
+                  2**61 - 1, 2**89 - 1]
+        values = [primes[0]*primes[1], primes[2]*primes[3],
+                  primes[4]*primes[6], primes[5]*primes[7],
+                  primes[6]*primes[1]]
+        self.assertEqual(sharedFactors(values),
+                         {0: primes[1], 2: primes[6], 4: values[4]})
+        self.assertEqual(batchGCD([]), [])
+        self.assertEqual(batchGCD([10]), [1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+"""Test batchPrimality.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from batchPrimality import *
+from deterministicMillerRabin import detMillerRabin
+from array import array
+import random
+
+class TestIsPrimeBatch(unittest.TestCase):
+
+    def test_range(self):
+        values = list(range(10**5))
+        ans = [detMillerRabin(x) for x in values]
+        self.assertEqual(isPrimeBatch(values), ans)
+
+    def test_random64(self):
+        rand = random.Random(64)
+        values = [rand.getrandbits(64) for _ in range(2000)]
+        ans = [detMillerRabin(x) for x in values]
+        self.assertEqual(isPrimeBatch(values), ans)
+        self.assertEqual(isPrimeBatch(array('Q', values)), ans)
+
+    def test_strongPseudoprimes(self):
+        """Base-2 and multi-base strong pseudoprimes must be rejected."""
+        spsp = [2047, 1373653, 25326001, 3215031751, 2152302898747,
+                3474749660383, 341550071728321, 3825123056546413051]
+        self.assertEqual(isPrimeBatch(spsp), [False] * len(spsp))
+
+    def test_large(self):
+        values = [2**89 - 1, 2**89 + 1, 2**127 - 1, (2**61 - 1)**2]
+        self.assertEqual(isPrimeBatch(values), [True, False, True, False])
+
+    def test_workers(self):
+        rand = random.Random(5)
+        values = [rand.getrandbits(48) for _ in range(3*10**4)]
+        self.assertEqual(isPrimeBatch(values, workers=2), isPrimeBatch(values))
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_numpy(self):
+        values = np.arange(10**4, dtype=np.uint64)
+        mask = isPrimeBatch(values)
+        self.assertEqual(mask.dtype, bool)
+        ans = [detMillerRabin(x) for x in range(10**4)]
+        self.assertEqual(mask.tolist(), ans)
+
+if __name__ == '__main__':
+    unittest.main()
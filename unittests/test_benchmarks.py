@@ -0,0 +1,97 @@
+"""Test benchmarks.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from benchmarks import *
+from primeCounting import timeRange
+import os
+import tempfile
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_percentile(self):
+        times = list(range(1, 101))
+        self.assertEqual([percentile(times, q) for q in (1, 50, 90, 99, 100)],
+                         [1, 50, 90, 99, 100])
+        self.assertEqual(percentile([7], 99), 7)
+
+    def test_makeInputs(self):
+        rand = random.Random(1)
+        for kind in ('prime', 'odd', 'semiprime', 'square'):
+            values = makeInputs(64, kind, 5, rand)
+            self.assertEqual(len(values), 5)
+            self.assertTrue(all(N % 2 for N in values))
+            self.assertTrue(all(63 <= N.bit_length() <= 64 for N in values))
+        self.assertTrue(all(map(baillePSW, makeInputs(64, 'prime', 3, rand))))
+        self.assertRaises(ValueError, makeInputs, 64, 'even', 1, rand)
+
+    def test_run(self):
+        rows = runBenchmarks(['baillePSW', 'isIntegerSquare', 'lenstra'],
+                             (32, 96), count=3, reps=2, factorBits=(16,),
+                             log=None)
+        self.assertEqual([(r['routine'], r['kind'], r['bits']) for r in rows],
+                         [('baillePSW', k, b) for b in (32, 96)
+                          for k in testKinds]
+                         + [('isIntegerSquare', k, b) for b in (32, 96)
+                            for k in ('square', 'odd')]
+                         + [('lenstra', 'semiprime/64', 16)])
+        for row in rows:
+            self.assertEqual(set(row), set(fields))
+            self.assertTrue(row['min'] <= row['p50'] <= row['p90']
+                            <= row['p99'] <= row['max'])
+        self.assertEqual(rows[0]['calls'], 6)
+        self.assertEqual(rows[-1]['calls'], 5)
+
+        skipped = runBenchmarks(['detMillerRabin'], (64, 128), ['odd'],
+                                count=2, reps=1, log=None)
+        self.assertEqual([r['bits'] for r in skipped], [64])
+
+    def test_argsSeeded(self):
+        """makeArgs draws the same arguments whether or not the inputs of
+        its point were already made for another routine."""
+        calls = []
+        routines['recordArgs'] = (lambda a, N: calls.append(a),
+                                  routines['jacobiSymbol'][1], ('odd',), None)
+        try:
+            for cached in (False, True):
+                inputs = {}
+                if cached:
+                    list(benchRoutine('jacobiSymbol', (64,), None, 4, 1, 0,
+                                      2, inputs))
+                list(benchRoutine('recordArgs', (64,), None, 4, 1, 0, 2,
+                                  inputs))
+        finally:
+            del routines['recordArgs']
+        self.assertEqual(len(calls), 8)
+        self.assertEqual(calls[:4], calls[4:])
+
+    def test_filesAndBaseline(self):
+        rows = runBenchmarks(['fastCases'], (64, 256), count=3, reps=1,
+                             log=None)
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ('run.json', 'run.csv'):
+                path = os.path.join(tmp, name)
+                (writeJSON if name.endswith('json') else writeCSV)(rows, path)
+                self.assertEqual(readResults(path), rows)
+            self.assertEqual(main(['--routines', 'jacobiSymbol', '--bits',
+                                   '64', '--count', '2', '--reps', '1',
+                                   '--baseline', path]), 0)
+
+        self.assertEqual(compareBaseline(rows, rows), [])
+        slower = [dict(row, p50=2.5*row['p50'] + 1e-3) for row in rows]
+        flagged = compareBaseline(slower, rows)
+        self.assertEqual(len(flagged), len(rows))
+        self.assertTrue(all(r['ratio'] > 2.5 for r in flagged))
+        self.assertEqual(compareBaseline(slower, rows, tolerance=10**6), [])
+        self.assertEqual(len(compareBaseline(slower, rows[:1])), 1)
+
+    def test_timeRange(self):
+        """Only odd x are timed, each once."""
+        calls = []
+        cnt, _ = timeRange(5, 100, lambda x: calls.append(x) or baillePSW(x))
+        self.assertEqual(calls, list(range(5, 100, 2)))
+        self.assertEqual(cnt, 23)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""Test budget.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from budget import *
+from fastECM import lenstra, primePowers, primePowerProduct
+from factorization import factorInt, pollardRho
+from millerRabin import millerRabin
+from baillePSW import baillePSW
+from strongLucas import strongLucas
+from primeSearch import randomPrime
+from threading import Event
+from math import prod
+from time import time
+import random
+
+def semiprime(bits, seed=1):
+    """Return p*q for random primes p, q of bits//2 bits."""
+    rand = random.Random(seed)
+    return randomPrime(bits//2, rand) * randomPrime(bits//2, rand)
+
+class TestBudget(unittest.TestCase):
+
+    def test_steps(self):
+        budget = Budget(steps=10, every=4)
+        for _ in range(10):
+            budget.check()
+        self.assertRaises(BudgetExpired, budget.check, done=11)
+        self.assertEqual(budget.progress, {'done': 11})
+        self.assertTrue(budget.expired())
+        self.assertRaises(BudgetExpired, budget.check)
+
+    def test_cancelAndStop(self):
+        budget = Budget()
+        budget.check()
+        budget.cancel()
+        self.assertTrue(budget.is_set())
+        self.assertRaises(BudgetExpired, budget.check)
+
+        stop = Event()
+        budget = Budget(stop=stop, every=3)
+        budget.check(); budget.check()
+        stop.set()
+        self.assertRaises(BudgetExpired, budget.check)
+
+    def test_deadline(self):
+        self.assertTrue(Budget(seconds=-1).expired())
+        self.assertTrue(Budget(seconds=10, deadline=time() - 1).expired())
+        budget = Budget(seconds=10)
+        self.assertFalse(budget.expired())
+        self.assertTrue(9 < budget.remaining() <= 10)
+        self.assertIsNone(Budget().remaining())
+
+class TestECMBudget(unittest.TestCase):
+
+    def test_lenstra(self):
+        N = semiprime(160)
+        budget = Budget(steps=2000) #Some 330 checks per curve.
+        self.assertEqual(lenstra(N, 500, 10**4, B2=50000, budget=budget), N)
+        self.assertTrue(budget.expired())
+        progress = budget.progress
+        self.assertEqual(progress.get('B1'), 500)
+        self.assertGreater(progress.get('curves', 0), 0)
+        self.assertTrue(progress.get('stage1') or progress.get('stage2'))
+
+    def test_steps(self):
+        N = semiprime(160)
+        B1, numPrimes = 2000, len(primePowers(2000))
+        budget = Budget(steps=3*numPrimes + 10)
+        self.assertEqual(lenstra(N, B1, 100, B2=B1, budget=budget), N)
+        self.assertEqual(budget.progress['curves'], 3) #Stage 1 only.
+        self.assertEqual(budget.progress['stage1'], 31) #The 11th prime.
+
+    def test_factorInt(self):
+        N = semiprime(160)
+        budget = Budget(seconds=0.5)
+        start = time()
+        self.assertEqual(factorInt(3 * 5**2 * N, budget=budget),
+                         {3: 1, 5: 2, N: 1})
+        self.assertLess(time() - start, 3)
+        budget = Budget(steps=5)
+        self.assertRaises(BudgetExpired, pollardRho, N, budget=budget)
+        self.assertEqual(budget.progress, {'rho': 2 + 4 + 8 + 16 + 32 + 64})
+
+    def test_primePowerProduct(self):
+        self.assertEqual(primePowers(10), [8, 9, 5, 7])
+        for bound in (1, 2, 10, 1000, 12345):
+            self.assertEqual(primePowerProduct(bound),
+                             prod(primePowers(bound)))
+        self.assertIs(primePowerProduct(1000), primePowerProduct(1000))
+
+class TestPrimalityBudget(unittest.TestCase):
+
+    def test_millerRabin(self):
+        N = 2**4423 - 1
+        budget = Budget(steps=3)
+        self.assertRaises(BudgetExpired, millerRabin, N, 10, budget)
+        self.assertEqual(budget.progress, {'bases': 1})
+        self.assertTrue(millerRabin(N, 3, Budget(seconds=60)))
+
+    def test_lucas(self):
+        N = randomPrime(1024, random.Random(1))
+        budget = Budget(steps=100)
+        self.assertRaises(BudgetExpired, baillePSW, N, budget=budget)
+        self.assertEqual(budget.progress, {'lucasBits': 100})
+        self.assertRaises(BudgetExpired, strongLucas, N, 1, -1, None,
+                          Budget(steps=100))
+        self.assertTrue(baillePSW(N, budget=Budget(seconds=60)))
+        self.assertFalse(baillePSW(3*N, budget=Budget(steps=0)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Test certificates.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from certificates import *
+from primeSearch import nextPrime, randomPrime
+import copy
+import json
+import random
+
+class TestCMTools(unittest.TestCase):
+
+    def test_hilbertPolynomial(self):
+        self.assertEqual(hilbertPolynomial(-3), (0, 1))
+        self.assertEqual(hilbertPolynomial(-4), (-1728, 1))
+        self.assertEqual(hilbertPolynomial(-163), (262537412640768000, 1))
+        self.assertEqual(hilbertPolynomial(-15), (-121287375, 191025, 1))
+        self.assertEqual(hilbertPolynomial(-23),
+                         (12771880859375, -5151296875, 3491750, 1))
+
+    def test_cmDiscriminants(self):
+        counts = {h: len(Ds) for h, Ds in cmDiscriminants().items()}
+        self.assertEqual(counts, {1: 13, 2: 29, 3: 25, 4: 84, 5: 26, 6: 87,
+                                  7: 25, 8: 136})
+        self.assertEqual(cmDiscriminants()[1][-1], -163)
+
+    def test_polyRoot(self):
+        rand = random.Random(3)
+        p = nextPrime(10**30)
+        for degree in range(1, 7):
+            roots = [rand.randrange(p) for _ in range(degree)]
+            H = [1]
+            for r in roots:
+                H = [(a - r*b) % p for a, b in zip([0] + H, H + [0])]
+            self.assertIn(polyRoot(H, p, rand), roots)
+
+    def test_cornacchia(self):
+        rand = random.Random(5)
+        for _ in range(20):
+            N = randomPrime(100, rand)
+            for D in (-3, -4, -7, -15, -23, -1555):
+                if jacobiSymbol(D, N) == 1:
+                    uv = cornacchia(D, N)
+                    if uv is not None:
+                        u, v = uv
+                        self.assertEqual(u*u - D*v*v, 4*N)
+
+class TestCertificates(unittest.TestCase):
+
+    def test_small(self):
+        self.assertEqual(certify(2**61 - 1), {'N': 2**61 - 1, 'type': 'small'})
+        self.assertTrue(verifyCertificate({'N': 97, 'type': 'small'}))
+        self.assertFalse(verifyCertificate({'N': 91, 'type': 'small'}))
+        self.assertFalse(verifyCertificate({'N': 2**89 - 1, 'type': 'small'}))
+
+    def test_composite(self):
+        self.assertRaises(ValueError, certify, 2**64 + 1)
+        self.assertRaises(ValueError, certify, 91)
+        self.assertRaises(ValueError, certify, (2**61 - 1) * (2**89 - 1))
+
+    def test_pocklington(self):
+        cert = certify(2**127 - 1)
+        self.assertEqual(cert['type'], 'pocklington')
+        self.assertTrue(verifyCertificate(cert))
+        self.assertTrue(verifyCertificate(json.loads(json.dumps(cert))))
+
+        bad = copy.deepcopy(cert)
+        bad['N'] += 2
+        self.assertFalse(verifyCertificate(bad))
+        bad = copy.deepcopy(cert)
+        bad['factors'][0][2] = 1 #Witness a = 1 fails gcd(a**k - 1, N) = 1.
+        self.assertFalse(verifyCertificate(bad))
+
+    def test_ecpp(self):
+        rand = random.Random(11)
+        N = randomPrime(160, rand)
+        step = next(ecppSteps(N, rand))
+        step['sub'] = certify(step['q'], rand)
+        self.assertTrue(verifyCertificate(step))
+        self.assertTrue(verifyCertificate(json.loads(json.dumps(step))))
+
+        for key, delta in (('m', 1), ('a', 1), ('x', 1), ('q', 2)):
+            bad = copy.deepcopy(step)
+            bad[key] += delta
+            self.assertFalse(verifyCertificate(bad))
+        bad = copy.deepcopy(step)
+        bad['sub'] = certify(nextPrime(step['q']))
+        self.assertFalse(verifyCertificate(bad))
+
+    def test_random(self):
+        rand = random.Random(7)
+        for bits in (70, 100, 200, 300):
+            for _ in range(3):
+                N = randomPrime(bits, rand)
+                cert = certify(N, rand)
+                self.assertEqual(cert['N'], N)
+                self.assertTrue(verifyCertificate(cert))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ import unittest
 import sys
 sys.path.append('../primes')
 from deterministicMillerRabin import *
+from modContext import modContext
 
 exactPrimeCounts = {
     2: 25,
@@ -18,6 +19,10 @@ def dMRCount(pow10):
         res += detMillerRabin(x)
     return res
 
+def fullBases(N):
+    """Run detMillerRabin on its own base list (a ctx skips isPrimeU64)."""
+    return detMillerRabin(N, ctx=modContext(N, 'plain'))
+
 class TestMillerRabin(unittest.TestCase):
 
     def test_evens(self):
@@ -46,5 +51,23 @@ class TestMillerRabin(unittest.TestCase):
         toCheck = dMRCount(7)
         self.assertEqual(toCheck, exactPrimeCounts[7])
         
+class TestIsPrimeU64(unittest.TestCase):
+
+    def test_agreesWithBases(self):
+        """Compare with the full base list on each bucket boundary."""
+        for bound, _ in u64Bases:
+            for x in range(max(bound-2000, 0), min(bound+2000, 2**64)):
+                self.assertEqual(isPrimeU64(x), fullBases(x))
+
+    def test_strongPseudoprimes(self):
+        spsp = [2047, 1373653, 1194649, 9080191, 25326001, 3215031751,
+                4759123141, 1122004669633, 2152302898747, 3474749660383,
+                341550071728321, 3825123056546413051]
+        self.assertEqual([isPrimeU64(x) for x in spsp], [False]*len(spsp))
+
+    def test_largest(self):
+        self.assertTrue(isPrimeU64(2**64 - 59))
+        self.assertFalse(isPrimeU64(2**64 - 1))
+
 if __name__ == '__main__':
     unittest.main()
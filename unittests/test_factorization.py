@@ -0,0 +1,67 @@
+"""Test factorization.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from factorization import *
+from smallDivisors import primesUnder1008
+from math import prod
+import random
+
+class TestStages(unittest.TestCase):
+
+    def test_pollardRho(self):
+        random.seed(12)
+        for p, q in [(1000003, 1000033), (1000000007, 998244353),
+                     (2**31 - 1, 2**61 - 1)]:
+            self.assertIn(pollardRho(p*q), {p, q})
+
+    def test_pollardPM1(self):
+        p = 10**30 + 57 #p-1 = 2**3 * 3 * 79043 * 3998741 * ...
+        q = 2 * 3**3 * 5**2 * 7 * 11 * 13 * 9973 * 99991 + 1 #Prime.
+        self.assertEqual(pollardPM1(p*q), q)
+        self.assertEqual(pollardPM1(p*q, bound=1000), p*q)
+
+class TestFactorInt(unittest.TestCase):
+
+    def check(self, N, factors):
+        self.assertEqual(prod(p**e for p, e in factors.items()), N)
+        self.assertEqual(list(factors), sorted(factors))
+        for p in factors:
+            self.assertTrue(baillePSW(p))
+
+    def test_small(self):
+        primes = sorted(primesUnder1008)
+        self.assertEqual(factorInt(1), {})
+        for N in range(2, 10**6, 997):
+            ans = {p: v_p(N, p)[0] for p in primes if N%p == 0}
+            rest = N // prod(p**e for p, e in ans.items())
+            if rest > 1:
+                ans[rest] = 1 #N < 1009**2, so rest is prime.
+            self.assertEqual(factorInt(N), ans)
+
+    def test_examples(self):
+        random.seed(13)
+        self.assertEqual(factorInt(2**4 * 3 * 1000003**2 * (2**61-1)),
+                         {2: 4, 3: 1, 1000003: 2, 2305843009213693951: 1})
+        self.assertEqual(factorInt((2**31-1)**6 * (2**61-1)**2),
+                         {2**31-1: 6, 2**61-1: 2})
+        for N in [10**40 + 1, 2**128 + 1, 3**100 - 1, 10**50 + 3]:
+            self.check(N, factorInt(N))
+
+    def test_randomProducts(self):
+        rand = random.Random(14)
+        for _ in range(20):
+            N = prod(rand.randrange(2, 10**rand.randrange(1, 12))
+                     for _ in range(rand.randrange(1, 6)))
+            self.check(N, factorInt(N))
+
+    def test_budget(self):
+        random.seed(15)
+        N = (2**89 - 1) * (2**107 - 1)
+        factors = factorInt(N, rhoIters=100, pm1=0, schedule=())
+        self.assertEqual(factors, {N: 1})
+        self.assertRaises(ValueError, factorInt, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Test fastECM.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from fastECM import *
+import random
+from time import time
+
+def sameX(P, Q, M):
+    """Return if the projective x-coordinates P and Q agree mod M."""
+    return (P[0]*Q[1] - Q[0]*P[1]) % M == 0
+
+class TestMontgomeryCurves(unittest.TestCase):
+
+    def test_ladder(self):
+        rand = random.Random(10)
+        M = 2**127 - 1
+        for _ in range(20):
+            exists, (X, Z, a24) = suyamaCurve(rand.randrange(6, M), M)
+            self.assertTrue(exists)
+            points = [None, (X, Z), xDouble(X, Z, a24, M)]
+            for k in range(3, 40):
+                points.append(xAdd(*points[k-1], X, Z, *points[k-2], M))
+            for k in range(1, 40):
+                self.assertTrue(sameX(ladder(X, Z, k, a24, M), points[k], M))
+
+            a, b = rand.randrange(1, 10**6), rand.randrange(1, 10**6)
+            aP = ladder(X, Z, a, a24, M)
+            self.assertTrue(sameX(ladder(*aP, b, a24, M),
+                                  ladder(X, Z, a*b, a24, M), M))
+
+    def test_stage2(self):
+        p, B1, B2 = 1000003, 50, 5000
+        N = p * (2**61 - 1)
+        primes = [2] + basePrimes(B1)
+        found = 0
+        for sigma in range(6, 400):
+            if ecmCurve(N, sigma, B1, B1, primes) == 1:
+                res = ecmCurve(N, sigma, B1, B2, primes)
+                self.assertIn(res, {1, p})
+                found += (res == p)
+
+        self.assertGreater(found, 0)
+
+class TestBatchCurves(unittest.TestCase):
+
+    def test_batchInverse(self):
+        rand = random.Random(13)
+        M = 2**127 - 1
+        values = [rand.randrange(1, M) for _ in range(50)]
+        exists, invs = batchInverse(values, M)
+        self.assertTrue(exists)
+        self.assertEqual(invs, [pow(v, -1, M) for v in values])
+        self.assertEqual(batchInverse([], M), (True, []))
+        self.assertEqual(batchInverse([2, 6, 4], 15), (False, 3))
+        self.assertEqual(batchInverse([2, 15, 4], 15), (False, 15))
+
+    def test_batchMult(self):
+        rand = random.Random(14)
+        M = 2**127 - 1
+        curves = []
+        for _ in range(10):
+            x, y, a = (rand.randrange(M) for _ in range(3))
+            curves.append((x, y, a, x, y))
+
+        for k in [1, 2, 3, 10, 12345]:
+            exists, res = batchMult(curves, k, M)
+            self.assertTrue(exists)
+            for (x, y, a, _, _), (kX, kY, _, _, _) in zip(curves, res):
+                self.assertEqual(mult(x, y, k, a, M), (True, kX, kY))
+
+    def test_batchStepAddBase(self):
+        """P + base doubles P = base, and drops P = -base (the identity)."""
+        M = 2**127 - 1
+        x, y, a = 5, 7, 11
+        exists, res = batchStep([(x, y, a, x, y), (x, M - y, a, x, y)], M,
+                                addBase=True)
+        self.assertTrue(exists)
+        self.assertEqual(res, batchStep([(x, y, a, x, y)], M)[1])
+        self.assertEqual(mult(x, y, 2, a, M), (True,) + res[0][:2])
+
+    def test_batchLenstra(self):
+        random.seed(15)
+        N = 3209622181 * 6727426213 * 2810645183
+        res = batchLenstra(N)
+        self.assertTrue((1 < res < N) and (N % res == 0))
+        self.assertEqual(batchLenstra(2**61 - 1, effort=8, batch=4), 2**61-1)
+
+class TestLenstra(unittest.TestCase):
+
+    def test_lenstra(self):
+        random.seed(10)
+        factors = [3209622181, 6727426213, 2810645183]
+        N = factors[0] * factors[1] * factors[2]
+        for _ in range(3):
+            res = lenstra(N)
+            self.assertTrue((1 < res < N) and (N % res == 0))
+
+    def test_largerFactors(self):
+        random.seed(11)
+        N = 1000000000000000003 * 1000000000000000009 * 1000003
+        res = lenstra(N, bound=2000, effort=200)
+        self.assertTrue((1 < res < N) and (N % res == 0))
+
+class TestParallelLenstra(unittest.TestCase):
+
+    N = 3209622181 * 6727426213 * 2810645183
+
+    def test_serial(self):
+        res, stats = parallelLenstra(self.N, seed=1)
+        self.assertTrue((1 < res < self.N) and (self.N % res == 0))
+        self.assertEqual(stats[-1]['res'], res)
+        again, repeat = parallelLenstra(self.N, seed=1)
+        self.assertEqual(again, res)
+        self.assertEqual([curve['sigma'] for curve in repeat],
+                         [curve['sigma'] for curve in stats])
+
+    def test_workers(self):
+        res, stats = parallelLenstra(self.N, effort=200, workers=2, seed=2)
+        self.assertTrue((1 < res < self.N) and (self.N % res == 0))
+        self.assertLess(len(stats), 200)
+        self.assertIn(res, [curve['res'] for curve in stats])
+        res = lenstra(self.N, workers=2)
+        self.assertTrue((1 < res < self.N) and (self.N % res == 0))
+
+    def test_timeout(self):
+        N = (2**89 - 1) * (2**107 - 1)
+        start = time()
+        res, stats = parallelLenstra(N, bound=10**4, effort=10**4,
+                                     workers=2, timeout=0.5)
+        self.assertEqual(res, N)
+        self.assertLess(time() - start, 10)
+        self.assertLess(len(stats), 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""Test frobenius.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from frobenius import *
+from helperFuncs import isIntegerSquare, gcd
+from modContext import modContext
+import backend
+from batchPrimality import isPrimeBatch
+from primeSearch import nextPrime, prevPrime
+from primeCounting import primeCount
+import random
+
+def isPrimeTrial(N):
+    """Return if odd N > 1 is prime by trial division."""
+    return all(N % p for p in range(3, int(N**0.5) + 1, 2))
+
+class TestFrobenius(unittest.TestCase):
+
+    def test_frobeniusCheck(self):
+        """The core test has no exceptions among small odd non-squares."""
+        for N in range(1009, 60000, 2):
+            if isIntegerSquare(N):
+                continue
+            a = minimalA(N)
+            if (a is not None) and (gcd(2*a + 5, N) == 1):
+                self.assertEqual(frobeniusCheck(N, a), isPrimeTrial(N), N)
+
+    def test_minimalA(self):
+        self.assertEqual(minimalA(2**127 - 1), 0) #N = 3 mod(4)
+        for N in (10**9 + 9, 2**89 + 5, 3*5*7*11*13 + 2):
+            a = minimalA(N)
+            self.assertEqual(backend.jacobiSymbol(a*a - 4, N), -1)
+            for b in range(a):
+                self.assertNotEqual(backend.jacobiSymbol(b*b - 4, N), -1)
+
+    def test_contexts(self):
+        rand = random.Random(4)
+        for _ in range(20):
+            N = rand.getrandbits(300) | 1
+            a = minimalA(N)
+            if a is None:
+                continue
+            for method in ('plain', 'montgomery', 'barrett'):
+                self.assertEqual(frobeniusCheck(N, a, modContext(N, method)),
+                                 frobeniusCheck(N, a))
+
+    def test_underwoodFrobenius(self):
+        self.assertTrue(underwoodFrobenius(2**607 - 1))
+        self.assertTrue(underwoodFrobenius(2**1279 - 1))
+        self.assertFalse(underwoodFrobenius(2**607 + 1))
+        self.assertFalse(underwoodFrobenius((2**89 - 1) * (2**107 - 1)))
+        self.assertFalse(underwoodFrobenius((2**89 - 1)**2))
+        self.assertEqual([underwoodFrobenius(N) for N in range(200)],
+                         [N > 1 and (N == 2 or N % 2 and isPrimeTrial(N))
+                          for N in range(200)])
+
+        #(6k+1)(12k+1)(18k+1) is a Carmichael number if all three are prime.
+        k = 10**7
+        while not all(underwoodFrobenius(m*k + 1) for m in (6, 12, 18)):
+            k += 1
+        self.assertFalse(underwoodFrobenius((6*k+1) * (12*k+1) * (18*k+1)))
+
+    def test_selectable(self):
+        rand = random.Random(9)
+        values = [rand.getrandbits(96) for _ in range(300)]
+        self.assertEqual(isPrimeBatch(values, test=underwoodFrobenius),
+                         isPrimeBatch(values))
+        N = 2**200
+        self.assertEqual(nextPrime(N, test=underwoodFrobenius), nextPrime(N))
+        self.assertEqual(prevPrime(N, test=underwoodFrobenius), prevPrime(N))
+        self.assertEqual(primeCount(10**4, underwoodFrobenius), 1229)
+
+if __name__ == '__main__':
+    unittest.main()
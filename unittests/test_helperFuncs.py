@@ -4,6 +4,8 @@ import unittest
 import sys
 sys.path.append('../primes')
 from helperFuncs import *
+from math import prod
+import random
 
 class TestIsIntegerSquare(unittest.TestCase):
 
@@ -18,6 +20,35 @@ class TestIsIntegerSquare(unittest.TestCase):
         toCheck = [isIntegerSquare(x) for x in range(10**6) if x not in sqs]
         self.assertEqual(toCheck, ans)
 
+    def test_large(self):
+        """Past 4300 digits, where str(N) is refused."""
+        r = 3**10000 + 2
+        self.assertTrue(isIntegerSquare(r*r))
+        self.assertFalse(isIntegerSquare(r*r + 1))
+        self.assertFalse(isIntegerSquare(r*r - 1))
+        self.assertFalse(isIntegerSquare(-r*r))
+
+    def test_isSquareResidue(self):
+        self.assertTrue(all(isSquareResidue(x*x) for x in range(10**5)))
+        self.assertTrue(isSquareResidue((10**40 + 7)**2))
+        passed = sum(isSquareResidue(x) for x in range(10**6))
+        self.assertLess(passed, 10**6 // 100)
+
+class TestJacobiSymbol(unittest.TestCase):
+
+    def test_eulerCriterion(self):
+        for p in (3, 5, 7, 11, 13, 101, 65537):
+            for a in range(-300, 300):
+                euler = pow(a, (p-1)//2, p)
+                self.assertEqual(jacobiSymbol(a, p),
+                                 -1 if euler == p-1 else euler)
+
+    def test_multiplicative(self):
+        for N, M in ((15, 7), (21, 11), (3**5, 13), (2**61 - 1, 10**9 + 7)):
+            for a in (-8, -1, 0, 2, 3, 12, 10**30 + 1):
+                self.assertEqual(jacobiSymbol(a, N*M),
+                                 jacobiSymbol(a, N) * jacobiSymbol(a, M))
+
 class TestValutions(unittest.TestCase):
 
     def test_v_p(self):
@@ -26,6 +57,82 @@ class TestValutions(unittest.TestCase):
                 powP, d = v_p(x, p)
                 self.assertTrue(d%p != 0)
                 self.assertEqual(p**powP*d, x)
+
+class TestProductTree(unittest.TestCase):
+
+    def test_productTree(self):
+        for n in range(1, 40):
+            values = list(range(2, n+2))
+            tree = productTree(values)
+            self.assertEqual(tree[0], values)
+            self.assertEqual(tree[-1], [prod(values)])
+            for lower, upper in zip(tree, tree[1:]):
+                self.assertEqual(len(upper), (len(lower)+1) // 2)
+                self.assertEqual(prod(upper), prod(lower))
+
+    def test_remainderTree(self):
+        for n in range(1, 40):
+            values = [3*i + 2 for i in range(n)]
+            for N in [0, 1, 12345, 10**40 + 7]:
+                self.assertEqual(remainderTree(N, productTree(values)),
+                                 [N % v for v in values])
      
+class TestRoots(unittest.TestCase):
+
+    def test_iroot(self):
+        for k in range(1, 8):
+            for N in list(range(3000)) + [10**50 + i for i in range(-3, 4)]:
+                r = iroot(N, k)
+                self.assertTrue(r**k <= N < (r+1)**k)
+
+    def test_irootLarge(self):
+        """Float seeds near a root and at every size stay exact."""
+        rand = random.Random(5)
+        for _ in range(2000):
+            k = rand.randrange(3, 200)
+            r = rand.randrange(2, 2**(6000 // k))
+            for N in (r**k - 1, r**k, r**k + 1,
+                      rand.getrandbits(k * r.bit_length())):
+                x = iroot(N, k)
+                self.assertTrue(x**k <= N < (x+1)**k)
+
+    def test_perfectPower(self):
+        self.assertEqual(perfectPower(2**64), (2, 64))
+        self.assertEqual(perfectPower(6**35), (6, 35))
+        self.assertEqual(perfectPower(10**18 + 1), (10**18 + 1, 1))
+        for b in range(2, 30):
+            for k in range(1, 12):
+                base, e = perfectPower(b**k)
+                self.assertEqual(base**e, b**k)
+                self.assertEqual(perfectPower(base)[1], 1)
+
+        b = 10**4 + 7
+        for k in (2, 3, 35, 200):
+            self.assertEqual(perfectPower(b**k, minBase=10**4), (b, k))
+
+    def test_isPerfectPower(self):
+        powers = {b**k for b in range(2, 317) for k in range(2, 17)}
+        for N in range(2, 10**5):
+            self.assertEqual(isPerfectPower(N), N in powers)
+        self.assertTrue(isPerfectPower((2**61 - 1)**7))
+        self.assertFalse(isPerfectPower((2**61 - 1)**7 + 2))
+        self.assertFalse(isPerfectPower(3**1000 * 2))
+
+    def test_powerWitnesses(self):
+        for e in (3, 5, 7, 101):
+            for q in powerWitnesses(e):
+                self.assertEqual(q % (2*e), 1)
+                self.assertTrue(all(q % p for p in range(2, iroot(q, 2)+1)))
+
+    def test_sqrtMod(self):
+        #2**40*6+1 = 1 mod 2**41 exercises Tonelli's loop the longest.
+        for p in (2, 3, 5, 13, 17, 97, 65537, 2**61 - 1, 2**40*6 + 1):
+            for x in range(min(p, 300)):
+                r = sqrtMod(x*x, p)
+                self.assertEqual(r*r % p, x*x % p)
+
+        self.assertRaises(ValueError, sqrtMod, 3, 7)
+        self.assertRaises(ValueError, sqrtMod, 3, 77)
+
 if __name__ == '__main__':
     unittest.main()
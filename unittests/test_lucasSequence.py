@@ -0,0 +1,76 @@
+"""Test lucasSequence.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from lucasSequence import *
+from helperFuncs import v_2, gcd
+from modContext import modContext
+from baillePSW import oddNQR
+import random
+
+def slowLucas(N, P, Q, k):
+    """Return (U_k, V_k) mod N by the defining recurrence."""
+    U, V = [0, 1], [2, P]
+    for _ in range(k):
+        U = [U[1], P*U[1] - Q*U[0]]
+        V = [V[1], P*V[1] - Q*V[0]]
+
+    return U[0] % N, V[0] % N
+
+def selfridgeLucas(N):
+    """Return if odd N > 1 passes the strong Lucas test, Selfridge's D.
+
+    N sharing a factor with D (or square N) is reported as failing.
+
+    """
+    D = oddNQR(N, 100)
+    if (D == 0) or (gcd(D, N) != 1):
+        return False
+
+    pow2, d = v_2(N+1)
+    return strongLucasCheck(N, 1, (1-D)//4, pow2, d)
+
+class TestLucasSequence(unittest.TestCase):
+
+    def test_small(self):
+        N = 10**9 + 7
+        for P in range(-3, 4):
+            for Q in range(-3, 4):
+                for k in range(30):
+                    U, V = slowLucas(N, P, Q, k)
+                    v, vNext, qk = lucasV(N, P, Q, k)
+                    self.assertEqual((v, vNext, qk),
+                                     (V, slowLucas(N, P, Q, k+1)[1],
+                                      pow(Q, k, N)))
+                    if P*P != 4*Q:
+                        self.assertEqual(lucasUV(N, P, Q, k), (U, V, qk))
+                    self.assertEqual(lucasUVLoop(N, P, Q, k), (U, V, qk))
+
+        self.assertRaises(ValueError, lucasUV, 15, 1, -1, 10) #D = 5.
+
+    def test_contexts(self):
+        rand = random.Random(2)
+        for _ in range(50):
+            N = rand.getrandbits(300) | 1
+            P, Q = rand.randint(-5, 5), rand.randint(-5, 5)
+            k = rand.getrandbits(150)
+            v, vNext, qk = lucasV(N, P, Q, k)
+            self.assertEqual((lucasUVLoop(N, P, Q, k)[1], qk % N), (v, qk))
+            for method in ('plain', 'montgomery', 'barrett'):
+                ctx = modContext(N, method)
+                forms = lucasV(N, P, Q, k, ctx)
+                self.assertEqual(tuple(map(ctx.fromForm, forms)),
+                                 (v, vNext, qk))
+
+    def test_strongLucasCheck(self):
+        """Selfridge strong Lucas pseudoprimes, OEIS A217255."""
+        pseudo = [n for n in range(3, 60000, 2) if selfridgeLucas(n)
+                  and not all(n % p for p in range(3, int(n**0.5) + 1, 2))]
+        self.assertEqual(pseudo, [5459, 5777, 10877, 16109, 18971, 22499,
+                                  24569, 25199, 40309, 58519])
+        self.assertTrue(selfridgeLucas(2**521 - 1))
+        self.assertFalse(selfridgeLucas((2**61 - 1) * (2**89 - 1)))
+
+if __name__ == '__main__':
+    unittest.main()
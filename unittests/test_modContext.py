@@ -0,0 +1,60 @@
+"""Test modContext.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from modContext import *
+import backend
+from baillePSW import baillePSW
+from strongLucas import strongLucas
+from deterministicMillerRabin import detMillerRabin
+import random
+
+class TestContexts(unittest.TestCase):
+
+    def setUp(self):
+        self.initial = backend.getBackend()
+
+    def tearDown(self):
+        backend.setBackend(self.initial)
+
+    def test_arithmetic(self):
+        rand = random.Random(6)
+        for bits in [5, 64, 65, 300, 1000]:
+            for _ in range(20):
+                N = rand.getrandbits(bits) | (1 << (bits-1)) | 1
+                a, b = rand.randrange(N), rand.randrange(N)
+                e = rand.getrandbits(bits)
+                for method in contexts:
+                    ctx = modContext(N, method)
+                    A, B = ctx.toForm(a), ctx.toForm(b)
+                    self.assertEqual(ctx.fromForm(ctx.mul(A, B)), a*b % N)
+                    self.assertEqual(ctx.fromForm(ctx.sqr(A)), a*a % N)
+                    self.assertEqual(ctx.fromForm(ctx.one), 1 % N)
+                    self.assertEqual(ctx.fromForm(ctx.minusOne), N-1)
+                    for base in [2, 3, a]:
+                        toCheck = ctx.fromForm(ctx.pow(base, e))
+                        self.assertEqual(toCheck, pow(base, e, N))
+
+    def test_autoMethod(self):
+        backend.setBackend('python')
+        self.assertEqual(modContext(2**127 - 1).method, 'plain')
+        self.assertEqual(modContext(2**11213 - 1).method, 'barrett')
+
+class TestTestsOnContexts(unittest.TestCase):
+
+    def test_agreement(self):
+        """Every test gives the same answer in every context."""
+        rand = random.Random(7)
+        values = list(range(3, 3000, 2)) + [rand.getrandbits(80) | 1
+                                              for _ in range(200)]
+        for N in values + [5459, 5777, 10877, 3215031751, 2152302898747]:
+            ans = (baillePSW(N), detMillerRabin(N), strongLucas(N, 1, -1))
+            for method in contexts:
+                ctx = modContext(N, method)
+                toCheck = (baillePSW(N, ctx=ctx), detMillerRabin(N, ctx=ctx),
+                           strongLucas(N, 1, -1, ctx=ctx))
+                self.assertEqual(toCheck, ans)
+
+if __name__ == '__main__':
+    unittest.main()
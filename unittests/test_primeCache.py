@@ -0,0 +1,126 @@
+"""Test primeCache.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from primeCache import *
+from baillePSW import baillePSW
+from millerRabin import singleMillerRabin
+from functools import partial
+from batchPrimality import isPrimeBatch
+from concurrent.futures import ProcessPoolExecutor
+import os
+import pickle
+import random
+import tempfile
+
+class TestCachedTest(unittest.TestCase):
+
+    def test_lru(self):
+        calls = []
+        test = CachedTest(lambda N: calls.append(N) or baillePSW(N), 2)
+        for N in (2**61 - 1, 2**61 - 1, 2**89 - 1, 2**61 - 1, 91, 2**89 - 1):
+            self.assertEqual(test(N), baillePSW(N))
+        self.assertEqual(calls, [2**61 - 1, 2**89 - 1, 91, 2**89 - 1])
+        self.assertEqual(test.cacheInfo(),
+                         {'hits': 2, 'sharedHits': 0, 'misses': 4,
+                          'evictions': 2, 'size': 2, 'maxSize': 2})
+        test = CachedTest(baillePSW)
+        self.assertFalse(test(2**89 + 1, 10)) #Extra arguments bypass it.
+        self.assertEqual(test.cacheInfo()['misses'], 0)
+
+        test.clearCache()
+        self.assertEqual(test.cacheInfo()['size'], 0)
+
+    def test_decorator(self):
+        square = cached(maxSize=10)(lambda N: N == 49)
+        self.assertTrue(square(49) and square(49))
+        self.assertEqual(square.cacheInfo()['hits'], 1)
+        self.assertEqual(cached(baillePSW).__name__, 'baillePSW')
+
+class TestSharedTable(unittest.TestCase):
+
+    def check(self, table):
+        first = CachedTest(baillePSW, shared=table)
+        values = [2**61 - 1, 2**89 - 1, 2**89 + 1, 10**30 + 57]
+        results = [first(N) for N in values]
+        second = pickle.loads(pickle.dumps(first)) #Attaches by name/path.
+        self.assertEqual([second(N) for N in values], results)
+        self.assertEqual(second.cacheInfo()['sharedHits'], len(values))
+        second.shared.close()
+
+        digest = keyDigest('baillePSW.baillePSW', 2**89 - 1)
+        self.assertTrue(table.get(digest))
+        self.assertIsNone(table.get(keyDigest('baillePSW', 2**89 - 1)))
+        for offset in range(0, table.slots * slot.size, slot.size):
+            if bytes(table.buf[offset:offset+16]) == digest:
+                table.buf[offset+16] ^= 1 #A torn write: the tag fails.
+        self.assertIsNone(table.get(digest))
+
+    def test_sharedMemory(self):
+        table = SharedTable(64)
+        try:
+            self.check(table)
+        finally:
+            table.unlink()
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            table = SharedTable(64, path=os.path.join(tmp, 'cache'))
+            self.check(table)
+            table.unlink()
+
+    def test_collisions(self):
+        """A full table keeps the latest results and never a wrong one."""
+        table = SharedTable(8)
+        try:
+            for N in range(1000):
+                table.put(keyDigest('t', N), N % 3 == 0)
+            found = {N: table.get(keyDigest('t', N)) for N in range(1000)}
+            self.assertTrue(all(found[N] in (None, N % 3 == 0) for N in found))
+            self.assertEqual(sum(r is not None for r in found.values()), 8)
+        finally:
+            table.unlink()
+        self.assertRaises(ValueError, SharedTable, 6)
+
+    def test_names(self):
+        """Tests sharing a table never read each other's results."""
+        N = 3825123056546413051 #A strong pseudoprime to base 2.
+        self.assertEqual(qualifiedName(baillePSW), 'baillePSW.baillePSW')
+        self.assertEqual(qualifiedName(self.test_names), None)
+        table = SharedTable(64)
+        try:
+            for test in (lambda N: True, partial(baillePSW), self.test_names):
+                self.assertRaises(ValueError, CachedTest, test, shared=table)
+            self.assertIsNone(CachedTest(lambda N: True).name)
+
+            base2 = CachedTest(partial(singleMillerRabin, B=2), shared=table,
+                               name='singleMillerRabin/2')
+            full = CachedTest(partial(baillePSW), shared=table, name='bpsw')
+            self.assertTrue(base2(N))
+            self.assertFalse(full(N))
+            self.assertEqual(full.cacheInfo()['sharedHits'], 0)
+            copy = pickle.loads(pickle.dumps(full))
+            self.assertFalse(copy(N))
+            self.assertEqual(copy.cacheInfo()['sharedHits'], 1)
+            copy.shared.close()
+        finally:
+            table.unlink()
+
+    def test_workers(self):
+        table = SharedTable(1 << 12)
+        try:
+            test = CachedTest(baillePSW, shared=table)
+            rand = random.Random(2)
+            values = [rand.getrandbits(100) | 1 for _ in range(2000)]
+            with ProcessPoolExecutor(2) as pool:
+                mask = isPrimeBatch(values, executor=pool, test=test)
+            self.assertEqual(mask, isPrimeBatch(values))
+            primes = [N for N, flag in zip(values, mask) if flag]
+            self.assertTrue(all(map(test, primes))) #Tested by the workers.
+            self.assertEqual(test.cacheInfo()['misses'], 0)
+        finally:
+            table.unlink()
+
+if __name__ == '__main__':
+    unittest.main()
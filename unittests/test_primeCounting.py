@@ -0,0 +1,149 @@
+"""Test primeCounting.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from primeCounting import *
+import primeCounting
+from sieve import countPrimes, basePrimes
+from parallel import chunkBounds
+from concurrent.futures import ProcessPoolExecutor
+import tempfile
+import json
+import os
+
+exactPrimeCounts = {
+    2: 25,
+    4: 1229,
+    6: 78498,
+    7: 664579,
+    8: 5761455,
+    9: 50847534}
+
+class TestPrimeCount(unittest.TestCase):
+
+    def test_sievedCount(self):
+        self.assertEqual(primeCount(10**6), exactPrimeCounts[6])
+
+    def test_sublinearCount(self):
+        self.assertEqual(primeCount(10**8), exactPrimeCounts[8])
+        self.assertEqual(primeCount(10**8 + 8), exactPrimeCounts[8] + 1)
+
+    def test_exactTestIsSieved(self):
+        toCheck = primeCount(10**6, detMillerRabin)
+        self.assertEqual(toCheck, exactPrimeCounts[6])
+
+    def test_inexactTestIsNotSieved(self):
+        self.assertEqual(primeCount(10**6, singleMillerRabin), 78525)
+
+class TestParallel(unittest.TestCase):
+
+    def test_chunkBounds(self):
+        cases = [(0, 100, 7), (5, 6, 4), (3, 3, 2), (0, 10**6, 32)]
+        for lo, hi, parts in cases:
+            chunks = chunkBounds(lo, hi, parts)
+            self.assertTrue(len(chunks) <= parts)
+            self.assertEqual([x for a, b in chunks for x in range(a, b)],
+                             list(range(lo, hi)))
+
+    def test_parallelMatchesSerial(self):
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            for n in [0, 3, 4, 5, 100, 10**5 + 3]:
+                self.assertEqual(primeCount(n, executor=pool), primeCount(n))
+                toCheck = primeCount(n, singleMillerRabin, executor=pool)
+                self.assertEqual(toCheck, primeCount(n, singleMillerRabin))
+
+            toCheck = primeCount(10**7, executor=pool)
+            self.assertEqual(toCheck, exactPrimeCounts[7])
+
+    def test_workers(self):
+        toCheck = primeCount(10**6, singleMillerRabin, workers=2)
+        self.assertEqual(toCheck, 78525)
+
+class TestResumableCount(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'count.json')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_extend(self):
+        toCheck = primeCount(10**6, checkpoint=self.path, interval=0)
+        self.assertEqual(toCheck, exactPrimeCounts[6])
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)['position'], 10**6)
+
+        for n in [10**6, 10**6 + 1, 3*10**6 + 7]:
+            self.assertEqual(resumableCount(n, self.path), countPrimes(n))
+        self.assertRaises(ValueError, resumableCount, 10**6, self.path)
+        self.assertRaises(ValueError, resumableCount, 4*10**6, self.path,
+                          singleMillerRabin)
+
+    def test_smallValues(self):
+        for n in range(40):
+            path = os.path.join(self.dir.name, f'{n}.json')
+            self.assertEqual(resumableCount(n, path, interval=0),
+                             countPrimes(n))
+            toCheck = resumableCount(n, path + '.mr', singleMillerRabin, 0)
+            self.assertEqual(toCheck, primeCount(n, singleMillerRabin))
+
+    def test_resumeSweep(self):
+        calls = 0
+        def killed(x):
+            nonlocal calls
+            calls += 1
+            if calls > 3*sweepBlock:
+                raise KeyboardInterrupt
+            return singleMillerRabin(x)
+        killed.__name__ = 'singleMillerRabin'
+
+        self.assertRaises(KeyboardInterrupt, resumableCount, 10**5,
+                          self.path, killed, 0)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)['position'], 5 + 6*sweepBlock)
+        self.assertEqual(resumableCount(10**5, self.path, singleMillerRabin),
+                         primeCount(10**5, singleMillerRabin))
+
+    def test_resumeSublinear(self):
+        sifted, limit = [], 300
+        def sift(*args):
+            if len(sifted) == limit:
+                raise KeyboardInterrupt
+            sifted.append(args[-1])
+            lucySift(*args)
+
+        primeCounting.lucySift = sift
+        try:
+            self.assertRaises(KeyboardInterrupt, resumableCount, 10**8,
+                              self.path, None, 0)
+            self.assertTrue(os.path.exists(self.path + '.tables'))
+            limit = None
+            self.assertEqual(resumableCount(10**8, self.path, interval=0),
+                             exactPrimeCounts[8])
+        finally:
+            primeCounting.lucySift = lucySift
+
+        self.assertEqual(sifted, [2] + basePrimes(10**4)) #Each prime once.
+        self.assertFalse(os.path.exists(self.path + '.tables'))
+        toCheck = resumableCount(10**8 + 10**6, self.path)
+        self.assertEqual(toCheck, primePi(10**8 + 10**6 - 1))
+
+class TestPrimePi(unittest.TestCase):
+
+    def test_smallValues(self):
+        for x in range(2000):
+            self.assertEqual(primePi(x), countPrimes(x+1))
+
+    def test_numPrimesUnder10_k(self):
+        for pow10, ans in exactPrimeCounts.items():
+            self.assertEqual(primePi(10**pow10), ans)
+
+    def test_memory(self):
+        cnt, memory = primePi(10**6, withMemory=True)
+        self.assertEqual(cnt, exactPrimeCounts[6])
+        self.assertEqual(memory, 2 * 8 * (10**3 + 1))
+
+if __name__ == '__main__':
+    unittest.main()
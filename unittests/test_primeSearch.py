@@ -0,0 +1,49 @@
+"""Test primeSearch.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from primeSearch import *
+from sieve import primeRange
+from bisect import bisect_left, bisect_right
+import random
+
+class TestPrimeSearch(unittest.TestCase):
+
+    def check(self, lo, hi, stride, **kwargs):
+        primes = list(primeRange(max(lo-2000, 0), hi+2000))
+        for N in range(lo, hi, stride):
+            self.assertEqual(nextPrime(N, **kwargs),
+                             primes[bisect_right(primes, N)])
+            if N > 2:
+                self.assertEqual(prevPrime(N, **kwargs),
+                                 primes[bisect_left(primes, N) - 1])
+
+    def test_small(self):
+        self.check(0, 5000, 1)
+        self.check(0, 5000, 7, bound=16, window=3)
+
+    def test_windows(self):
+        self.check(2**28 - 20000, 2**28 + 20000, 97, bound=1 << 12)
+        self.check(2**28 - 20000, 2**28 + 20000, 101, bound=1 << 12,
+                   window=4)
+        self.check(10**12, 10**12 + 20000, 89, bound=1000)
+
+    def test_large(self):
+        self.assertEqual(nextPrime(2**521 - 2), 2**521 - 1)
+        self.assertEqual(prevPrime(2**521), 2**521 - 1)
+        self.assertEqual(nextPrime(2**127 - 1), 2**127 + 29)
+        self.assertEqual(prevPrime(2**127 + 29), 2**127 - 1)
+        self.assertRaises(ValueError, prevPrime, 2)
+
+    def test_randomPrime(self):
+        rand = random.Random(17)
+        for bits in [2, 3, 10, 64, 300]:
+            for _ in range(5):
+                p = randomPrime(bits, rand)
+                self.assertEqual(p.bit_length(), bits)
+                self.assertTrue(baillePSW(p))
+        self.assertRaises(ValueError, randomPrime, 1)
+
+if __name__ == '__main__':
+    unittest.main()
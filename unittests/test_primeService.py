@@ -0,0 +1,141 @@
+"""Test primeService.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from primeService import *
+from threading import Event
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+from factorization import factorInt
+from budget import Budget
+from primeSearch import randomPrime
+import asyncio
+import random
+
+def hardSemiprime(bits=160, seed=1):
+    """Return a semiprime that takes factorInt minutes to split."""
+    rand = random.Random(seed)
+    return randomPrime(bits//2, rand) * randomPrime(bits//2, rand)
+
+class TestPrimeService(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ThreadPoolExecutor(max_workers=3)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def service(self, **kwargs):
+        return PrimeService(executor=self.pool, **kwargs)
+
+    def test_results(self):
+        async def main():
+            async with self.service() as service:
+                values = [2**61 - 1, 2**64 + 1, 2**521 - 1, 2**607 + 1]
+                res = await asyncio.gather(*map(service.isPrime, values))
+                self.assertEqual(res, [True, False, True, False])
+                N = 2**4 * 1000003**2 * (2**61 - 1) * (2**31 - 1)
+                self.assertEqual(await service.factor(N), factorInt(N))
+                self.assertEqual(await service.factor(91), {7: 1, 13: 1})
+                return service.counts
+
+        counts = asyncio.run(main())
+        self.assertEqual((counts['inline'], counts['submitted']), (2, 4))
+
+    def test_coalesce(self):
+        async def main():
+            async with self.service() as service:
+                N = 2**1279 - 1
+                res = await asyncio.gather(*[service.isPrime(N)
+                                             for _ in range(5)])
+                self.assertEqual(res, [True]*5)
+                self.assertEqual(await service.isPrime(N), True)
+                return service.counts
+
+        counts = asyncio.run(main())
+        self.assertEqual((counts['submitted'], counts['coalesced']), (2, 4))
+
+    def test_admission(self):
+        async def main():
+            async with self.service(maxPending=2) as service:
+                jobs = [asyncio.ensure_future(service.isPrime(2**2203 - 1)),
+                        asyncio.ensure_future(service.isPrime(2**2281 - 1))]
+                await asyncio.sleep(0)
+                with self.assertRaises(ServiceBusy):
+                    await service.isPrime(2**3217 - 1)
+                self.assertEqual(await asyncio.gather(*jobs), [True, True])
+                self.assertTrue(await service.isPrime(2**3217 - 1))
+
+        asyncio.run(main())
+
+    def test_timeoutStopsFactoring(self):
+        async def main():
+            async with self.service() as service:
+                N = hardSemiprime()
+                requests = [service.factor(N, timeout=0.5) for _ in range(2)]
+                res = await asyncio.gather(*requests, return_exceptions=True)
+                self.assertTrue(all(isinstance(r, asyncio.TimeoutError)
+                                    for r in res))
+                self.assertEqual(service.counts['cancelled'], 1)
+                self.assertEqual(service.jobs, {})
+
+                start = time() #The job ends at its next curve or stage.
+                while service.tasks:
+                    await asyncio.sleep(0.01)
+                self.assertLess(time() - start, 5)
+
+        asyncio.run(main())
+
+    def test_madeOutsideLoop(self):
+        """Three big jobs contend for the two big slots of a service made
+        before its loop runs."""
+        service = self.service()
+
+        async def main():
+            async with service:
+                values = [2**2203 - 1, 2**2281 - 1, 2**3217 - 1]
+                return await asyncio.gather(*map(service.isPrime, values))
+
+        self.assertEqual(asyncio.run(main()), [True]*3)
+
+    def test_cancelOneWaiter(self):
+        async def main():
+            async with self.service() as service:
+                N = 2**2203 - 1
+                first = asyncio.ensure_future(service.isPrime(N))
+                second = asyncio.ensure_future(service.isPrime(N))
+                await asyncio.sleep(0)
+                first.cancel()
+                self.assertTrue(await second) #The shared job carries on.
+                self.assertTrue(first.cancelled())
+                self.assertEqual(service.counts['cancelled'], 0)
+
+        asyncio.run(main())
+
+    def test_processPool(self):
+        async def main():
+            async with PrimeService(workers=2) as service:
+                self.assertTrue(await service.isPrime(2**2203 - 1))
+                with self.assertRaises(asyncio.TimeoutError):
+                    await service.factor(hardSemiprime(), timeout=0.5)
+            self.assertTrue(await isPrimeAsync(2**607 - 1))
+            self.assertEqual(await factorAsync(2**64 + 1),
+                             {274177: 1, 67280421310721: 1})
+            await getService().aclose()
+
+        asyncio.run(main())
+
+class TestStop(unittest.TestCase):
+
+    def test_factorIntStops(self):
+        N = hardSemiprime()
+        stop = Event()
+        stop.set()
+        start = time()
+        self.assertEqual(factorInt(N, budget=Budget(stop=stop)), {N: 1})
+        self.assertEqual(factorInt(N, budget=Budget(seconds=-1)), {N: 1})
+        self.assertLess(time() - start, 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Test primeTable.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from primeTable import *
+from sieve import primeRange
+from bisect import bisect_right
+import tempfile
+import os
+
+class TestPrimeTable(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'primes.tbl')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_lookups(self):
+        for limit in [1, 7, 31, 10**4 + 7, 30*blockBytes + 31]:
+            writePrimeTable(self.path, limit)
+            ans = list(primeRange(0, limit))
+            with PrimeTable(self.path) as table:
+                self.assertEqual(list(table.primes()), ans)
+                a, b = min(100, limit-1), min(200, limit)
+                self.assertEqual(list(table.primes(a, b)),
+                                 [p for p in ans if a <= p < b])
+                small = range(min(limit, 3000))
+                self.assertEqual([n for n in small if table.isPrime(n)],
+                                 [p for p in ans if p < 3000])
+                for x in list(small) + list(range(limit-100, limit)):
+                    if x < 0: continue
+                    i = bisect_right(ans, x)
+                    self.assertEqual(table.primePi(x), i)
+                    if i < len(ans):
+                        self.assertEqual(table.nextPrime(x), ans[i])
+                for k in range(1, len(ans)+1, max(1, len(ans)//500)):
+                    self.assertEqual(table.nthPrime(k), ans[k-1])
+
+    def test_errors(self):
+        writePrimeTable(self.path, 100)
+        with PrimeTable(self.path) as table:
+            self.assertRaises(ValueError, table.isPrime, 100)
+            self.assertRaises(ValueError, table.nthPrime, 26)
+            self.assertRaises(ValueError, table.nextPrime, 97)
+
+        with open(self.path, 'r+b') as f:
+            f.write(b'NOTATBL!')
+        self.assertRaises(ValueError, PrimeTable, self.path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Test sieve.py"""
+
+import unittest
+import sys
+sys.path.append('../primes')
+from sieve import *
+from smallDivisors import primesUnder1008
+from deterministicMillerRabin import detMillerRabin
+from itertools import islice
+
+exactPrimeCounts = {
+    2: 25,
+    4: 1229,
+    6: 78498,
+    7: 664579,
+    8: 5761455}
+
+class TestSieve(unittest.TestCase):
+
+    def test_basePrimes(self):
+        toCheck = set([2] + basePrimes(1008))
+        self.assertEqual(toCheck, primesUnder1008)
+
+    def test_smallCounts(self):
+        for n in range(1009):
+            ans = len([p for p in primesUnder1008 if p < n])
+            self.assertEqual(countPrimes(n), ans)
+
+    def test_numPrimesUnder10_k(self):
+        for pow10, ans in exactPrimeCounts.items():
+            self.assertEqual(countPrimes(10**pow10), ans)
+
+    def test_segments(self):
+        """Sieve windows at offsets that straddle the wheel and segments."""
+        for lo in range(0, 120, 7):
+            for hi in range(lo, lo+600, 53):
+                toCheck = [s + 2*i for s, seg in segments(lo, hi)
+                           for i, flag in enumerate(seg) if flag]
+                ans = sorted(p for p in primesUnder1008 if lo <= p < hi)
+                self.assertEqual(toCheck, [p for p in ans if p != 2])
+
+    def test_multipleSegments(self):
+        lo, hi = 10**7, 10**7 + 2*segmentSize + 1001
+        cnt = sum(seg.count(1) for _, seg in segments(lo, hi))
+        self.assertEqual(cnt, countPrimes(hi) - countPrimes(lo))
+
+class TestPrimeGenerators(unittest.TestCase):
+
+    def test_primeRange(self):
+        for a in range(0, 60, 3):
+            for b in range(a, a+900, 97):
+                ans = sorted(p for p in primesUnder1008 if a <= p < b)
+                self.assertEqual(list(primeRange(a, b)), ans)
+
+    def test_blocks(self):
+        lo, hi = 10**6, 10**6 + 4*segmentSize
+        blocks = list(primeRange(lo, hi, blocks=True))
+        self.assertEqual(len(blocks), 2)
+        toCheck = [p for block in blocks for p in block]
+        self.assertEqual(toCheck, list(primeRange(lo, hi)))
+        ans = countPrimes(hi) - countPrimes(lo)
+        self.assertEqual(sum(map(len, blocks)), ans)
+
+    def test_iterPrimes(self):
+        toCheck = list(islice(iterPrimes(), 168))
+        self.assertEqual(toCheck, sorted(primesUnder1008))
+        start = 10**12
+        toCheck = list(islice(iterPrimes(start), 100))
+        ans = filter(detMillerRabin, range(start, start + 10**4))
+        ans = list(islice(ans, 100))
+        self.assertEqual(toCheck, ans)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,9 +4,17 @@ import unittest
 import sys
 sys.path.append('../primes')
 from smallDivisors import *
+from specialCases import fastCases, composite, isPrime
+import backend
 
 class TestsmallDivisors(unittest.TestCase):
 
+    def setUp(self):
+        self.initial = backend.getBackend()
+
+    def tearDown(self):
+        backend.setBackend(self.initial)
+
     def test_isSmallPrime(self):
         toCheck = {x for x in range(2000) if isSmallPrime(x)}
         self.assertEqual(toCheck, primesUnder1008)
@@ -31,5 +39,29 @@ class TestsmallDivisors(unittest.TestCase):
         toCheck = {i: hasSmallDivisor_fastCheck(i) for i in range(3, 1000, 2)}
         self.assertEqual(toCheck, ans)
 
+    def test_smallFactors(self):
+        for bound in [2, 3, 100, 1000]:
+            primes = [p for p in range(2, bound) if p in primesUnder1008]
+            for N in range(1, 3000):
+                ans = [p for p in primes if N%p == 0]
+                self.assertEqual(smallFactors(N, bound), ans)
+
+    def test_deepBound(self):
+        big = 2**521 - 1
+        for name in backend.availableBackends():
+            backend.setBackend(name)
+            self.assertFalse(hasSmallDivisor_fastCheck(big, 10**5))
+            self.assertTrue(hasSmallDivisor_fastCheck(big * 99991, 10**5))
+            self.assertFalse(hasSmallDivisor_fastCheck(big * 99991, 10**4))
+        backend.setBackend(self.initial)
+        self.assertEqual(hasSmallDivisor(big * 99989 * 99991, 10**5), 99989)
+        self.assertEqual(hasSmallDivisor(big * 99991), -1)
+
+    def test_fastCasesBound(self):
+        self.assertEqual(fastCases(99991, divisorBound=10**5), isPrime)
+        self.assertEqual(fastCases(99989*3, divisorBound=10**5), composite)
+        self.assertEqual(fastCases(1009*1013, divisorBound=1014), composite)
+        self.assertEqual(fastCases(1009*1013, divisorBound=1009), 1)
+
 if __name__ == '__main__':
     unittest.main()